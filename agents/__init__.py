@@ -1,9 +1,29 @@
 """
 FarmTech UP - Agent Modules
+
+Agents are imported on first attribute access, so `from agents import Publisher`
+does not pull in the OpenAI SDK or other agents' dependencies.
 """
-from .idea_generator import IdeaGenerator
-from .image_generator import ImageGenerator
-from .tool_builder import ToolBuilder
-from .publisher import Publisher
+import importlib
+
+_AGENT_MODULES = {
+    "IdeaGenerator": ".idea_generator",
+    "ImageGenerator": ".image_generator",
+    "ToolBuilder": ".tool_builder",
+    "Publisher": ".publisher",
+}
 
 __all__ = ["IdeaGenerator", "ImageGenerator", "ToolBuilder", "Publisher"]
+
+
+def __getattr__(name: str):
+    if name in _AGENT_MODULES:
+        module = importlib.import_module(_AGENT_MODULES[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,516 @@
+"""
+FarmTech UP - Asset Optimizer
+Minifies a built tool's HTML/CSS/JS and writes gzip and brotli copies
+
+The readable sources stay in tools/<slug>/; the optimized files go to
+tools/<slug>/dist/ (index.html, style.css, script.js, each with .gz and .br
+siblings for servers that serve precompressed files). Other files the page
+links, such as the infographic, are not copied: the minified HTML and CSS
+reach them with ../. A tool is skipped when the sha256 of its sources
+matches the hash recorded in metadata.json.
+
+The minifiers are deliberately conservative (comments and whitespace only),
+so they never need a JS or CSS parser. Brotli copies need the optional
+`brotli` package; without it only .gz files are written.
+"""
+import gzip
+import hashlib
+import json
+import re
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import (TOOLS_DIR, ASSET_DIST_DIR, ASSET_GZIP_LEVEL, ASSET_BROTLI_QUALITY, ASSET_JS_CHECK,
+                    ASSET_JS_CHECK_TIMEOUT)
+from agents.locking import atomic_write_json
+from agents.profiler import span
+
+# Bump when the minifiers change, so every tool is reprocessed once
+OPTIMIZER_VERSION = 3
+ASSET_FILES = ['index.html', 'style.css', 'script.js']
+
+# A '/' after one of these starts a regex literal rather than a division
+_REGEX_PREFIX_CHARS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_PREFIX_WORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+                       'throw', 'case', 'do', 'else', 'yield', 'await'}
+_WORD_CHARS = re.compile(r'[\w$]')
+_CSS_TIGHT_CHARS = set('{};,>')
+_HTML_RAW_TAGS = re.compile(r'(<(pre|textarea|script|style)\b[^>]*>)(.*?)(</\2\s*>)', re.IGNORECASE | re.DOTALL)
+_HTML_COMMENT = re.compile(r'<!--(?!\[if|<!|>).*?-->', re.DOTALL)
+# References that resolve against the page or stylesheet: attribute values and CSS url()s.
+# Attributes are only looked for inside start tags, never in script or style text.
+_HTML_START_TAG = re.compile(r'''<[a-zA-Z][^\s/>]*(?:\s*(?:"[^"]*"|'[^']*'|[^\s"'>]+))*\s*/?>''')
+_HTML_REF = re.compile(r'''(\s(?:src|href|poster)\s*=\s*)(["']?)([^"'\s>]+)\2''', re.IGNORECASE)
+_HTML_SRCSET = re.compile(r'''(\ssrcset\s*=\s*)(["'])([^"']+)\2''', re.IGNORECASE)
+_CSS_URL = re.compile(r'''(\burl\(\s*)(["']?)([^"')\s]+)\2''', re.IGNORECASE)
+_URL_SCHEME = re.compile(r'[a-z][a-z0-9+.-]*:', re.IGNORECASE)
+
+
+def _skip_quoted(source: str, i: int) -> int:
+    """Index just past the string, template literal or regex starting at source[i]"""
+    quote = source[i]
+    n = len(source)
+    i += 1
+    in_class = False
+    while i < n:
+        c = source[i]
+        if c == '\\':
+            i += 2
+            continue
+        if quote == '`' and source.startswith('${', i):
+            i = _skip_template_expr(source, i + 2)
+            continue
+        if quote == '/':
+            if c == '[':
+                in_class = True
+            elif c == ']':
+                in_class = False
+            elif c == '\n':
+                return i
+            elif c == '/' and not in_class:
+                i += 1
+                while i < n and _WORD_CHARS.match(source[i]):
+                    i += 1
+                return i
+        elif c == quote:
+            return i + 1
+        elif c == '\n' and quote != '`':
+            return i
+        i += 1
+    return n
+
+
+def _skip_template_expr(source: str, i: int) -> int:
+    """Index just past the '}' closing a ${...} expression that starts at source[i]"""
+    depth = 1
+    n = len(source)
+    while i < n:
+        c = source[i]
+        if c in '"\'`':
+            i = _skip_quoted(source, i)
+            continue
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return n
+
+
+def _starts_regex(source: str, i: int) -> bool:
+    """Guess whether the '/' at source[i] starts a regex literal, from what precedes it"""
+    j = i - 1
+    while j >= 0 and source[j].isspace():
+        j -= 1
+    if j < 0:
+        return True
+    if source[j] in _REGEX_PREFIX_CHARS:
+        return True
+    if _WORD_CHARS.match(source[j]):
+        start = j
+        while start > 0 and _WORD_CHARS.match(source[start - 1]):
+            start -= 1
+        return source[start:j + 1] in _REGEX_PREFIX_WORDS
+    return False
+
+
+def _join_space(out: List[str], has_newline: bool, next_char: str, keep_pair) -> None:
+    """Emit the separator for a whitespace run: a newline, a space, or nothing"""
+    prev_char = out[-1][-1] if out and out[-1] else ''
+    if not prev_char or not next_char:
+        return
+    if has_newline:
+        out.append('\n')
+    elif keep_pair(prev_char, next_char):
+        out.append(' ')
+
+
+def minify_js(source: str) -> str:
+    """Strip comments, indentation and blank lines; line breaks are kept so ASI still applies"""
+    def keep_pair(a: str, b: str) -> bool:
+        # `a + +b`, `a - -b` and `a / /re/` must not fuse into a different operator
+        return bool(_WORD_CHARS.match(a) and _WORD_CHARS.match(b)) or (a == b and a in '+-/')
+
+    out = []
+    n = len(source)
+    i = 0
+    while i < n:
+        c = source[i]
+        if c.isspace() or (c == '/' and source.startswith(('//', '/*'), i)):
+            # Whitespace and comments collapse to at most one separator
+            has_newline = False
+            while i < n:
+                c = source[i]
+                if c.isspace():
+                    has_newline |= c == '\n'
+                    i += 1
+                elif source.startswith('//', i):
+                    end = source.find('\n', i)
+                    i = n if end == -1 else end
+                elif source.startswith('/*', i):
+                    end = source.find('*/', i + 2)
+                    comment = source[i:n if end == -1 else end]
+                    has_newline |= '\n' in comment
+                    i = n if end == -1 else end + 2
+                else:
+                    break
+            _join_space(out, has_newline, source[i] if i < n else '', keep_pair)
+            continue
+        if c in '"\'`' or (c == '/' and _starts_regex(source, i)):
+            end = _skip_quoted(source, i)
+            out.append(source[i:end])
+            i = end
+            continue
+        out.append(c)
+        i += 1
+    return ''.join(out).strip() + '\n'
+
+
+def minify_css(source: str) -> str:
+    """Strip comments and collapse whitespace, leaving strings and selectors intact"""
+    def keep_pair(a: str, b: str) -> bool:
+        return a not in _CSS_TIGHT_CHARS and b not in _CSS_TIGHT_CHARS and a != ':'
+
+    out = []
+    n = len(source)
+    i = 0
+    while i < n:
+        c = source[i]
+        if c.isspace() or source.startswith('/*', i):
+            while i < n:
+                if source[i].isspace():
+                    i += 1
+                elif source.startswith('/*', i):
+                    end = source.find('*/', i + 2)
+                    i = n if end == -1 else end + 2
+                else:
+                    break
+            _join_space(out, False, source[i] if i < n else '', keep_pair)
+            continue
+        if c in '"\'':
+            end = _skip_quoted(source, i)
+            out.append(source[i:end])
+            i = end
+            continue
+        if c == '}' and out and out[-1] == ';':
+            out.pop()
+        out.append(c)
+        i += 1
+    return ''.join(out).strip() + '\n'
+
+
+def minify_html(source: str) -> str:
+    """Drop comments, collapse whitespace between tags and minify inline <style>/<script>"""
+    source = _HTML_COMMENT.sub('', source)
+    parts = []
+    last = 0
+    for match in _HTML_RAW_TAGS.finditer(source):
+        parts.append(_collapse_html(source[last:match.start()]))
+        open_tag, tag, body, close_tag = match.groups()
+        tag = tag.lower()
+        if tag == 'style':
+            body = minify_css(body).strip()
+        elif tag == 'script' and 'src=' not in open_tag.lower() and body.strip():
+            type_match = re.search(r'type\s*=\s*["\']?([^"\'\s>]+)', open_tag, re.IGNORECASE)
+            if not type_match or type_match.group(1).lower() in ('text/javascript', 'module', 'application/javascript'):
+                body = minify_js(body).strip()
+        parts.append(open_tag + body + close_tag)
+        last = match.end()
+    parts.append(_collapse_html(source[last:]))
+    return ''.join(parts).strip() + '\n'
+
+
+def _collapse_html(text: str) -> str:
+    # Whitespace between elements can matter for inline layout, so it becomes one space/newline, not nothing
+    text = re.sub(r'\s*\n\s*', '\n', text)
+    return re.sub(r'[ \t\r\f\v]+', ' ', text)
+
+
+MINIFIERS = {'.html': minify_html, '.css': minify_css, '.js': minify_js}
+
+
+def _relink(ref: str) -> str:
+    """`ref` as seen from dist/: local files other than the optimized ones stay one level up"""
+    path = ref.split('#')[0].split('?')[0]
+    if path.startswith('./'):
+        path = path[2:]
+    # Absolute, external, fragment-only and templated (${...}, {{...}}) references are left alone
+    if (not path or path.startswith('/') or _URL_SCHEME.match(path) or '{' in path
+            or path in ASSET_FILES):
+        return ref
+    return '../' + ref
+
+
+def relink_references(text: str, suffix: str) -> str:
+    """Rewrite the relative references in a minified HTML or CSS file for its place in dist/
+
+    Only index.html, style.css and script.js are copied into dist/, so anything else the
+    page links (the infographic, icons, fonts) is pointed back at the tool directory.
+    In HTML only start tags and <style> text are touched; scripts are left as they are,
+    so URLs built in JavaScript are not rewritten.
+    """
+    def attribute(match):
+        return match.group(1) + match.group(2) + _relink(match.group(3)) + match.group(2)
+
+    def srcset(match):
+        candidates = [c.strip().split(None, 1) for c in match.group(3).split(',') if c.strip()]
+        value = ', '.join(' '.join([_relink(c[0]), *c[1:]]) for c in candidates)
+        return match.group(1) + match.group(2) + value + match.group(2)
+
+    def css(css_text):
+        return _CSS_URL.sub(attribute, css_text)
+
+    def start_tag(match):
+        tag = _HTML_REF.sub(attribute, match.group(0))
+        # Inline style="..." attributes can hold url()s too
+        return css(_HTML_SRCSET.sub(srcset, tag))
+
+    def markup(html_text):
+        return _HTML_START_TAG.sub(start_tag, html_text)
+
+    if suffix == '.css':
+        return css(text)
+    if suffix != '.html':
+        return text
+    parts = []
+    last = 0
+    for match in _HTML_RAW_TAGS.finditer(text):
+        parts.append(markup(text[last:match.start()]))
+        open_tag, tag, body, close_tag = match.groups()
+        tag = tag.lower()
+        if tag == 'style':
+            body = css(body)
+        elif tag == 'pre':
+            body = markup(body)
+        # <script> and <textarea> text is not markup
+        parts.append(markup(open_tag) + body + close_tag)
+        last = match.end()
+    parts.append(markup(text[last:]))
+    return ''.join(parts)
+
+
+def _inline_scripts(html: str) -> List[str]:
+    """Bodies of the classic inline <script> elements of a page"""
+    scripts = []
+    for match in _HTML_RAW_TAGS.finditer(html):
+        open_tag, tag, body, _ = match.groups()
+        if tag.lower() != 'script' or 'src=' in open_tag.lower() or not body.strip():
+            continue
+        type_match = re.search(r'type\s*=\s*["\']?([^"\'\s>]+)', open_tag, re.IGNORECASE)
+        if not type_match or type_match.group(1).lower() in ('text/javascript', 'application/javascript'):
+            scripts.append(body)
+    return scripts
+
+
+def _js_sources(name: str, text: str) -> List[str]:
+    return [text] if name.endswith('.js') else _inline_scripts(text) if name.endswith('.html') else []
+
+
+# Compiles (without running) each source read as a JSON list from stdin; prints whether each one parsed
+_NODE_PARSE_CHECK = (
+    "const vm = require('vm');"
+    "const sources = JSON.parse(require('fs').readFileSync(0, 'utf8'));"
+    "console.log(JSON.stringify(sources.map(s => { try { new vm.Script(s); return true; } catch (e) { return false; } })));"
+)
+
+
+def _parse_js(sources: List[str]) -> Optional[List[bool]]:
+    """Whether each JavaScript source parses, via node; None when node is unavailable"""
+    node = shutil.which('node')
+    if not node or not sources:
+        return None
+    import subprocess
+    try:
+        result = subprocess.run([node, '-e', _NODE_PARSE_CHECK], input=json.dumps(sources),
+                                capture_output=True, text=True, encoding='utf-8', timeout=ASSET_JS_CHECK_TIMEOUT)
+        parsed = json.loads(result.stdout)
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+    return parsed if isinstance(parsed, list) and len(parsed) == len(sources) else None
+
+
+def broken_by_minifying(outputs: dict) -> List[str]:
+    """Files whose optimized scripts no longer parse although the readable ones did
+
+    `outputs` maps a file name to its (readable, optimized) text. Scripts that did not
+    parse to begin with (e.g. module syntax) are not held against the optimizer.
+    """
+    broken, pairs = [], []
+    for name, (readable, optimized) in outputs.items():
+        before, after = _js_sources(name, readable), _js_sources(name, optimized)
+        if len(before) != len(after):
+            broken.append(name)
+        elif before:
+            pairs.append((name, before, after))
+    parsed = _parse_js([source for _, before, after in pairs for source in before + after])
+    if parsed is None:
+        return broken
+    i = 0
+    for name, before, after in pairs:
+        ok_before, ok_after = parsed[i:i + len(before)], parsed[i + len(before):i + 2 * len(before)]
+        i += 2 * len(before)
+        if any(b and not a for b, a in zip(ok_before, ok_after)):
+            broken.append(name)
+    return broken
+
+
+def _brotli():
+    """The optional brotli module, or None"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def source_hash(tool_dir: Path, files: Optional[List[str]] = None) -> str:
+    """Hash of a tool's source files and the optimizer version"""
+    digest = hashlib.sha256(f"optimizer={OPTIMIZER_VERSION}\n".encode('utf-8'))
+    for name in files or ASSET_FILES:
+        digest.update(name.encode('utf-8') + b'\0')
+        digest.update((tool_dir / name).read_bytes())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _read_metadata(tool_dir: Path) -> dict:
+    try:
+        with open(tool_dir / 'metadata.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def optimize_tool_dir(tool_dir: Path, force: bool = False) -> Optional[dict]:
+    """Minify and precompress one tool; returns the size report, or None if it was already up to date
+
+    A module-level function (not a method) so the bulk mode can run it in worker processes.
+    """
+    tool_dir = Path(tool_dir)
+    with span('optimize.tool', tool=tool_dir.name):
+        digest = source_hash(tool_dir)
+        metadata = _read_metadata(tool_dir)
+        dist = tool_dir / ASSET_DIST_DIR
+        if (not force and metadata.get('optimization', {}).get('source_hash') == digest
+                and all((dist / name).exists() for name in ASSET_FILES)):
+            return None
+
+        brotli = _brotli()
+        tmp_dist = tool_dir / f".{ASSET_DIST_DIR}.tmp"
+        shutil.rmtree(tmp_dist, ignore_errors=True)
+        tmp_dist.mkdir(parents=True)
+        report = {'source_hash': digest, 'optimizer_version': OPTIMIZER_VERSION, 'files': {}}
+        try:
+            originals, outputs = {}, {}
+            for name in ASSET_FILES:
+                originals[name] = (tool_dir / name).read_bytes()
+                suffix = Path(name).suffix
+                text = originals[name].decode('utf-8')
+                outputs[name] = (relink_references(text, suffix), relink_references(MINIFIERS[suffix](text), suffix))
+            # The minifiers are hand-written; a script they broke ships unminified instead
+            broken = broken_by_minifying(outputs) if ASSET_JS_CHECK else []
+            for name in broken:
+                print(f"[WARN] {tool_dir.name}/{name}: minified script does not parse; keeping it unminified")
+            for name in ASSET_FILES:
+                original = originals[name]
+                readable, minified = (text.encode('utf-8') for text in outputs[name])
+                # Never ship a "minified" file that came out larger
+                if name in broken or len(minified) > len(readable):
+                    minified = readable
+                (tmp_dist / name).write_bytes(minified)
+                # mtime=0 keeps the .gz bytes identical across runs, so git sees no change
+                gzipped = gzip.compress(minified, ASSET_GZIP_LEVEL, mtime=0)
+                (tmp_dist / f"{name}.gz").write_bytes(gzipped)
+                sizes = {'original': len(original), 'minified': len(minified), 'gzip': len(gzipped)}
+                if brotli:
+                    compressed = brotli.compress(minified, quality=ASSET_BROTLI_QUALITY)
+                    (tmp_dist / f"{name}.br").write_bytes(compressed)
+                    sizes['brotli'] = len(compressed)
+                report['files'][name] = sizes
+            # Other files in the tool directory (e.g. the infographic) are not copied;
+            # relink_references pointed the HTML and CSS at them with ../
+            shutil.rmtree(dist, ignore_errors=True)
+            tmp_dist.replace(dist)
+        finally:
+            shutil.rmtree(tmp_dist, ignore_errors=True)
+
+        totals = {}
+        for sizes in report['files'].values():
+            for key, value in sizes.items():
+                totals[key] = totals.get(key, 0) + value
+        report['totals'] = totals
+        best = totals.get('brotli', totals['gzip'])
+        report['saved_bytes'] = totals['original'] - best
+        report['saved_percent'] = round(100 * report['saved_bytes'] / totals['original'], 1) if totals['original'] else 0.0
+        report['optimized_at'] = datetime.now().isoformat()
+
+        metadata['optimization'] = report
+        atomic_write_json(tool_dir / 'metadata.json', metadata)
+        return report
+
+
+def format_report(name: str, report: dict) -> str:
+    totals = report['totals']
+    line = f"{name}: {totals['original'] / 1024:.1f} KB -> {totals['minified'] / 1024:.1f} KB minified"
+    line += f", {totals['gzip'] / 1024:.1f} KB gzip"
+    if 'brotli' in totals:
+        line += f", {totals['brotli'] / 1024:.1f} KB brotli"
+    return line + f" ({report['saved_percent']:.0f}% saved)"
+
+
+class AssetOptimizer:
+    """Optimizes one freshly built tool, or every tool under tools/ in parallel"""
+
+    def __init__(self, tools_dir: Path = TOOLS_DIR):
+        self.tools_dir = tools_dir
+        if not _brotli():
+            print("[WARN] brotli is not installed; writing .gz copies only (pip install brotli)")
+
+    def optimize(self, tool_dir: Path, force: bool = False) -> Optional[dict]:
+        """Optimize one tool; returns its size report (None if unchanged since the last run)"""
+        report = optimize_tool_dir(tool_dir, force)
+        if report:
+            print(f"[OK] {format_report(tool_dir.name, report)}")
+        else:
+            print(f"Assets unchanged since last optimization: {tool_dir.name}")
+        return report
+
+    def tool_dirs(self) -> List[Path]:
+        """Every tool directory that has all the source files"""
+        if not self.tools_dir.exists():
+            return []
+        return sorted(d for d in self.tools_dir.iterdir()
+                      if d.is_dir() and all((d / name).exists() for name in ASSET_FILES))
+
+    def optimize_all(self, workers: Optional[int] = None, force: bool = False) -> tuple:
+        """Reprocess the whole tools tree in worker processes; returns (optimized, unchanged, failed)"""
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        tool_dirs = self.tool_dirs()
+        optimized = unchanged = failed = 0
+        saved = 0
+        with span('optimize.all', tools=len(tool_dirs)):
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(optimize_tool_dir, d, force): d for d in tool_dirs}
+                for future in as_completed(futures):
+                    tool_dir = futures[future]
+                    try:
+                        report = future.result()
+                    except Exception as e:
+                        print(f"[FAILED] {tool_dir.name}: {e}")
+                        failed += 1
+                        continue
+                    if report:
+                        print(f"[OK] {format_report(tool_dir.name, report)}")
+                        saved += report['saved_bytes']
+                        optimized += 1
+                    else:
+                        unchanged += 1
+        print(f"Optimized {optimized} tools ({unchanged} unchanged, {failed} failed), "
+              f"saved {saved / 1024:.1f} KB over the wire")
+        return optimized, unchanged, failed
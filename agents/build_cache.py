@@ -0,0 +1,143 @@
+"""
+FarmTech UP - Build Cache
+Content-addressed store of validated tool builds, keyed on the build prompt
+
+An entry is data/build_cache/<sha256>/ holding index.html, style.css, script.js
+and a manifest with their checksums. Restoring an entry replaces a full
+`claude` build when the same prompt is built again (re-running a failed publish,
+rebuilding after a crash, `--build` twice). Least recently used entries are
+evicted once the cache grows past BUILD_CACHE_MAX_MB.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import BUILD_CACHE_DIR, BUILD_CACHE_MAX_MB, TOOL_REQUIREMENTS
+from agents.locking import atomic_write_json
+from agents.profiler import span
+
+# Bump when the cached file set or manifest layout changes
+CACHE_FORMAT = 1
+MANIFEST = 'manifest.json'
+BUILD_FILES = ['index.html', 'style.css', 'script.js']
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """Size-bounded LRU cache of built tool files"""
+
+    def __init__(self, cache_dir: Path = BUILD_CACHE_DIR, max_mb: float = BUILD_CACHE_MAX_MB,
+                 files: Optional[List[str]] = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.files = files or BUILD_FILES
+        self._lock = threading.Lock()
+
+    def key(self, prompt: str) -> str:
+        """Cache key for a build prompt (and the requirements it was built against)"""
+        digest = hashlib.sha256()
+        digest.update(f"format={CACHE_FORMAT}\n".encode('utf-8'))
+        digest.update(json.dumps(TOOL_REQUIREMENTS, ensure_ascii=False).encode('utf-8'))
+        digest.update(b'\n')
+        digest.update(prompt.encode('utf-8'))
+        return digest.hexdigest()
+
+    def restore(self, key: str, tool_dir: Path) -> bool:
+        """Copy a cached build into tool_dir; returns False on a miss or a damaged entry"""
+        entry = self.cache_dir / key
+        manifest_path = entry / MANIFEST
+        with span('build.cache_restore'):
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                for name, checksum in manifest['files'].items():
+                    if _sha256_file(entry / name) != checksum:
+                        print(f"[WARN] Build cache entry {key[:12]} is damaged, ignoring it")
+                        self._remove(entry)
+                        return False
+                tool_dir.mkdir(parents=True, exist_ok=True)
+                for name in manifest['files']:
+                    shutil.copyfile(entry / name, tool_dir / name)
+                # The manifest's mtime is the entry's last-used time for LRU eviction
+                os.utime(manifest_path)
+            except FileNotFoundError:
+                return False
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[WARN] Could not read build cache entry {key[:12]}: {e}")
+                return False
+        return True
+
+    def store(self, key: str, tool_dir: Path) -> None:
+        """Add a validated build to the cache, then evict old entries if it is over budget"""
+        entry = self.cache_dir / key
+        if (entry / MANIFEST).exists():
+            os.utime(entry / MANIFEST)
+            return
+
+        with span('build.cache_store'):
+            tmp_entry = self.cache_dir / f".tmp-{key}-{os.getpid()}-{threading.get_ident()}"
+            try:
+                tmp_entry.mkdir(parents=True, exist_ok=True)
+                checksums = {}
+                size = 0
+                for name in self.files:
+                    shutil.copyfile(tool_dir / name, tmp_entry / name)
+                    checksums[name] = _sha256_file(tmp_entry / name)
+                    size += (tmp_entry / name).stat().st_size
+                atomic_write_json(tmp_entry / MANIFEST, {
+                    'key': key,
+                    'files': checksums,
+                    'size': size,
+                    'created_at': datetime.now().isoformat(),
+                })
+                # Publish the entry in one step; if another worker won the race, keep theirs
+                os.replace(tmp_entry, entry)
+            except OSError as e:
+                if not (entry / MANIFEST).exists():
+                    print(f"[WARN] Could not cache build: {e}")
+            finally:
+                if tmp_entry.exists():
+                    shutil.rmtree(tmp_entry, ignore_errors=True)
+
+        self.evict()
+
+    def _remove(self, entry: Path) -> None:
+        shutil.rmtree(entry, ignore_errors=True)
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the cache fits max_bytes; returns entries removed"""
+        with self._lock:
+            entries = []
+            for manifest_path in self.cache_dir.glob(f"*/{MANIFEST}"):
+                try:
+                    with open(manifest_path, 'r', encoding='utf-8') as f:
+                        size = json.load(f).get('size', 0)
+                    entries.append((manifest_path.stat().st_mtime, size, manifest_path.parent))
+                except (OSError, ValueError):
+                    continue
+
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, entry in sorted(entries, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                self._remove(entry)
+                total -= size
+                removed += 1
+            if removed:
+                print(f"Build cache: evicted {removed} least recently used entries")
+            return removed
@@ -0,0 +1,141 @@
+"""
+FarmTech UP - HTTP Downloads
+One pooled, retrying HTTP session per process, and streaming downloads that never leave a partial file
+
+A download streams to a temporary file next to the destination and is renamed
+into place only once it is complete and verified: the byte count must match
+Content-Length, a Content-MD5 header (sent by the blob storage that serves
+DALL-E images) must match, and so must an expected SHA-256 when the caller
+has one. Connection errors and 429/5xx responses are retried by the session;
+a body cut off mid-stream is retried here.
+"""
+import base64
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Callable
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import (HTTP_POOL_SIZE, HTTP_RETRIES, HTTP_BACKOFF_SECONDS, HTTP_CONNECT_TIMEOUT,
+                    HTTP_READ_TIMEOUT, HTTP_DOWNLOAD_ATTEMPTS)
+from agents.profiler import span
+
+CHUNK_SIZE = 64 * 1024
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class DownloadError(Exception):
+    """A download that failed, or whose content did not verify"""
+
+
+def get_session():
+    """The process-wide requests session (keep-alive connection pool with retries)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            retry = Retry(
+                total=HTTP_RETRIES,
+                backoff_factor=HTTP_BACKOFF_SECONDS,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset({'GET', 'HEAD'}),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def prewarm() -> None:
+    """Create the session in a background thread (importing requests takes ~100 ms)
+
+    Callers start this before a slow request of their own (e.g. the DALL-E call whose
+    URL they will download), so the first download does not pay for the setup.
+    """
+    if _session is None:
+        threading.Thread(target=get_session, name='http-prewarm', daemon=True).start()
+
+
+def _stream_to(response, tmp_path: Path, max_bytes: Optional[int]) -> tuple:
+    """Write the response body to tmp_path; returns (bytes written, sha256 hex, md5 digest)"""
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    written = 0
+    with open(tmp_path, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            written += len(chunk)
+            if max_bytes and written > max_bytes:
+                raise DownloadError(f"response larger than {max_bytes} bytes")
+            sha256.update(chunk)
+            md5.update(chunk)
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    return written, sha256.hexdigest(), md5.digest()
+
+
+def _verify(response, written: int, sha256: str, md5: bytes, expected_sha256: Optional[str]) -> None:
+    # Content-Length is only a reliable byte count when the body is not content-encoded
+    length = response.headers.get('Content-Length')
+    if length and not response.headers.get('Content-Encoding') and int(length) != written:
+        raise DownloadError(f"truncated: got {written} of {length} bytes")
+    content_md5 = response.headers.get('Content-MD5')
+    if content_md5 and base64.b64decode(content_md5) != md5:
+        raise DownloadError("Content-MD5 mismatch")
+    if expected_sha256 and sha256 != expected_sha256.lower():
+        raise DownloadError("SHA-256 mismatch")
+
+
+def download(url: str, dest: Path, expected_sha256: Optional[str] = None, max_bytes: Optional[int] = None,
+             validate: Optional[Callable[[Path], bool]] = None, attempts: int = HTTP_DOWNLOAD_ATTEMPTS) -> dict:
+    """Stream `url` to `dest` atomically; returns {'bytes', 'sha256'} or raises DownloadError
+
+    `validate` gets the complete temporary file and can reject it (e.g. not an image).
+    """
+    import requests
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest.with_name(f".{dest.name}.{os.getpid()}-{threading.get_ident()}.part")
+    session = get_session()
+    last_error = None
+    try:
+        for attempt in range(1, attempts + 1):
+            try:
+                with span('http.download', attempt=attempt):
+                    with session.get(url, stream=True, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)) as response:
+                        if response.status_code != 200:
+                            # The session has already retried transient statuses
+                            raise DownloadError(f"HTTP {response.status_code}")
+                        length = response.headers.get('Content-Length')
+                        if max_bytes and length and int(length) > max_bytes:
+                            raise DownloadError(f"response of {length} bytes exceeds {max_bytes}")
+                        written, sha256, md5 = _stream_to(response, tmp_path, max_bytes)
+                        _verify(response, written, sha256, md5, expected_sha256)
+                if validate and not validate(tmp_path):
+                    raise DownloadError("content failed validation")
+                os.replace(tmp_path, dest)
+                return {'bytes': written, 'sha256': sha256}
+            except DownloadError as e:
+                last_error = e
+                # A complete response that is wrong will be wrong again; only cut-off bodies are retried
+                if not str(e).startswith('truncated'):
+                    break
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                last_error = DownloadError(f"{type(e).__name__}: {e}")
+            if attempt < attempts:
+                time.sleep(HTTP_BACKOFF_SECONDS * 2 ** (attempt - 1))
+        raise last_error
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
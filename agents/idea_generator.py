@@ -3,55 +3,106 @@ FarmTech UP - Idea Generation Agent
 Generates innovative tool ideas for farmers using Claude Code CLI
 """
 import json
+import math
+import random
 import subprocess
 import re
 import platform
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from config import IDEAS_FILE, IDEA_DOMAIN, IDEA_CONSTRAINTS, CLAUDE_CODE_TIMEOUT
+from config import (IDEA_DOMAIN, IDEA_CONSTRAINTS, CLAUDE_CODE_TIMEOUT,
+                    IDEA_PROMPT_TOKEN_BUDGET, IDEA_PROMPT_RECENT, IDEA_PARALLEL_CANDIDATES,
+                    IDEA_BANK_EXTRA_CANDIDATES, IDEA_THEMES)
+from agents.profiler import span, traced_run
+from agents.similarity import IdeaIndex
+from agents.idea_store import IdeaStore
+from agents.stage_stats import stage_stats
 
 # Windows compatibility
 IS_WINDOWS = platform.system() == 'Windows'
 
+# Rough size of a prompt token, for keeping the "Avoid:" list within its budget
+CHARS_PER_TOKEN = 4
+
 
 class IdeaGenerator:
     """Generates unique tool ideas for farmers using Claude Code CLI"""
 
-    def __init__(self):
-        self.ideas_file = IDEAS_FILE
-        self.existing_ideas = self._load_existing_ideas()
-
-    def _load_existing_ideas(self) -> list:
-        """Load existing ideas to prevent duplicates"""
-        if self.ideas_file.exists():
-            with open(self.ideas_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('ideas', [])
-        return []
+    def __init__(self, candidates: Optional[int] = None, bank_extra: bool = IDEA_BANK_EXTRA_CANDIDATES,
+                 store: Optional[IdeaStore] = None):
+        self.store = store or IdeaStore()
+        self.candidates = max(1, candidates or IDEA_PARALLEL_CANDIDATES)
+        self.bank_extra = bank_extra
+        # Ideas from losing parallel candidates, already saved as pending (see bank_extra)
+        self._banked = []
+        self.index = IdeaIndex()
+        self.index.load(self.existing_ideas)
+        # Guards duplicate check, ID assignment and save when batch workers share this instance
+        self._lock = threading.Lock()
+
+    @property
+    def existing_ideas(self) -> list:
+        """All ideas so far, oldest first"""
+        return self.store.ideas
+
+    def refresh(self) -> None:
+        """Pick up ideas saved by other processes (long-lived schedulers keep this instance)"""
+        with self._lock:
+            # The store also catches up on other processes' lines whenever it appends (saving an
+            # idea, changing a status), and those ideas never reach the index; a count mismatch shows it
+            if self.store.refresh() or len(self.store) != len(self.index):
+                self.index.load(self.existing_ideas)
 
     def _save_idea(self, idea: dict) -> None:
-        """Save new idea to the ideas file"""
-        self.existing_ideas.append(idea)
-        data = {
-            'ideas': self.existing_ideas,
-            'last_updated': datetime.now().isoformat()
-        }
-        with open(self.ideas_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        """Save new idea to the idea store"""
+        self.store.add(idea)
+        self.index.add(idea)
 
     def _get_existing_ideas_summary(self) -> str:
-        """Get summary of existing ideas for the prompt"""
+        """Get summary of existing ideas for the prompt, bounded by IDEA_PROMPT_TOKEN_BUDGET.
+
+        The newest ideas are listed by name; older ones are condensed into their most
+        common topic words, so the prompt stays the same size as the history grows.
+        Exact duplicates are still caught afterwards by the similarity index.
+        """
         if not self.existing_ideas:
             return "No tools have been built yet."
 
-        summaries = []
-        for idea in self.existing_ideas:
-            summaries.append(f"- {idea.get('name', 'Unknown')}: {idea.get('short_description', 'No description')}")
-        return "\n".join(summaries)
+        budget = IDEA_PROMPT_TOKEN_BUDGET * CHARS_PER_TOKEN
+        has_older = len(self.existing_ideas) > IDEA_PROMPT_RECENT
+        # Keep a quarter of the budget for the topic digest when there are older ideas
+        listing_budget = budget * 3 // 4 if has_older else budget
+
+        lines = []
+        used = 0
+        for idea in reversed(self.existing_ideas[-IDEA_PROMPT_RECENT:]):
+            line = f"- {idea.get('name', 'Unknown')}: {idea.get('short_description', 'No description')}"
+            if used + len(line) + 1 > listing_budget:
+                line = f"- {idea.get('name', 'Unknown')}"
+                if used + len(line) + 1 > listing_budget:
+                    break
+            lines.append(line)
+            used += len(line) + 1
+
+        older = len(self.existing_ideas) - len(lines)
+        if older:
+            digest = f"- {older} earlier tools"
+            topics = []
+            used += len(digest) + len(" covering: ")
+            for topic, _ in self.index.topic_counts(older).most_common():
+                if used + len(topic) + 2 > budget:
+                    break
+                topics.append(topic)
+                used += len(topic) + 2
+            lines.append(f"{digest} covering: {', '.join(topics)}" if topics else digest)
+
+        return "\n".join(lines)
 
     def _create_prompt(self) -> str:
         """Create the prompt for Claude Code"""
@@ -143,44 +194,81 @@ Output only the JSON object, no explanation.'''
 
     def _check_duplicate(self, new_idea: dict) -> bool:
         """Check if the idea is too similar to existing ones"""
-        new_name = new_idea.get('name', '').lower()
-        new_desc = new_idea.get('short_description', '').lower()
-
-        for existing in self.existing_ideas:
-            existing_name = existing.get('name', '').lower()
-            existing_desc = existing.get('short_description', '').lower()
-
-            # Simple similarity check - can be enhanced with embeddings
-            if new_name == existing_name:
-                return True
-            if new_desc == existing_desc:
-                return True
-
-            # Check for significant word overlap
-            new_words = set(new_name.split() + new_desc.split())
-            existing_words = set(existing_name.split() + existing_desc.split())
-            overlap = len(new_words & existing_words) / max(len(new_words), 1)
-            if overlap > 0.7:
-                return True
-
+        match = self.index.find_duplicate(new_idea)
+        if match is not None:
+            print(f"Too similar to existing idea: {match}")
+            return True
         return False
 
+    def _accept(self, response: str) -> Optional[dict]:
+        """Parse a claude response and save it if it is a new idea"""
+        print(f"Response received ({len(response)} chars)")
+        print(f"First 300 chars: {response[:300]}")
+        with span('idea.parse'):
+            idea = self._parse_response(response)
+
+        if idea is None:
+            print("Failed to parse idea from response")
+            return None
+
+        with self._lock:
+            with span('idea.duplicate_check'):
+                is_duplicate = self._check_duplicate(idea)
+            if is_duplicate:
+                print(f"Duplicate idea detected: {idea.get('name')}")
+                return None
+
+            # Add metadata
+            idea['id'] = self.store.allocate_id()
+            idea['created_at'] = datetime.now().isoformat()
+            idea['status'] = 'pending'
+
+            # Save and return
+            self._save_idea(idea)
+        return idea
+
+    def _take_banked(self) -> Optional[dict]:
+        """A banked idea that nothing has built or claimed since it was saved"""
+        with self._lock:
+            while self._banked:
+                banked = self._banked.pop(0)
+                current = self.store.get(banked['id'])
+                if current is not None and current.get('status') == 'pending':
+                    return current
+        return None
+
     def generate(self, max_retries: int = 3) -> Optional[dict]:
         """Generate a new unique tool idea using Claude Code CLI"""
-        prompt = self._create_prompt()
+        self.refresh()
+        banked = self._take_banked()
+        if banked:
+            print(f"Using banked idea: {banked['name']}")
+            return banked
+
+        with span('idea.prompt'):
+            prompt = self._create_prompt()
 
+        if self.candidates > 1:
+            return self._generate_parallel(prompt, max_retries)
+
+        call_failed = False
         for attempt in range(max_retries):
+            if call_failed:
+                stage_stats.wait_before_retry(attempt)
+            call_failed = False
             print(f"Generating idea (attempt {attempt + 1}/{max_retries})...")
 
+            started = time.monotonic()
             try:
                 # Call Claude Code CLI directly with the prompt
                 # Use --output-format json for structured output
                 cmd = ['claude', '-p', prompt, '--output-format', 'json']
-                result = subprocess.run(
+                result = traced_run(
                     cmd,
+                    'idea.claude',
                     capture_output=True,
                     text=True,
-                    timeout=CLAUDE_CODE_TIMEOUT,
+                    timeout=stage_stats.timeout('idea', CLAUDE_CODE_TIMEOUT),
                     cwd=str(Path(__file__).parent.parent),
                     shell=IS_WINDOWS,
                     encoding='utf-8',
@@ -188,40 +276,138 @@ Output only the JSON object, no explanation.'''
                 )
 
                 if result.returncode != 0:
+                    stage_stats.record('idea', time.monotonic() - started, 'error')
                     print(f"Claude Code error: {result.stderr}")
+                    call_failed = True
                     continue
+                stage_stats.record('idea', time.monotonic() - started, 'ok')
 
-                response = result.stdout.strip()
-                print(f"Response received ({len(response)} chars)")
-                print(f"First 300 chars: {response[:300]}")
-                idea = self._parse_response(response)
-
+                idea = self._accept(result.stdout.strip())
                 if idea is None:
-                    print("Failed to parse idea from response")
-                    continue
-
-                if self._check_duplicate(idea):
-                    print(f"Duplicate idea detected: {idea.get('name')}")
                     continue
-
-                # Add metadata
-                idea['id'] = f"tool_{len(self.existing_ideas) + 1:03d}"
-                idea['created_at'] = datetime.now().isoformat()
-                idea['status'] = 'pending'
-
-                # Save and return
-                self._save_idea(idea)
                 print(f"Generated new idea: {idea['name']}")
                 return idea
 
             except subprocess.TimeoutExpired:
+                stage_stats.record('idea', time.monotonic() - started, 'timeout')
                 print("Claude Code timed out")
+                call_failed = True
             except Exception as e:
                 print(f"Error generating idea: {e}")
 
         print("Failed to generate idea after all retries")
         return None
 
+    def _spawn_candidate(self, prompt: str) -> subprocess.Popen:
+        cmd = ['claude', '-p', prompt, '--output-format', 'json']
+        with span('idea.claude.spawn', 'subprocess', cmd=cmd[0]):
+            return subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                cwd=str(Path(__file__).parent.parent),
+                shell=IS_WINDOWS,
+                encoding='utf-8',
+                errors='replace'
+            )
+
+    def _wait_candidate(self, process: subprocess.Popen, cancelled: threading.Event) -> Optional[str]:
+        """Wait for one candidate; returns its output, or None if it failed or was cancelled"""
+        started = time.monotonic()
+        with span('idea.claude.wait', 'subprocess', cmd='claude'):
+            try:
+                stdout, stderr = process.communicate(timeout=stage_stats.timeout('idea', CLAUDE_CODE_TIMEOUT))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                stage_stats.record('idea', time.monotonic() - started, 'timeout')
+                print("Claude Code timed out")
+                return None
+
+        if process.returncode != 0:
+            # Killed because another candidate won: not a failure of the call itself
+            if not cancelled.is_set():
+                stage_stats.record('idea', time.monotonic() - started, 'error')
+                print(f"Claude Code error: {stderr}")
+            return None
+        stage_stats.record('idea', time.monotonic() - started, 'ok')
+        return stdout.strip()
+
+    def _bank_candidate(self, future) -> None:
+        """Done-callback for candidates still running when another one won"""
+        try:
+            response = future.result()
+            idea = self._accept(response) if response else None
+        except Exception as e:
+            print(f"Error banking idea: {e}")
+            return
+        if idea:
+            print(f"Banked idea for a later run: {idea['name']}")
+            with self._lock:
+                self._banked.append(idea)
+
+    def _generate_parallel(self, prompt: str, max_retries: int) -> Optional[dict]:
+        """Run several claude calls at once, each steered to a different theme.
+
+        The first response that parses and is not a duplicate wins. The others are
+        killed, or with bank_extra left running and saved as pending ideas.
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        rounds = math.ceil(max_retries / self.candidates)
+        themes = random.sample(IDEA_THEMES, len(IDEA_THEMES))
+
+        for round_number in range(rounds):
+            if round_number:
+                stage_stats.wait_before_retry(round_number)
+            batch = [themes[(round_number * self.candidates + i) % len(themes)] for i in range(self.candidates)]
+            print(f"Generating idea with {len(batch)} parallel candidates "
+                  f"(round {round_number + 1}/{rounds})...")
+
+            cancelled = threading.Event()
+            processes = []
+            try:
+                for theme in batch:
+                    processes.append(self._spawn_candidate(f"{prompt}\n\nFocus area: {theme}"))
+            except OSError as e:
+                print(f"Error generating idea: {e}")
+                for process in processes:
+                    process.kill()
+                return None
+
+            pool = ThreadPoolExecutor(max_workers=len(processes), thread_name_prefix='idea-candidate')
+            futures = [pool.submit(self._wait_candidate, process, cancelled) for process in processes]
+            winner = None
+            seen = set()
+            try:
+                for future in as_completed(futures):
+                    seen.add(future)
+                    response = future.result()
+                    if response:
+                        winner = self._accept(response)
+                    if winner:
+                        break
+            finally:
+                pending = [f for f in futures if f not in seen]
+                if winner and self.bank_extra:
+                    for future in pending:
+                        future.add_done_callback(self._bank_candidate)
+                else:
+                    cancelled.set()
+                    for process in processes:
+                        if process.poll() is None:
+                            process.kill()
+                pool.shutdown(wait=False)
+
+            if winner:
+                if pending and not self.bank_extra:
+                    print(f"Cancelled {len(pending)} other candidate(s)")
+                print(f"Generated new idea: {winner['name']}")
+                return winner
+
+        print("Failed to generate idea after all retries")
+        return None
+
 
 if __name__ == "__main__":
     # Test the idea generator
@@ -0,0 +1,205 @@
+"""
+FarmTech UP - Idea Store
+Append-only idea history with in-memory indexes on id and status
+
+Each line of data/ideas.jsonl is a full snapshot of one idea; the last line for
+an id wins. Saving a new idea or changing its status appends one line, so writes
+stay O(1) however long the history gets. `compact()` rewrites the log with one
+line per idea. A legacy data/ideas.json is migrated on first load and left in
+place: it is tracked in git, and the scheduled CI job commits with `git add -A`,
+so removing it would commit its deletion. The existence of ideas.jsonl records
+the migration; ideas.json is never read again and can be deleted deliberately.
+
+Appends, compaction and ID allocation all happen under one lock file, so
+several processes (a scheduler tick and a manual --build, say) can share the log.
+IDs come from a counter file and are never reused, even for deleted ideas.
+"""
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import IDEAS_FILE, LEGACY_IDEAS_FILE, IDEAS_LOCK_FILE, IDEA_ID_COUNTER_FILE
+from agents.locking import FileLock, atomic_write_text, atomic_write_json
+from agents.profiler import span
+
+ID_PATTERN = re.compile(r'^tool_(\d+)$')
+
+
+class IdeaStore:
+    """Ideas in creation order, looked up by id or status in constant time"""
+
+    def __init__(self, path: Path = IDEAS_FILE, legacy_file: Path = LEGACY_IDEAS_FILE,
+                 lock_file: Path = IDEAS_LOCK_FILE, counter_file: Path = IDEA_ID_COUNTER_FILE):
+        self.path = path
+        self.legacy_file = legacy_file
+        self.counter_file = counter_file
+        self.file_lock = FileLock(lock_file, max_age=60)
+        # Batch workers share one store
+        self._lock = threading.RLock()
+        self._reset()
+        self.load()
+
+    def _reset(self) -> None:
+        self.ideas = []
+        self._by_id = {}
+        # status -> ids, as an insertion-ordered dict used like an ordered set
+        self._by_status = {}
+        self._offset = 0
+        self._inode = None
+        self._lines = 0
+
+    def __len__(self) -> int:
+        return len(self.ideas)
+
+    def _index(self, idea: dict) -> None:
+        idea_id = idea.get('id')
+        current = self._by_id.get(idea_id)
+        if current is None:
+            self.ideas.append(idea)
+            self._by_id[idea_id] = idea
+        else:
+            self._by_status.get(current.get('status'), {}).pop(idea_id, None)
+            # Update in place so references held elsewhere (e.g. the ideas list) stay current
+            current.clear()
+            current.update(idea)
+            idea = current
+        self._by_status.setdefault(idea.get('status'), {})[idea_id] = None
+
+    def _read_from(self, offset: int) -> int:
+        """Apply complete log lines after `offset`; returns how many ideas were new"""
+        before = len(self.ideas)
+        with span('ideas.read'), open(self.path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        # A line without its newline is still being written by another process
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._index(json.loads(line))
+            except json.JSONDecodeError as e:
+                print(f"[WARN] Skipping corrupt line in {self.path.name}: {e}")
+            self._lines += 1
+        self._offset = offset + end
+        self._inode = os.stat(self.path).st_ino
+        return len(self.ideas) - before
+
+    def load(self) -> None:
+        """Load the log, migrating a legacy ideas.json the first time"""
+        with self._lock:
+            self._reset()
+            if not self.path.exists() and self.legacy_file.exists():
+                with self.file_lock:
+                    if not self.path.exists():
+                        self._migrate()
+            if self.path.exists():
+                self._read_from(0)
+
+    def refresh(self) -> bool:
+        """Pick up lines appended by other processes; returns True if ideas were added or reloaded"""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return False
+        with self._lock:
+            if (self._inode is not None and stat.st_ino != self._inode) or stat.st_size < self._offset:
+                # The log was compacted (or replaced) elsewhere: start over
+                self.load()
+                return True
+            if stat.st_size == self._offset:
+                return False
+            return self._read_from(self._offset) > 0
+
+    def _migrate(self) -> None:
+        with open(self.legacy_file, 'r', encoding='utf-8') as f:
+            ideas = json.load(f).get('ideas', [])
+        self._write_all(ideas)
+        print(f"[OK] Migrated {len(ideas)} ideas from {self.legacy_file.name} to {self.path.name} "
+              f"({self.legacy_file.name} is no longer read)")
+
+    def _write_all(self, ideas: List[dict]) -> None:
+        """Atomically replace the log with one line per idea"""
+        with span('ideas.write'):
+            atomic_write_text(self.path, ''.join(json.dumps(idea, ensure_ascii=False) + '\n' for idea in ideas))
+
+    def _append(self, idea: dict) -> None:
+        line = (json.dumps(idea, ensure_ascii=False) + '\n').encode('utf-8')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.file_lock:
+            # Catch up first, so the offset only ever moves past lines this store has applied
+            self.refresh()
+            with span('ideas.write'), open(self.path, 'ab') as f:
+                f.write(line)
+            self._offset += len(line)
+            self._inode = os.stat(self.path).st_ino
+        self._lines += 1
+
+    def allocate_id(self) -> str:
+        """Next tool_NNN ID; monotonic across processes and never handed out twice"""
+        with self._lock, self.file_lock:
+            last = None
+            if self.counter_file.exists():
+                try:
+                    with open(self.counter_file, 'r', encoding='utf-8') as f:
+                        last = int(json.load(f)['last'])
+                except (OSError, ValueError, KeyError, json.JSONDecodeError) as e:
+                    print(f"[WARN] ID counter unreadable, reseeding: {e}")
+            if last is None:
+                # First allocation (or a lost counter): continue after the highest ID ever stored
+                self.refresh()
+                numbers = [int(m.group(1)) for m in (ID_PATTERN.match(str(i)) for i in self._by_id) if m]
+                last = max(numbers, default=0)
+
+            number = last + 1
+            while f"tool_{number:03d}" in self._by_id:
+                number += 1
+            atomic_write_json(self.counter_file, {'last': number, 'updated_at': datetime.now().isoformat()})
+            return f"tool_{number:03d}"
+
+    def add(self, idea: dict) -> None:
+        """Append a new idea"""
+        with self._lock:
+            self._append(idea)
+            self._index(idea)
+
+    def get(self, idea_id: str) -> Optional[dict]:
+        return self._by_id.get(idea_id)
+
+    def with_status(self, status: str) -> List[dict]:
+        """Ideas with the given status, in the order they entered it"""
+        return [self._by_id[idea_id] for idea_id in self._by_status.get(status, {})]
+
+    def latest(self, status: str) -> Optional[dict]:
+        """Idea that most recently entered the given status (for 'pending': the newest idea)"""
+        ids = self._by_status.get(status)
+        if not ids:
+            return None
+        return self._by_id[next(reversed(ids))]
+
+    def set_status(self, idea_id: str, status: str) -> Optional[dict]:
+        """Record a status change (e.g. pending -> built) by appending a snapshot"""
+        with self._lock:
+            idea = self._by_id.get(idea_id)
+            if idea is None or idea.get('status') == status:
+                return idea
+            updated = dict(idea, status=status, updated_at=datetime.now().isoformat())
+            self._append(updated)
+            self._index(updated)
+            return idea
+
+    def compact(self) -> tuple:
+        """Rewrite the log with one line per idea; returns (lines before, lines after)"""
+        with self._lock:
+            with self.file_lock:
+                self.refresh()
+                before = self._lines
+                self._write_all(self.ideas)
+            self.load()
+            return before, self._lines
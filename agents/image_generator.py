@@ -2,39 +2,37 @@
 FarmTech UP - Image Generator Agent
 Creates infographics for tool ideas using OpenAI DALL-E
 """
-import base64
-import requests
+import hashlib
+import json
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from config import OPENAI_API_KEY, TOOLS_DIR
+from config import settings, IMAGE_MAX_BYTES
+from agents.locking import atomic_write_json
+from agents.profiler import span
+from agents.http_download import download, prewarm, DownloadError
+from agents.rate_limit import RateLimiter
 
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    print("Warning: openai not installed. Run: pip install openai")
+DALLE_MODEL = "dall-e-3"
+DALLE_SIZE = "1024x1024"
+DALLE_QUALITY = "standard"
+# Written next to infographic.png, recording the prompt that produced it
+RECORD_FILE = "infographic.json"
+# File signatures of the formats DALL-E returns
+IMAGE_SIGNATURES = (b'\x89PNG\r\n\x1a\n', b'\xff\xd8\xff', b'RIFF')
 
 
-class ImageGenerator:
-    """Generates infographics for farmer tools using OpenAI DALL-E"""
-
-    def __init__(self):
-        self.client = None
-        if OPENAI_AVAILABLE and OPENAI_API_KEY:
-            self.client = OpenAI(api_key=OPENAI_API_KEY)
-
-    def _create_dalle_prompt(self, idea: dict) -> str:
-        """Create a prompt for DALL-E image generation"""
-        name = idea.get('name', 'Farm Tool')
-        features = idea.get('key_features', [])
-        features_text = ', '.join(features[:3]) if features else 'AI-powered features'
+def create_dalle_prompt(idea: dict) -> str:
+    """Create a prompt for DALL-E image generation"""
+    name = idea.get('name', 'Farm Tool')
+    features = idea.get('key_features', [])
+    features_text = ', '.join(features[:3]) if features else 'AI-powered features'
 
-        return f'''Create a professional infographic poster for a mobile app called "{name}" designed for farmers in India.
+    return f'''Create a professional infographic poster for a mobile app called "{name}" designed for farmers in India.
 
 The infographic should include:
 - Title "{name}" prominently at the top
@@ -47,8 +45,85 @@ The infographic should include:
 
 Style: Professional infographic, flat design illustration, vibrant colors, farm theme, mobile app showcase'''
 
+
+def prompt_hash(prompt: str) -> str:
+    """Identifies an image request: the prompt plus the model settings it is sent with"""
+    return hashlib.sha256(f"{DALLE_MODEL}\n{DALLE_SIZE}\n{DALLE_QUALITY}\n{prompt}".encode('utf-8')).hexdigest()
+
+
+def read_record(tool_dir: Path) -> Optional[dict]:
+    try:
+        with open(tool_dir / RECORD_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_record(tool_dir: Path, prompt: str, image_path: Path, adopted: bool = False,
+                 sha256: Optional[str] = None) -> None:
+    """Record which prompt an infographic was generated from (adopted: it predates these records)"""
+    record = {
+        'prompt_hash': prompt_hash(prompt),
+        'model': DALLE_MODEL,
+        'size': DALLE_SIZE,
+        'image': image_path.name,
+        'bytes': image_path.stat().st_size,
+        'sha256': sha256 or hashlib.sha256(image_path.read_bytes()).hexdigest(),
+        'generated_at': datetime.now().isoformat(),
+    }
+    if adopted:
+        record['adopted'] = True
+    atomic_write_json(tool_dir / RECORD_FILE, record)
+
+
+def _is_image(path: Path) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(8).startswith(IMAGE_SIGNATURES)
+
+
+def is_up_to_date(idea: dict, tool_dir: Path) -> bool:
+    """True if tool_dir has an infographic.png generated from the prompt this idea produces now"""
+    record = read_record(tool_dir)
+    return (tool_dir / 'infographic.png').exists() and bool(record) \
+        and record.get('prompt_hash') == prompt_hash(create_dalle_prompt(idea))
+
+
+class ImageGenerator:
+    """Generates infographics for farmer tools using OpenAI DALL-E"""
+
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None):
+        # The OpenAI SDK is heavy to import; the client is created on first use
+        self._client = None
+        self._client_checked = False
+        # Optional limit on DALL-E calls, shared by every thread using this generator
+        self.rate_limiter = rate_limiter
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        """OpenAI client, or None if the SDK or API key is unavailable"""
+        with self._lock:
+            if not self._client_checked:
+                self._client_checked = True
+                api_key = settings.openai_api_key
+                if api_key:
+                    try:
+                        from openai import OpenAI
+                    except ImportError:
+                        print("Warning: openai not installed. Run: pip install openai")
+                        return None
+                    with span('image.client_init'):
+                        self._client = OpenAI(api_key=api_key)
+        return self._client
+
+    def _create_dalle_prompt(self, idea: dict) -> str:
+        return create_dalle_prompt(idea)
+
     def _generate_with_dalle(self, idea: dict, output_path: Path) -> bool:
         """Generate image using OpenAI DALL-E"""
+        # The download session is set up while the client is created and the image generated
+        if settings.openai_api_key:
+            prewarm()
         if not self.client:
             print("OpenAI client not initialized")
             return False
@@ -57,28 +132,32 @@ Style: Professional infographic, flat design illustration, vibrant colors, farm
             prompt = self._create_dalle_prompt(idea)
             print(f"Generating with DALL-E: {idea.get('name')}")
 
-            response = self.client.images.generate(
-                model="dall-e-3",
-                prompt=prompt,
-                size="1024x1024",
-                quality="standard",
-                n=1,
-            )
+            if self.rate_limiter:
+                with span('image.rate_limit'):
+                    self.rate_limiter.acquire()
+            with span('image.generate'):
+                response = self.client.images.generate(
+                    model=DALLE_MODEL,
+                    prompt=prompt,
+                    size=DALLE_SIZE,
+                    quality=DALLE_QUALITY,
+                    n=1,
+                )
 
             # Get the image URL
             image_url = response.data[0].url
 
-            # Download the image
-            img_response = requests.get(image_url)
-            if img_response.status_code == 200:
-                png_path = output_path.with_suffix('.png')
-                with open(png_path, 'wb') as f:
-                    f.write(img_response.content)
-                print(f"Generated DALL-E infographic: {png_path}")
-                return True
-            else:
-                print(f"Failed to download image: {img_response.status_code}")
+            # Stream to a temp file; infographic.png only appears once it is complete and verified
+            png_path = output_path.with_suffix('.png')
+            try:
+                with span('image.download'):
+                    result = download(image_url, png_path, max_bytes=IMAGE_MAX_BYTES, validate=_is_image)
+            except DownloadError as e:
+                print(f"Failed to download image: {e}")
                 return False
+            write_record(output_path.parent, prompt, png_path, sha256=result['sha256'])
+            print(f"Generated DALL-E infographic: {png_path} ({result['bytes'] / 1024:.0f} KB)")
+            return True
 
         except Exception as e:
             print(f"DALL-E generation failed: {e}")
@@ -141,20 +220,50 @@ Style: Professional infographic, flat design illustration, vibrant colors, farm
             print(f"Error creating SVG: {e}")
             return False
 
+    def _make_variants(self, image_path: Path) -> None:
+        """Resized WebP/AVIF copies for the showcase cards (the PNG is kept as the original)"""
+        try:
+            from agents.image_variants import make_variants, summarize
+            manifest = make_variants(image_path)
+        except Exception as e:
+            # Non-fatal: the showcase falls back to the full-size PNG
+            print(f"[WARN] Could not create infographic variants: {e}")
+            return
+        if manifest:
+            print(f"Infographic variants: {summarize(manifest)}")
+
+    def generate_png(self, idea: dict, tool_dir: Path) -> Optional[Path]:
+        """DALL-E infographic plus its resized variants; None if DALL-E is unavailable or failed"""
+        tool_dir.mkdir(parents=True, exist_ok=True)
+        output_path = tool_dir / "infographic"
+        if not self._generate_with_dalle(idea, output_path):
+            return None
+        png_path = output_path.with_suffix('.png')
+        self._make_variants(png_path)
+        return png_path
+
     def generate(self, idea: dict, tool_dir: Path) -> Optional[Path]:
         """Generate an infographic for the given idea"""
         tool_dir.mkdir(parents=True, exist_ok=True)
         output_path = tool_dir / "infographic"
 
+        # Rebuilding the same idea keeps its image instead of paying for a new one
+        if is_up_to_date(idea, tool_dir):
+            print(f"Infographic up to date for: {idea.get('name', 'Unknown')}")
+            return output_path.with_suffix('.png')
+
         print(f"Generating infographic for: {idea.get('name', 'Unknown')}")
 
         # Try DALL-E first
-        if self._generate_with_dalle(idea, output_path):
-            return output_path.with_suffix('.png')
+        png_path = self.generate_png(idea, tool_dir)
+        if png_path:
+            return png_path
 
         # Fall back to SVG
         svg_path = output_path.with_suffix('.svg')
-        if self._create_fallback_svg(idea, svg_path):
+        with span('image.fallback_svg'):
+            created = self._create_fallback_svg(idea, svg_path)
+        if created:
             return svg_path
 
         return None
@@ -0,0 +1,124 @@
+"""
+FarmTech UP - Image Variants
+Resized WebP/AVIF copies of a tool's infographic for responsive <picture> markup
+
+The original infographic.png is kept untouched (it is the archive copy). The
+derivatives go to tools/<slug>/images/ with a manifest.json listing every file
+and its dimensions, which the publisher turns into srcset attributes. A source
+whose hash matches the manifest is not re-encoded.
+"""
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import INFOGRAPHIC_VARIANTS_DIR, INFOGRAPHIC_WIDTHS, INFOGRAPHIC_FORMATS
+from agents.locking import atomic_write_json
+from agents.profiler import span
+
+MANIFEST = 'manifest.json'
+# Bump when widths, formats or encoder settings change, so existing variants are rebuilt
+VARIANTS_VERSION = 1
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+# Encoder effort: about 3x faster than the slowest settings for 5-7% larger files
+ENCODER_OPTIONS = {'webp': {'method': 4}, 'avif': {'speed': 8}}
+
+
+def _supported_formats() -> list:
+    """Configured formats this Pillow build can encode"""
+    from PIL import features
+    supported = []
+    for fmt in INFOGRAPHIC_FORMATS:
+        if features.check(fmt):
+            supported.append(fmt)
+            continue
+        if fmt == 'avif':
+            try:
+                # Pillow releases before 11.3 encode AVIF through a plugin
+                import pillow_avif  # noqa: F401
+                supported.append(fmt)
+                continue
+            except ImportError:
+                pass
+        print(f"[WARN] Pillow cannot encode {fmt.upper()} here; skipping those variants")
+    return supported
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def read_manifest(tool_dir: Path) -> Optional[dict]:
+    """The variants manifest of a tool, or None if it has none"""
+    try:
+        with open(tool_dir / INFOGRAPHIC_VARIANTS_DIR / MANIFEST, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def make_variants(source: Path, force: bool = False) -> Optional[dict]:
+    """Write resized WebP/AVIF copies of `source` next to it; returns the manifest (None if unchanged)"""
+    tool_dir = source.parent
+    out_dir = tool_dir / INFOGRAPHIC_VARIANTS_DIR
+    digest = _sha256(source)
+    current = read_manifest(tool_dir)
+    if (not force and current and current.get('source_hash') == digest
+            and current.get('version') == VARIANTS_VERSION):
+        return None
+
+    from PIL import Image
+    formats = _supported_formats()
+    with span('image.variants', source=source.name):
+        with Image.open(source) as original:
+            width, height = original.size
+            image = original.convert('RGBA' if original.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+        out_dir.mkdir(parents=True, exist_ok=True)
+        variants = {fmt: [] for fmt in formats}
+        # Never upscale; the original width is the largest useful variant
+        widths = sorted({min(w, width) for w in INFOGRAPHIC_WIDTHS})
+        for target_width in widths:
+            target_height = round(height * target_width / width)
+            resized = image if target_width == width else image.resize((target_width, target_height), Image.LANCZOS)
+            for fmt in formats:
+                name = f"{source.stem}-{target_width}.{fmt}"
+                path = out_dir / name
+                tmp_path = path.with_name(f".{name}.tmp")
+                resized.save(tmp_path, format=fmt.upper(), quality=INFOGRAPHIC_FORMATS[fmt], **ENCODER_OPTIONS.get(fmt, {}))
+                tmp_path.replace(path)
+                variants[fmt].append({'file': name, 'width': target_width, 'height': target_height,
+                                      'bytes': path.stat().st_size})
+
+    manifest = {
+        'version': VARIANTS_VERSION,
+        'source': source.name,
+        'source_hash': digest,
+        'source_bytes': source.stat().st_size,
+        'width': width,
+        'height': height,
+        'variants': variants,
+        'created_at': datetime.now().isoformat(),
+    }
+    atomic_write_json(out_dir / MANIFEST, manifest)
+
+    # Drop files from an older width/format set
+    keep = {v['file'] for files in variants.values() for v in files} | {MANIFEST}
+    for path in out_dir.iterdir():
+        if path.name not in keep and path.name.startswith(source.stem):
+            path.unlink()
+    return manifest
+
+
+def summarize(manifest: dict) -> str:
+    """One line describing how much smaller the variants are than the original"""
+    sizes = []
+    for fmt, files in manifest['variants'].items():
+        if files:
+            smallest, largest = files[0], files[-1]
+            sizes.append(f"{fmt} {smallest['bytes'] / 1024:.0f}-{largest['bytes'] / 1024:.0f} KB")
+    return (f"{manifest['source']} ({manifest['source_bytes'] / 1024:.0f} KB) -> "
+            + ', '.join(sizes) + f" at {', '.join(str(v['width']) for v in next(iter(manifest['variants'].values()), []))}px")
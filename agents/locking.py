@@ -0,0 +1,152 @@
+"""
+FarmTech UP - File Locking
+Cross-process lock files and atomic file writes that work the same on Linux, macOS and Windows
+"""
+import json
+import os
+import platform
+import socket
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+# Windows compatibility
+IS_WINDOWS = platform.system() == 'Windows'
+
+
+def pid_alive(pid: int) -> bool:
+    """Best-effort check whether a process is still running"""
+    if IS_WINDOWS:
+        # os.kill() would terminate the process on Windows; rely on max_age there
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class FileLock:
+    """Exclusive lock held by creating a lock file; reentrant within one thread.
+
+    A lock left behind by a crashed process is broken automatically when its PID
+    is gone (same host) or when it is older than max_age seconds.
+    """
+
+    def __init__(self, path: Path, max_age: Optional[float] = None):
+        self.path = Path(path)
+        self.max_age = max_age
+        self._owner = None
+        self._depth = 0
+        self._thread_lock = threading.Lock()
+
+    def _read_holder(self) -> Optional[dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def holder(self) -> Optional[dict]:
+        """Information about the current holder, if the lock is held"""
+        return self._read_holder() if self.path.exists() else None
+
+    def _is_stale(self) -> bool:
+        holder = self._read_holder()
+        if holder is None:
+            # Unreadable: either mid-write or corrupt; only break it once it is old
+            try:
+                age = time.time() - self.path.stat().st_mtime
+            except OSError:
+                return False
+            return age > 30
+        if self.max_age is not None and time.time() - holder.get('acquired_ts', 0) > self.max_age:
+            return True
+        if holder.get('host') == socket.gethostname() and isinstance(holder.get('pid'), int):
+            return not pid_alive(holder['pid'])
+        return False
+
+    def _try_create(self) -> bool:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            fd = os.open(str(self.path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({
+                'pid': os.getpid(),
+                'host': socket.gethostname(),
+                'thread': threading.current_thread().name,
+                'acquired_at': datetime.now().isoformat(),
+                'acquired_ts': time.time(),
+            }, f)
+        return True
+
+    def acquire(self, blocking: bool = True, timeout: Optional[float] = None, poll: float = 0.05) -> bool:
+        """Take the lock; returns False if not blocking (or timed out) and it is held elsewhere"""
+        me = threading.get_ident()
+        with self._thread_lock:
+            if self._owner == me:
+                self._depth += 1
+                return True
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._thread_lock:
+                if self._owner is None:
+                    if self._try_create():
+                        self._owner, self._depth = me, 1
+                        return True
+                    if self._is_stale():
+                        print(f"Breaking stale lock: {self.path} ({self._read_holder()})")
+                        try:
+                            self.path.unlink()
+                        except FileNotFoundError:
+                            pass
+                        continue
+            if not blocking or (deadline is not None and time.monotonic() >= deadline):
+                return False
+            time.sleep(poll)
+
+    def release(self) -> None:
+        with self._thread_lock:
+            if self._owner != threading.get_ident():
+                raise RuntimeError(f"Lock not held by this thread: {self.path}")
+            self._depth -= 1
+            if self._depth == 0:
+                self._owner = None
+                try:
+                    self.path.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Replace a file's contents so readers see either the old or the new file, never half of one"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Unique per writer, so concurrent writers never share a temp file
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def atomic_write_json(path: Path, data, indent: Optional[int] = 2) -> None:
+    """json.dump() to a file via atomic_write_text()"""
+    atomic_write_text(path, json.dumps(data, indent=indent, ensure_ascii=False))
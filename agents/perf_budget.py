@@ -0,0 +1,211 @@
+"""
+FarmTech UP - Performance Budget
+Offline static analysis of a built tool against the page-weight budgets in config
+
+Nothing is fetched: the analyzer parses index.html and style.css, sizes every
+local file they reference, and counts what would be loaded from other hosts
+or would block the first render. Each violation names the file responsible, so
+a failed check feeds straight into the builder's repair attempts. The full
+result is written to tools/<slug>/perf_report.json.
+"""
+import re
+from datetime import datetime
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Optional, List
+from urllib.parse import urlsplit, unquote
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import PERF_BUDGETS, PERF_REPORT_FILE
+from agents.locking import atomic_write_json
+
+ENTRY_FILE = 'index.html'
+# Files a build produces, and therefore the ones a failed check can blame
+SOURCE_FILES = ['index.html', 'style.css', 'script.js']
+_CSS_URL = re.compile(r'''url\(\s*(['"]?)(.*?)\1\s*\)''', re.IGNORECASE | re.DOTALL)
+_CSS_IMPORT = re.compile(r'''@import\s+(?:url\(\s*)?['"]?([^'"\s)]+)''', re.IGNORECASE)
+# Attributes whose value is a URL the browser loads
+_URL_ATTRS = {('script', 'src'), ('link', 'href'), ('img', 'src'), ('iframe', 'src'), ('video', 'src'),
+              ('audio', 'src'), ('source', 'src'), ('embed', 'src'), ('object', 'data'), ('video', 'poster')}
+# <link rel=...> values that make the browser fetch the href
+_FETCHING_RELS = {'stylesheet', 'preload', 'modulepreload', 'icon', 'manifest', 'prefetch'}
+
+
+def _is_external(url: str) -> bool:
+    return bool(urlsplit(url).netloc) or url.startswith('//')
+
+
+class _PageParser(HTMLParser):
+    """Collects resources, head scripts and inline assets from one HTML document"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.in_head = False
+        self.resources = []  # (tag, url, blocking)
+        self.sync_head_scripts = []
+        self.inline_bytes = 0
+        self.data_uris = []  # sizes in bytes
+        self.inline_css = []
+        self._inline_tag = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: value or '' for name, value in attrs}
+        if tag == 'head':
+            self.in_head = True
+        elif tag == 'body':
+            self.in_head = False
+
+        for name, value in attrs.items():
+            if value.startswith('data:'):
+                self.data_uris.append(len(value.encode('utf-8')))
+            elif name == 'style':
+                self.inline_css.append(value)
+            elif name == 'srcset':
+                for candidate in value.split(','):
+                    url = candidate.strip().split(' ')[0]
+                    if url:
+                        self.resources.append((tag, url, False))
+
+        if tag == 'link':
+            rels = set(attrs.get('rel', '').lower().split())
+            if not rels & _FETCHING_RELS:
+                return
+            # Stylesheets block rendering unless they only apply to print
+            blocking = 'stylesheet' in rels and attrs.get('media', 'all') != 'print'
+            self._add(tag, attrs.get('href', ''), blocking)
+        elif tag == 'script':
+            src = attrs.get('src')
+            deferred = 'async' in attrs or 'defer' in attrs or attrs.get('type') == 'module'
+            if src:
+                blocking = self.in_head and not deferred
+                self._add(tag, src, blocking)
+                if blocking:
+                    self.sync_head_scripts.append(src)
+            else:
+                self._inline_tag = 'script'
+        elif tag == 'style':
+            self._inline_tag = 'style'
+        else:
+            for (url_tag, attr) in _URL_ATTRS:
+                if url_tag == tag and attrs.get(attr):
+                    self._add(tag, attrs[attr], False)
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.in_head = False
+        if tag == self._inline_tag:
+            self._inline_tag = None
+
+    def handle_data(self, data):
+        if self._inline_tag:
+            self.inline_bytes += len(data.encode('utf-8'))
+            if self._inline_tag == 'style':
+                self.inline_css.append(data)
+
+    def _add(self, tag: str, url: str, blocking: bool) -> None:
+        if url and not url.startswith('data:'):
+            self.resources.append((tag, url, blocking))
+
+
+def _css_references(css: str) -> tuple:
+    """(urls referenced by a stylesheet, sizes of its data: URIs)"""
+    urls, data_uris = [], []
+    for match in _CSS_URL.finditer(css):
+        url = match.group(2).strip()
+        if url.startswith('data:'):
+            data_uris.append(len(url.encode('utf-8')))
+        elif url:
+            urls.append(url)
+    urls.extend(m.group(1) for m in _CSS_IMPORT.finditer(css) if not m.group(1).lower().startswith('url('))
+    return urls, data_uris
+
+
+def analyze(tool_dir: Path, budgets: Optional[dict] = None) -> dict:
+    """Measure a built tool against its budgets; returns the report (also saved as perf_report.json)"""
+    budgets = {**PERF_BUDGETS, **(budgets or {})}
+    entry = tool_dir / ENTRY_FILE
+    html = entry.read_text(encoding='utf-8', errors='replace')
+    parser = _PageParser()
+    parser.feed(html)
+    parser.close()
+
+    files = {ENTRY_FILE: entry.stat().st_size}
+    external = {}  # url -> file that references it
+    blocking = [url for _, url, is_blocking in parser.resources if is_blocking]
+    data_uris = [(ENTRY_FILE, size) for size in parser.data_uris]
+    inline_bytes = parser.inline_bytes
+    for css in parser.inline_css:
+        _, sizes = _css_references(css)
+        data_uris.extend((ENTRY_FILE, size) for size in sizes)
+
+    pending = [(ENTRY_FILE, url) for _, url, _ in parser.resources]
+    while pending:
+        referrer, url = pending.pop()
+        if _is_external(url):
+            external.setdefault(url, referrer)
+            continue
+        name = unquote(urlsplit(url).path).lstrip('/')
+        path = (tool_dir / name).resolve()
+        if not name or name in files or tool_dir.resolve() not in path.parents or not path.is_file():
+            continue
+        files[name] = path.stat().st_size
+        if path.suffix == '.css':
+            urls, sizes = _css_references(path.read_text(encoding='utf-8', errors='replace'))
+            pending.extend((name, u) for u in urls)
+            data_uris.extend((name, size) for size in sizes)
+
+    # Data URIs are inline assets too, wherever they appear
+    inline_bytes += sum(size for _, size in data_uris)
+    largest_data_uri = max(data_uris, key=lambda d: d[1], default=(ENTRY_FILE, 0))
+    heaviest = max((name for name in files if name in SOURCE_FILES), key=files.get)
+    referrers = list(external.values())
+    metrics = {
+        'page_weight_kb': round(sum(files.values()) / 1024, 1),
+        'external_resources': len(external),
+        'blocking_resources': len(blocking),
+        'sync_head_scripts': len(parser.sync_head_scripts),
+        'inline_kb': round(inline_bytes / 1024, 1),
+        'largest_data_uri_kb': round(largest_data_uri[1] / 1024, 1),
+    }
+    # File to regenerate when a metric is over budget
+    culprits = {
+        'page_weight_kb': heaviest,
+        'external_resources': max(set(referrers), key=referrers.count) if referrers else ENTRY_FILE,
+        'blocking_resources': ENTRY_FILE,
+        'sync_head_scripts': ENTRY_FILE,
+        'inline_kb': ENTRY_FILE,
+        'largest_data_uri_kb': largest_data_uri[0],
+    }
+
+    violations = []
+    for metric, value in metrics.items():
+        budget = budgets.get(metric)
+        if budget is not None and value > budget:
+            violations.append({'metric': metric, 'value': value, 'budget': budget, 'file': culprits[metric]})
+
+    report = {
+        'passed': not violations,
+        'metrics': metrics,
+        'budgets': budgets,
+        'violations': violations,
+        'files': files,
+        'external_resources': list(external),
+        'blocking_resources': blocking,
+        'sync_head_scripts': parser.sync_head_scripts,
+        'checked_at': datetime.now().isoformat(),
+    }
+    atomic_write_json(tool_dir / PERF_REPORT_FILE, report)
+    return report
+
+
+def violations_by_file(report: dict) -> dict:
+    """Failing files mapped to a reason, in the shape ToolBuilder._invalid_files uses"""
+    over = {}
+    for v in report['violations']:
+        over.setdefault(v['file'], []).append(f"{v['metric']} {v['value']} > {v['budget']}")
+    return {file: f"over performance budget: {', '.join(items)}" for file, items in over.items()}
+
+
+def format_violations(report: dict) -> List[str]:
+    return [f"{v['metric']} = {v['value']} (budget {v['budget']}) in {v['file']}" for v in report['violations']]
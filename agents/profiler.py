@@ -0,0 +1,136 @@
+"""
+FarmTech UP - Pipeline Profiler
+Records timing spans across the orchestrator and agents, exports Chrome traces
+"""
+import json
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional
+
+
+class Profiler:
+    """Collects named timing spans from any thread; a no-op until enabled"""
+
+    def __init__(self):
+        self.enabled = False
+        self._events = []
+        self._thread_names = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def enable(self) -> None:
+        """Start recording spans (timestamps are relative to this call)"""
+        self.enabled = True
+        self._origin = time.perf_counter()
+        self._events = []
+        self._thread_names = {}
+
+    @contextmanager
+    def span(self, name: str, category: str = 'pipeline', **args):
+        """Time the enclosed block as one span"""
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            thread = threading.current_thread()
+            event = {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': round((start - self._origin) * 1e6, 1),
+                'dur': round((end - start) * 1e6, 1),
+                'pid': os.getpid(),
+                'tid': thread.ident,
+            }
+            if args:
+                event['args'] = {k: str(v) for k, v in args.items()}
+            with self._lock:
+                self._events.append(event)
+                self._thread_names.setdefault(thread.ident, thread.name)
+
+    def events(self) -> List[dict]:
+        with self._lock:
+            return list(self._events)
+
+    def summary(self) -> List[dict]:
+        """Aggregate spans by name, slowest total first"""
+        totals = {}
+        for event in self.events():
+            row = totals.setdefault(event['name'], {'name': event['name'], 'calls': 0, 'total': 0.0, 'max': 0.0})
+            seconds = event['dur'] / 1e6
+            row['calls'] += 1
+            row['total'] += seconds
+            row['max'] = max(row['max'], seconds)
+        rows = sorted(totals.values(), key=lambda r: r['total'], reverse=True)
+        for row in rows:
+            row['mean'] = row['total'] / row['calls']
+        return rows
+
+    def print_summary(self) -> None:
+        """Print a per-span timing table"""
+        rows = self.summary()
+        wall = time.perf_counter() - self._origin
+        print("\n" + "=" * 78)
+        print(f"  Profile ({wall:.2f}s wall clock)")
+        print("=" * 78)
+        if not rows:
+            print("No spans recorded")
+            return
+        print(f"{'Span':<34} {'Calls':>6} {'Total s':>9} {'Mean s':>9} {'Max s':>9} {'% wall':>7}")
+        print("-" * 78)
+        for row in rows:
+            share = 100 * row['total'] / wall if wall else 0
+            print(f"{row['name'][:34]:<34} {row['calls']:>6} {row['total']:>9.3f} "
+                  f"{row['mean']:>9.3f} {row['max']:>9.3f} {share:>6.1f}%")
+
+    def write_trace(self, path: Path) -> None:
+        """Write spans as a Chrome trace (open in chrome://tracing or ui.perfetto.dev)"""
+        events = self.events()
+        with self._lock:
+            names = dict(self._thread_names)
+        metadata = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}}
+            for tid, name in names.items()
+        ]
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f)
+        print(f"Trace written: {path}")
+
+
+# Shared by the orchestrator and every agent
+profiler = Profiler()
+span = profiler.span
+
+
+def traced_run(cmd: list, span_name: str, timeout: Optional[float] = None, check: bool = False,
+               capture_output: bool = False, **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run() with separate spans for process spawn and wait"""
+    if capture_output:
+        kwargs['stdout'] = subprocess.PIPE
+        kwargs['stderr'] = subprocess.PIPE
+
+    with span(f"{span_name}.spawn", 'subprocess', cmd=cmd[0]):
+        process = subprocess.Popen(cmd, **kwargs)
+
+    with span(f"{span_name}.wait", 'subprocess', cmd=cmd[0]):
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise
+
+    if check and process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stdout, stderr)
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
@@ -2,8 +2,9 @@
 FarmTech UP - Publisher Agent
 Handles Git operations and showcase site updates
 """
+import hashlib
 import json
-import shutil
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, List
@@ -11,51 +12,61 @@ import subprocess
 import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from config import (
-    BASE_DIR, TOOLS_DIR, TOOLS_FILE, SHOWCASE_DIR,
-    GITHUB_TOKEN, GITHUB_REPO, GITHUB_PAGES_URL
-)
+from config import (BASE_DIR, TOOLS_DIR, SHOWCASE_DIR, SHOWCASE_CACHE_FILE, SHOWCASE_FIRST_PAGE_CARDS,
+                    SHOWCASE_FIRST_PAGE_KB, SHOWCASE_SHARD_SIZE, SHOWCASE_SHARDS_DIR, SHOWCASE_SEARCH_INDEX, ASSET_DIST_DIR,
+                    INFOGRAPHIC_VARIANTS_DIR, INFOGRAPHIC_SIZES)
+from agents.locking import atomic_write_json, atomic_write_text
+from agents.tool_registry import ToolRegistry
+from agents.search_index import build_index
+from agents.image_variants import read_manifest, MIME_TYPES, MANIFEST
+from agents.profiler import span, traced_run
+
+# Bump when the card markup changes, so cached cards are rendered again
+CARD_CACHE_VERSION = 1
 
 
 class Publisher:
     """Publishes tools to GitHub and updates the showcase site"""
 
     def __init__(self):
-        self.tools_file = TOOLS_FILE
+        self.registry = ToolRegistry()
         self.showcase_dir = SHOWCASE_DIR
         self.tools_dir = TOOLS_DIR
         self.base_dir = BASE_DIR
+        self.cache_file = SHOWCASE_CACHE_FILE
 
     def _load_tools_registry(self) -> dict:
         """Load the tools registry"""
-        if self.tools_file.exists():
-            with open(self.tools_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {'tools': [], 'last_updated': None}
-
-    def _save_tools_registry(self, data: dict) -> None:
-        """Save the tools registry"""
-        data['last_updated'] = datetime.now().isoformat()
-        with open(self.tools_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-
-    def _add_tool_to_registry(self, tool_info: dict) -> None:
-        """Add a new tool to the registry"""
-        registry = self._load_tools_registry()
-
-        # Check if tool already exists
-        existing = next(
-            (t for t in registry['tools'] if t.get('id') == tool_info.get('id')),
-            None
-        )
-        if existing:
-            # Update existing
-            idx = registry['tools'].index(existing)
-            registry['tools'][idx] = tool_info
-        else:
-            registry['tools'].append(tool_info)
-
-        self._save_tools_registry(registry)
+        return self.registry.snapshot()
+
+    def _tool_page(self, slug: str) -> str:
+        """Path of a tool's page, preferring the minified build when there is one"""
+        if (self.tools_dir / slug / ASSET_DIST_DIR / 'index.html').exists():
+            return f"tools/{slug}/{ASSET_DIST_DIR}/index.html"
+        return f"tools/{slug}/index.html"
+
+    def _generate_image_html(self, slug: str, name: str) -> str:
+        """Card image: a <picture> with AVIF/WebP srcsets when variants exist, else the original"""
+        fallback = f"this.onerror=null; this.src='/tools/{slug}/infographic.svg'; this.onerror=function(){{this.src='/assets/placeholder.svg'}}"
+        manifest = read_manifest(self.tools_dir / slug)
+        variants = {fmt: files for fmt, files in (manifest or {}).get('variants', {}).items() if files}
+        if not variants:
+            return (f'<img src="/tools/{slug}/infographic.png" alt="{name}" width="400" height="200" '
+                    f'loading="lazy" decoding="async" onerror="{fallback}">')
+
+        base = f"/tools/{slug}/{INFOGRAPHIC_VARIANTS_DIR}"
+        sources = []
+        for fmt, files in variants.items():
+            srcset = ', '.join(f"{base}/{v['file']} {v['width']}w" for v in files)
+            sources.append(f'<source type="{MIME_TYPES[fmt]}" sizes="{INFOGRAPHIC_SIZES}" srcset="{srcset}">')
+        sources = '\n          '.join(sources)
+        # Browsers without <picture> support get a mid-sized variant of the last (most widely supported) format
+        files = list(variants.values())[-1]
+        img = files[len(files) // 2]
+        return f'''<picture>
+          {sources}
+          <img src="{base}/{img['file']}" alt="{name}" width="{img['width']}" height="{img['height']}" loading="lazy" decoding="async" onerror="{fallback}">
+        </picture>'''
 
     def _generate_tool_card_html(self, tool: dict) -> str:
         """Generate HTML for a single tool card"""
@@ -72,7 +83,7 @@ class Publisher:
         return f'''
     <div class="tool-card" data-id="{tool.get('id', '')}">
       <div class="tool-image">
-        <img src="/tools/{slug}/infographic.png" alt="{name}" onerror="this.onerror=null; this.src='/tools/{slug}/infographic.svg'; this.onerror=function(){{this.src='/assets/placeholder.svg'}}">
+        {self._generate_image_html(slug, name)}
       </div>
       <div class="tool-content">
         <h2 class="tool-name">{name}</h2>
@@ -81,13 +92,75 @@ class Publisher:
         <ul class="tool-features">
           {features_html}
         </ul>
-        <a href="/tools/{slug}/index.html" class="tool-link">Try Now / अभी आज़माएं →</a>
+        <a href="/{self._tool_page(slug)}" class="tool-link">Try Now / अभी आज़माएं →</a>
       </div>
     </div>'''
 
-    def _generate_showcase_html(self, tools: List[dict]) -> str:
-        """Generate the complete showcase HTML"""
-        tool_cards = '\n'.join(self._generate_tool_card_html(t) for t in tools)
+    def _card_key(self, tool: dict) -> str:
+        """Hash of everything a tool card is rendered from"""
+        slug = tool.get('slug', '')
+        tool_dir = self.tools_dir / slug
+        # The card also depends on the image variants and on whether a minified build exists
+        try:
+            stat = (tool_dir / INFOGRAPHIC_VARIANTS_DIR / MANIFEST).stat()
+            variants = f"{stat.st_size}:{stat.st_mtime_ns}"
+        except OSError:
+            variants = ''
+        dist = (tool_dir / ASSET_DIST_DIR / 'index.html').exists()
+        record = json.dumps(tool, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(f"{CARD_CACHE_VERSION}\n{variants}\n{dist}\n{record}".encode('utf-8')).hexdigest()
+
+    def _load_card_cache(self) -> dict:
+        """Rendered cards by key from the last showcase update"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('cards', {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _render_cards(self, tools: List[dict]) -> tuple:
+        """Card HTML for every tool, reusing cached cards whose inputs are unchanged
+
+        Returns (card HTML per tool, number of cards rendered, the new cache or None if it is unchanged).
+        """
+        cache = self._load_card_cache()
+        cards = {}
+        keys = []
+        rendered = 0
+        for tool in tools:
+            key = self._card_key(tool)
+            keys.append(key)
+            if key in cards:
+                continue
+            if key in cache:
+                cards[key] = cache[key]
+            else:
+                cards[key] = self._generate_tool_card_html(tool)
+                rendered += 1
+        # Cards of removed or changed tools are dropped with the next save
+        return [cards[key] for key in keys], rendered, (cards if cards.keys() != cache.keys() else None)
+
+    def _last_updated(self, registry: dict) -> str:
+        """When the registry last changed (not when the showcase was rendered), so reruns render identically"""
+        dates = [registry.get('last_updated')] + [t.get('published_at') for t in registry.get('tools', [])]
+        parsed = []
+        for value in dates:
+            try:
+                parsed.append(datetime.fromisoformat(value))
+            except (TypeError, ValueError):
+                continue
+        return max(parsed).strftime('%B %d, %Y') if parsed else ''
+
+    def _generate_showcase_html(self, tools: List[dict], tool_cards: Optional[str] = None,
+                                last_updated: str = '', next_shard: str = '') -> str:
+        """Generate the complete showcase HTML (next_shard: URL of the cards that follow, if any)"""
+        if tool_cards is None:
+            tool_cards = '\n'.join(self._generate_tool_card_html(t) for t in tools)
+        updated_html = f'<p class="updated">Last updated: {last_updated}</p>' if last_updated else ''
+        more_html = ''
+        if next_shard:
+            more_html = ('<button type="button" class="load-more" id="load-more" hidden>'
+                         'Show more tools / और उपकरण देखें</button>')
 
         return f'''<!DOCTYPE html>
 <html lang="en">
@@ -112,11 +185,17 @@ class Publisher:
                 <h2>Our Tools / हमारे उपकरण</h2>
                 <p>Simple AI-powered tools designed for farmers in Uttar Pradesh. Works on any smartphone!</p>
                 <p class="hindi">उत्तर प्रदेश के किसानों के लिए डिज़ाइन किए गए सरल AI-संचालित उपकरण। किसी भी स्मार्टफोन पर काम करता है!</p>
+                <form class="search" id="tool-search" role="search" hidden>
+                    <input type="search" id="tool-search-input" data-index="{SHOWCASE_SEARCH_INDEX}" autocomplete="off"
+                           placeholder="Search tools / उपकरण खोजें" aria-label="Search tools / उपकरण खोजें">
+                    <ul class="search-results" id="tool-search-results" aria-live="polite" hidden></ul>
+                </form>
             </section>
 
-            <section class="tools-grid">
+            <section class="tools-grid" data-next="{next_shard}">
                 {tool_cards if tool_cards else '<p class="no-tools">No tools yet. Check back soon! / अभी तक कोई उपकरण नहीं। जल्द ही वापस जांचें!</p>'}
             </section>
+            {more_html}
         </div>
     </main>
 
@@ -124,7 +203,7 @@ class Publisher:
         <div class="container">
             <p>FarmTech UP - Built with ❤️ for Farmers</p>
             <p class="hindi">किसानों के लिए ❤️ के साथ बनाया गया</p>
-            <p class="updated">Last updated: {datetime.now().strftime('%B %d, %Y')}</p>
+            {updated_html}
         </div>
     </footer>
 
@@ -222,6 +301,19 @@ body {
     overflow: hidden;
     box-shadow: 0 4px 20px rgba(0,0,0,0.1);
     transition: transform 0.3s, box-shadow 0.3s;
+    animation: card-in 0.5s ease-out;
+    /* Offscreen cards skip layout and paint until they are scrolled near */
+    content-visibility: auto;
+    contain-intrinsic-size: auto 560px;
+}
+
+@keyframes card-in {
+    from { opacity: 0; transform: translateY(20px); }
+    to { opacity: 1; transform: translateY(0); }
+}
+
+@media (prefers-reduced-motion: reduce) {
+    .tool-card { animation: none; }
 }
 
 .tool-card:hover {
@@ -238,6 +330,12 @@ body {
     overflow: hidden;
 }
 
+.tool-image picture {
+    display: block;
+    width: 100%;
+    height: 100%;
+}
+
 .tool-image img {
     width: 100%;
     height: 100%;
@@ -300,6 +398,75 @@ body {
     background: var(--primary-green);
 }
 
+.search {
+    position: relative;
+    max-width: 520px;
+    margin: 25px auto 0;
+}
+
+.search input {
+    width: 100%;
+    padding: 12px 18px;
+    border: 2px solid var(--primary-green);
+    border-radius: 25px;
+    font-size: 1rem;
+}
+
+.search-results {
+    list-style: none;
+    margin-top: 8px;
+    background: var(--white);
+    border-radius: 12px;
+    box-shadow: 0 4px 20px rgba(0,0,0,0.1);
+    text-align: left;
+    max-height: 60vh;
+    overflow-y: auto;
+}
+
+.search-results a,
+.search-empty {
+    display: block;
+    padding: 10px 18px;
+    color: var(--dark);
+    text-decoration: none;
+}
+
+.search-results a:hover,
+.search-results a:focus {
+    background: #E8F5E9;
+}
+
+.search-results span {
+    display: block;
+    font-size: 0.9rem;
+    color: var(--primary-green);
+}
+
+.search-empty {
+    color: #999;
+}
+
+.load-more {
+    display: block;
+    margin: 30px auto 0;
+    padding: 12px 28px;
+    border: none;
+    border-radius: 25px;
+    background: var(--primary-green);
+    color: var(--white);
+    font-size: 1rem;
+    font-weight: 600;
+    cursor: pointer;
+}
+
+.load-more[hidden] {
+    display: none;
+}
+
+.load-more:disabled {
+    opacity: 0.6;
+}
+
 .no-tools {
     text-align: center;
     padding: 60px;
@@ -345,35 +512,176 @@ body {
     def _generate_showcase_js(self) -> str:
         """Generate JavaScript for the showcase site"""
         return '''// FarmTech UP - Showcase Scripts
+// index.html holds the first tools; the rest arrive as JSON shards of card HTML while scrolling.
+// Search uses an index prebuilt by the publisher (agents/search_index.py), fetched on first use.
 
-document.addEventListener('DOMContentLoaded', function() {
-    // Add animation on scroll
-    const cards = document.querySelectorAll('.tool-card');
-
-    const observer = new IntersectionObserver((entries) => {
-        entries.forEach(entry => {
-            if (entry.isIntersecting) {
-                entry.target.style.opacity = '1';
-                entry.target.style.transform = 'translateY(0)';
+function setupShards() {
+    const grid = document.querySelector('.tools-grid');
+    const more = document.getElementById('load-more');
+    if (!grid || !more || !grid.dataset.next) return;
+
+    let loading = false;
+    let observer = null;
+
+    function nearViewport() {
+        return more.getBoundingClientRect().top < window.innerHeight + 600;
+    }
+
+    function loadNext() {
+        const url = grid.dataset.next;
+        if (loading || !url) return;
+        loading = true;
+        more.disabled = true;
+        fetch(url)
+            .then(response => {
+                if (!response.ok) throw new Error('HTTP ' + response.status);
+                return response.json();
+            })
+            .then(shard => {
+                grid.insertAdjacentHTML('beforeend', shard.cards.join('\\n'));
+                grid.dataset.next = shard.next || '';
+                if (!shard.next) {
+                    if (observer) observer.disconnect();
+                    more.remove();
+                }
+            })
+            .catch(error => console.warn('FarmTech UP - could not load more tools:', error))
+            .finally(() => {
+                loading = false;
+                more.disabled = false;
+                // A tall screen may still show the button after a shard; keep going
+                if (grid.dataset.next && observer && nearViewport()) loadNext();
+            });
+    }
+
+    more.hidden = false;
+    more.addEventListener('click', loadNext);
+    if ('IntersectionObserver' in window) {
+        observer = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) loadNext();
+        }, { rootMargin: '600px 0px' });
+        observer.observe(more);
+    }
+}
+
+// Must match normalize() and tokenize() in agents/search_index.py
+function normalizeText(text) {
+    return text.normalize('NFD').replace(/[\\u093C\\u200C\\u200D]/g, '')
+        .replace(/\\u0901/g, '\\u0902').normalize('NFC').toLowerCase();
+}
+
+function tokenize(text) {
+    return normalizeText(text).match(/[\\p{L}\\p{N}\\p{M}]+/gu) || [];
+}
+
+function searchIndex(index, query, limit) {
+    const stopwords = new Set(index.stopwords);
+    // The last word may still be being typed, so it is kept even if it is a stopword
+    const tokens = tokenize(query).filter((token, i, all) => i === all.length - 1 || !stopwords.has(token));
+    let scores = null;
+    for (const token of tokens) {
+        // Binary search for the first term >= token, then walk the terms it prefixes
+        let lo = 0, hi = index.terms.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (index.terms[mid] < token) lo = mid + 1; else hi = mid;
+        }
+        const found = new Map();
+        for (let i = lo; i < index.terms.length && index.terms[i].startsWith(token); i++) {
+            const postings = index.postings[i];
+            const bonus = index.terms[i] === token ? 2 : 1;
+            // Pairs of (gap to the previous doc, score)
+            for (let j = 0, doc = 0; j < postings.length; j += 2) {
+                doc += postings[j];
+                found.set(doc, (found.get(doc) || 0) + postings[j + 1] * bonus);
             }
-        });
-    }, { threshold: 0.1 });
-
-    cards.forEach(card => {
-        card.style.opacity = '0';
-        card.style.transform = 'translateY(20px)';
-        card.style.transition = 'opacity 0.5s, transform 0.5s';
-        observer.observe(card);
-    });
+        }
+        // A stopword being typed may prefix real words ("to" -> "tomato"); when it does not, ignore it
+        if (!found.size && stopwords.has(token)) continue;
+        // Every word must match
+        if (scores) {
+            for (const [doc, score] of scores) {
+                if (found.has(doc)) scores.set(doc, score + found.get(doc)); else scores.delete(doc);
+            }
+        } else {
+            scores = found;
+        }
+        if (!scores.size) break;
+    }
+    if (!scores) return [];
+    return [...scores].sort((a, b) => b[1] - a[1] || a[0] - b[0]).slice(0, limit).map(([doc]) => index.docs[doc]);
+}
+
+function setupSearch() {
+    const form = document.getElementById('tool-search');
+    const input = document.getElementById('tool-search-input');
+    const results = document.getElementById('tool-search-results');
+    if (!form || !input || !results || !('fetch' in window)) return;
+
+    let index = null;
+    let loading = null;
+
+    function load() {
+        if (!loading) {
+            loading = fetch(input.dataset.index)
+                .then(response => {
+                    if (!response.ok) throw new Error('HTTP ' + response.status);
+                    return response.json();
+                })
+                .then(data => { index = data; })
+                .catch(error => {
+                    loading = null;
+                    console.warn('FarmTech UP - search unavailable:', error);
+                });
+        }
+        return loading;
+    }
+
+    function render() {
+        results.textContent = '';
+        const query = input.value.trim();
+        if (!index || !query) {
+            results.hidden = true;
+            return;
+        }
+        const matches = searchIndex(index, query, 20);
+        if (!matches.length) {
+            const empty = document.createElement('li');
+            empty.className = 'search-empty';
+            empty.textContent = 'No tools found / कोई उपकरण नहीं मिला';
+            results.appendChild(empty);
+        }
+        for (const [name, nameHindi, url] of matches) {
+            const item = document.createElement('li');
+            const link = document.createElement('a');
+            link.href = url;
+            link.textContent = name;
+            if (nameHindi) {
+                const hindi = document.createElement('span');
+                hindi.textContent = nameHindi;
+                link.appendChild(hindi);
+            }
+            item.appendChild(link);
+            results.appendChild(item);
+        }
+        results.hidden = false;
+    }
 
-    // Handle image loading errors
-    document.querySelectorAll('.tool-image img').forEach(img => {
-        img.addEventListener('error', function() {
-            this.src = 'assets/placeholder.svg';
-        });
+    form.hidden = false;
+    form.addEventListener('submit', event => {
+        event.preventDefault();
+        const first = results.querySelector('a');
+        if (first) window.location.href = first.href;
+    });
+    input.addEventListener('focus', load, { once: true });
+    input.addEventListener('input', () => {
+        if (index) render(); else load().then(render);
     });
+}
 
-    console.log('FarmTech UP - Loaded successfully');
+document.addEventListener('DOMContentLoaded', function() {
+    setupShards();
+    setupSearch();
 });'''
 
     def _create_placeholder_svg(self) -> str:
@@ -384,42 +692,112 @@ document.addEventListener('DOMContentLoaded', function() {
   <text x="200" y="180" text-anchor="middle" fill="#4CAF50" font-size="16" font-family="Arial">FarmTech UP</text>
 </svg>'''
 
+    def _shard_url(self, page: int) -> str:
+        return f"{SHOWCASE_SHARDS_DIR}/page-{page}.json"
+
+    def _paginate(self, tools: List[dict], cards: List[str], last_updated: str) -> tuple:
+        """index.html with as many cards as fit the first-page budget, plus JSON shards for the rest
+
+        Returns (index.html, {shard URL: shard JSON}).
+        """
+        budget = SHOWCASE_FIRST_PAGE_KB * 1024
+        with_more = self._generate_showcase_html(tools, '', last_updated, self._shard_url(2))
+        used = len(with_more.encode('utf-8'))
+        first = 0
+        for card in cards[:SHOWCASE_FIRST_PAGE_CARDS]:
+            size = len(card.encode('utf-8')) + 1
+            # Always show at least one card
+            if first and used + size > budget:
+                break
+            used += size
+            first += 1
+        if used > budget:
+            print(f"[WARN] Showcase first page is {used / 1024:.1f} KB, over its {SHOWCASE_FIRST_PAGE_KB} KB budget")
+
+        rest = cards[first:]
+        pages = [rest[i:i + SHOWCASE_SHARD_SIZE] for i in range(0, len(rest), SHOWCASE_SHARD_SIZE)]
+        shards = {}
+        for number, page in enumerate(pages, start=2):
+            shards[self._shard_url(number)] = json.dumps({
+                'page': number,
+                'next': self._shard_url(number + 1) if number - 1 < len(pages) else None,
+                'cards': [card.strip() for card in page],
+            }, ensure_ascii=False, separators=(',', ':'))
+        index = self._generate_showcase_html(tools, '\n'.join(cards[:first]), last_updated,
+                                             self._shard_url(2) if pages else '')
+        return index, shards
+
+    def _write_if_changed(self, path: Path, content: str) -> bool:
+        """Write `content` to `path` unless it already holds exactly that; returns True if written"""
+        data = content.encode('utf-8')
+        try:
+            if path.stat().st_size == len(data) and path.read_bytes() == data:
+                return False
+        except OSError:
+            pass
+        atomic_write_text(path, content)
+        return True
+
     def update_showcase(self) -> bool:
         """Regenerate the showcase site from the tools registry"""
         print("Updating showcase site...")
 
         try:
-            # Load all tools
+            # Load all tools (after taking in any outside edits to tools.json),
+            # refreshing the tools.json view the site is built from
+            self.registry.merge_export()
             registry = self._load_tools_registry()
             tools = registry.get('tools', [])
+            self.registry.export(registry)
 
             # Ensure showcase directory exists
             self.showcase_dir.mkdir(parents=True, exist_ok=True)
             assets_dir = self.showcase_dir / 'assets'
             assets_dir.mkdir(exist_ok=True)
 
-            # Generate files
-            with open(self.showcase_dir / 'index.html', 'w', encoding='utf-8') as f:
-                f.write(self._generate_showcase_html(tools))
-
-            with open(self.showcase_dir / 'style.css', 'w', encoding='utf-8') as f:
-                f.write(self._generate_showcase_css())
-
-            with open(self.showcase_dir / 'script.js', 'w', encoding='utf-8') as f:
-                f.write(self._generate_showcase_js())
-
-            with open(assets_dir / 'placeholder.svg', 'w', encoding='utf-8') as f:
-                f.write(self._create_placeholder_svg())
-
-            print(f"Showcase updated with {len(tools)} tools")
+            # Render files; unchanged tools reuse their cached card
+            start = time.perf_counter()
+            with span('showcase.render', tools=len(tools)):
+                cards, rendered, card_cache = self._render_cards(tools)
+                index, shards = self._paginate(tools, cards, self._last_updated(registry))
+                files = {
+                    self.showcase_dir / 'index.html': index,
+                    self.showcase_dir / 'style.css': self._generate_showcase_css(),
+                    self.showcase_dir / 'script.js': self._generate_showcase_js(),
+                    assets_dir / 'placeholder.svg': self._create_placeholder_svg(),
+                }
+                files.update((self.showcase_dir / url, shard) for url, shard in shards.items())
+                search_index = build_index(tools, self._tool_page)
+                files[self.showcase_dir / SHOWCASE_SEARCH_INDEX] = json.dumps(
+                    search_index, ensure_ascii=False, separators=(',', ':'))
+            render_ms = (time.perf_counter() - start) * 1000
+
+            # Write only the files whose content changed
+            start = time.perf_counter()
+            with span('showcase.write'):
+                written = [path for path, content in files.items() if self._write_if_changed(path, content)]
+                # Shards past the last page (e.g. after tools were removed)
+                for path in (self.showcase_dir / SHOWCASE_SHARDS_DIR).glob('page-*.json'):
+                    if path not in files:
+                        path.unlink()
+                if card_cache is not None:
+                    atomic_write_json(self.cache_file, {'version': CARD_CACHE_VERSION, 'cards': card_cache}, indent=None)
+            write_ms = (time.perf_counter() - start) * 1000
+
+            timing = (f"{rendered} of {len(tools)} cards rendered, {len(shards)} shards, in {render_ms:.1f}ms, "
+                      f"{len(written)} of {len(files)} files written in {write_ms:.1f}ms")
+            if written:
+                print(f"Showcase updated with {len(tools)} tools ({timing})")
+            else:
+                print(f"Showcase unchanged ({timing})")
             return True
 
         except Exception as e:
             print(f"Error updating showcase: {e}")
             return False
 
-    def publish_tool(self, idea: dict, tool_dir: Path) -> bool:
-        """Add a tool to the registry and update the showcase"""
+    def register_tool(self, idea: dict, tool_dir: Path) -> dict:
+        """Add a tool to the registry without regenerating the showcase"""
         print(f"Publishing tool: {idea.get('name')}")
 
         # Create tool info for registry
@@ -428,11 +806,32 @@ document.addEventListener('DOMContentLoaded', function() {
             **idea,
             'slug': slug,
             'published_at': datetime.now().isoformat(),
-            'url': f"tools/{slug}/index.html"
+            'url': self._tool_page(slug)
         }
 
-        # Add to registry
-        self._add_tool_to_registry(tool_info)
+        # Add to registry (a single upsert; tools.json is exported with the showcase)
+        self.registry.upsert(tool_info)
+        return tool_info
+
+    def refresh_tool_urls(self) -> int:
+        """Point registry entries at each tool's current page; returns how many moved
+
+        `url` is recorded at registration, so tools published before their minified build
+        existed (or optimized later in bulk) still name the unminified page until this runs.
+        """
+        moved = 0
+        for tool in self.registry.all():
+            slug = tool.get('slug')
+            if slug and tool.get('url') != self._tool_page(slug):
+                self.registry.upsert({**tool, 'url': self._tool_page(slug)})
+                moved += 1
+        if moved:
+            print(f"[OK] Updated the page url of {moved} registered tools")
+        return moved
+
+    def publish_tool(self, idea: dict, tool_dir: Path) -> bool:
+        """Add a tool to the registry and update the showcase"""
+        self.register_tool(idea, tool_dir)
 
         # Update showcase
         return self.update_showcase()
@@ -443,8 +842,9 @@ document.addEventListener('DOMContentLoaded', function() {
 
         try:
             # Check if git repo exists
-            result = subprocess.run(
+            result = traced_run(
                 ['git', 'status'],
+                'git.status',
                 capture_output=True,
                 text=True,
                 cwd=str(self.base_dir)
@@ -455,30 +855,34 @@ document.addEventListener('DOMContentLoaded', function() {
                 return False
 
             # Add all changes
-            subprocess.run(
+            traced_run(
                 ['git', 'add', '.'],
+                'git.add',
                 cwd=str(self.base_dir),
                 check=True
             )
 
             # Commit
-            subprocess.run(
+            traced_run(
                 ['git', 'commit', '-m', message],
+                'git.commit',
                 cwd=str(self.base_dir),
                 check=True
             )
 
             # Push if remote exists
-            result = subprocess.run(
+            result = traced_run(
                 ['git', 'remote', '-v'],
+                'git.remote',
                 capture_output=True,
                 text=True,
                 cwd=str(self.base_dir)
             )
 
             if 'origin' in result.stdout:
-                subprocess.run(
+                traced_run(
                     ['git', 'push'],
+                    'git.push',
                     cwd=str(self.base_dir),
                     check=True
                 )
@@ -0,0 +1,34 @@
+"""
+FarmTech UP - Rate Limiter
+Client-side token bucket shared by the threads that call a rate-limited API
+"""
+import threading
+import time
+
+
+class RateLimiter:
+    """Allows `per_minute` calls a minute on average, with bursts of up to `burst` calls"""
+
+    def __init__(self, per_minute: float, burst: int = 1):
+        if per_minute <= 0:
+            raise ValueError(f"per_minute must be positive, got {per_minute}")
+        self.interval = 60.0 / per_minute
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a call is allowed; returns the seconds spent waiting"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) / self.interval)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) * self.interval
+            time.sleep(delay)
+            waited += delay
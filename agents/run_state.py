@@ -0,0 +1,189 @@
+"""
+FarmTech UP - Pipeline Run State
+Durable run records so an interrupted pipeline can resume from its first incomplete stage
+"""
+import json
+import os
+import socket
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import RUNS_DIR, PIPELINE_LOCK_MAX_AGE
+from agents.locking import atomic_write_json, pid_alive
+
+# Pipeline stages, in execution order
+STAGES = ['idea', 'build', 'optimize', 'infographic', 'publish', 'git']
+# Stages that use the build's output, so they run again whenever the build does
+BUILD_DEPENDENTS = ['optimize', 'publish', 'git']
+
+
+class RunState:
+    """A persisted record of one pipeline run: stage status, artifacts and timings"""
+
+    def __init__(self, data: dict, runs_dir: Path = RUNS_DIR):
+        self.data = data
+        self.runs_dir = runs_dir
+        self._stage_started = {}
+
+    @property
+    def run_id(self) -> str:
+        return self.data['run_id']
+
+    @property
+    def path(self) -> Path:
+        return self.runs_dir / f"{self.run_id}.json"
+
+    @classmethod
+    def create(cls, mode: str = 'full', skip_git: bool = False, runs_dir: Path = RUNS_DIR) -> 'RunState':
+        """Start a new run record"""
+        now = datetime.now()
+        run_id = f"{now.strftime('%Y%m%d-%H%M%S')}-{os.urandom(3).hex()}"
+        run = cls({
+            'run_id': run_id,
+            'mode': mode,
+            'skip_git': skip_git,
+            'status': 'running',
+            'started_at': now.isoformat(),
+            'updated_at': now.isoformat(),
+            'finished_at': None,
+            'owner': cls._owner(),
+            'stages': {stage: {'status': 'pending'} for stage in STAGES},
+            'artifacts': {},
+        }, runs_dir)
+        run.save()
+        return run
+
+    @classmethod
+    def load(cls, run_id: str, runs_dir: Path = RUNS_DIR) -> Optional['RunState']:
+        """Load a run record by ID"""
+        path = runs_dir / f"{run_id}.json"
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), runs_dir)
+
+    @classmethod
+    def list_runs(cls, runs_dir: Path = RUNS_DIR) -> List['RunState']:
+        """All run records, oldest first"""
+        if not runs_dir.exists():
+            return []
+        runs = []
+        for path in sorted(runs_dir.glob('*.json')):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    runs.append(cls(json.load(f), runs_dir))
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Skipping unreadable run record {path.name}: {e}")
+        return runs
+
+    @classmethod
+    def latest_incomplete(cls, runs_dir: Path = RUNS_DIR) -> Optional['RunState']:
+        """The most recent run that did not complete and is not still running in another process"""
+        for run in reversed(cls.list_runs(runs_dir)):
+            if run.data.get('status') != 'completed' and not run.is_active():
+                return run
+        return None
+
+    @staticmethod
+    def _owner() -> dict:
+        return {'pid': os.getpid(), 'host': socket.gethostname()}
+
+    def is_active(self) -> bool:
+        """True if another live process on this host is still working on the run
+
+        A record not updated for PIPELINE_LOCK_MAX_AGE is abandoned whatever its owner
+        (process IDs are reused, and cannot be checked on Windows).
+        """
+        owner = self.data.get('owner') or {}
+        if self.data.get('status') != 'running' or owner == self._owner():
+            return False
+        if owner.get('host') != socket.gethostname() or not isinstance(owner.get('pid'), int):
+            return False
+        try:
+            age = (datetime.now() - datetime.fromisoformat(self.data['updated_at'])).total_seconds()
+        except (KeyError, TypeError, ValueError):
+            return False
+        return age < PIPELINE_LOCK_MAX_AGE and pid_alive(owner['pid'])
+
+    def claim(self) -> None:
+        """Take over the run in this process (on resume)"""
+        self.data['owner'] = self._owner()
+        self.data['status'] = 'running'
+        self.save()
+
+    def save(self) -> None:
+        """Write the record to disk (temp file + rename, so a crash never leaves half a record)"""
+        self.data['updated_at'] = datetime.now().isoformat()
+        atomic_write_json(self.path, self.data)
+
+    def stage(self, name: str) -> dict:
+        # Records written before a stage existed simply treat it as pending
+        return self.data['stages'].setdefault(name, {'status': 'pending'})
+
+    def is_done(self, name: str) -> bool:
+        """True if the stage completed or was deliberately skipped"""
+        return self.stage(name).get('status') in ('completed', 'skipped')
+
+    def next_stage(self) -> Optional[str]:
+        """First stage that still has to run"""
+        return next((s for s in STAGES if not self.is_done(s)), None)
+
+    def start(self, name: str) -> None:
+        self._stage_started[name] = time.monotonic()
+        stage = self.stage(name)
+        stage['status'] = 'running'
+        stage['started_at'] = datetime.now().isoformat()
+        stage['attempts'] = stage.get('attempts', 0) + 1
+        stage.pop('error', None)
+        self.save()
+
+    def _finish(self, name: str, status: str) -> dict:
+        stage = self.stage(name)
+        stage['status'] = status
+        stage['finished_at'] = datetime.now().isoformat()
+        if name in self._stage_started:
+            stage['duration_s'] = round(time.monotonic() - self._stage_started.pop(name), 3)
+        return stage
+
+    def complete(self, name: str, **artifacts) -> None:
+        """Mark a stage completed and record what it produced"""
+        self._finish(name, 'completed')
+        self.data['artifacts'].update(artifacts)
+        self.save()
+
+    def skip(self, name: str, reason: str = '') -> None:
+        stage = self._finish(name, 'skipped')
+        if reason:
+            stage['reason'] = reason
+        self.save()
+
+    def fail(self, name: str, error: str) -> None:
+        """Mark a stage (and the run) failed; the run stays resumable"""
+        stage = self._finish(name, 'failed')
+        stage['error'] = error
+        self.data['status'] = 'failed'
+        self.save()
+
+    def reset(self, name: str) -> None:
+        """Force a stage to run again (e.g. its artifacts disappeared)"""
+        self.data['stages'][name] = {'status': 'pending'}
+        self.save()
+
+    def reset_dependents(self) -> None:
+        """Force the stages that used the build's output to run again"""
+        for name in BUILD_DEPENDENTS:
+            if self.stage(name).get('status') != 'pending':
+                self.reset(name)
+
+    def finish(self) -> None:
+        """Mark the whole run completed"""
+        self.data['status'] = 'completed'
+        self.data['finished_at'] = datetime.now().isoformat()
+        self.save()
+
+    def artifact(self, key: str, default=None):
+        return self.data['artifacts'].get(key, default)
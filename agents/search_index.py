@@ -0,0 +1,94 @@
+"""
+FarmTech UP - Search Index
+Prefix-searchable inverted index over the showcase tools, in English and Hindi
+
+The index is built at publish time and served as one small JSON file; the
+showcase script fetches it when the search box is first used. Terms are kept
+sorted so the browser finds every term starting with what was typed by binary
+search, without scanning the catalog.
+
+Tokenizing here and in the showcase script must agree:
+- text is NFD-normalized, nukta (U+093C) and zero-width joiners are dropped,
+  chandrabindu is folded into anusvara, then NFC-normalized and lowercased,
+  so "ज़मीन" and "जमीन" (or "पाँच" and "पांच") find each other
+- a token is a run of letters, digits and combining marks (Unicode L, N, M),
+  so Devanagari vowel signs and viramas stay inside their word
+"""
+import unicodedata
+from typing import List, Callable
+
+# Bump when tokenization or the file layout changes
+INDEX_VERSION = 1
+# Searchable fields and how much a match in each counts
+FIELDS = {'name': 4, 'name_hindi': 4, 'key_features': 2, 'short_description': 1}
+STOPWORDS = frozenset(
+    'a an and are as at be by for from in into is it its of on or that the this to with your you '
+    'का की के को में से और है हैं पर लिए एक यह वह भी तो ही'.split()
+)
+MIN_TOKEN_LENGTH = 2
+# Nukta, zero-width non-joiner, zero-width joiner
+_DROPPED = dict.fromkeys(map(ord, '\u093c\u200c\u200d'))
+_DROPPED[0x0901] = '\u0902'  # chandrabindu -> anusvara
+# Characters that end a token (anything but letters, digits and marks), mapped to a space as they are met
+_SEPARATORS = {}
+_CHECKED = set()
+
+
+def normalize(text: str) -> str:
+    """Spelling-insensitive form of `text` (see the module docstring)"""
+    text = unicodedata.normalize('NFD', text).translate(_DROPPED)
+    return unicodedata.normalize('NFC', text).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """Normalized words of `text`, stopwords and one-letter tokens removed"""
+    text = normalize(text)
+    for char in set(text):
+        code = ord(char)
+        if code not in _CHECKED:
+            _CHECKED.add(code)
+            if unicodedata.category(char)[0] not in 'LNM':
+                _SEPARATORS[code] = ' '
+    return [t for t in text.translate(_SEPARATORS).split() if len(t) >= MIN_TOKEN_LENGTH and t not in STOPWORDS]
+
+
+def _utf16_key(term: str) -> bytes:
+    # JavaScript compares strings by UTF-16 code units; sort the same way so its binary search works
+    return term.encode('utf-16-be')
+
+
+def _encode(postings: dict) -> List[int]:
+    """Flat (doc gap, score) pairs in doc order; gaps keep the numbers short in JSON"""
+    encoded, previous = [], 0
+    for doc, score in sorted(postings.items()):
+        encoded += [doc - previous, score]
+        previous = doc
+    return encoded
+
+
+def build_index(tools: List[dict], url_for: Callable[[str], str]) -> dict:
+    """The search index for `tools` (in showcase order); url_for maps a slug to the tool's page
+
+    Layout: `docs` lists [name, name_hindi, url] per tool; `terms` is sorted and
+    `postings[i]` holds flat (doc gap, score) pairs for `terms[i]`.
+    """
+    docs = []
+    scores = {}
+    for doc, tool in enumerate(tools):
+        docs.append([tool.get('name', ''), tool.get('name_hindi', ''), '/' + url_for(tool.get('slug', ''))])
+        for field, weight in FIELDS.items():
+            value = tool.get(field) or ''
+            if isinstance(value, list):
+                value = ' '.join(str(v) for v in value)
+            for term in tokenize(str(value)):
+                postings = scores.setdefault(term, {})
+                postings[doc] = postings.get(doc, 0) + weight
+
+    terms = sorted(scores, key=_utf16_key)
+    return {
+        'version': INDEX_VERSION,
+        'stopwords': sorted(STOPWORDS, key=_utf16_key),
+        'docs': docs,
+        'terms': terms,
+        'postings': [_encode(scores[term]) for term in terms],
+    }
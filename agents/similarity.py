@@ -0,0 +1,187 @@
+"""
+FarmTech UP - Idea Similarity Index
+Indexed near-duplicate detection for generated ideas
+
+An idea is a duplicate of an existing one when the lowercased names or
+descriptions are equal, or when more than `threshold` of its words
+(name + description) also appear in the existing idea. This is the same rule
+the old pairwise scan applied, but answered from an inverted index:
+
+- A match needs more than threshold * |words| shared words. So any
+  (|words| - needed + 1) of the new idea's words must include at least one
+  shared word (prefix filtering). Only the postings of that many of the
+  *rarest* words are probed, which keeps the candidate set tiny even with
+  100k ideas.
+- Candidates are then verified exactly against their stored word sets.
+
+The index is persisted as append-only JSON lines, one entry per idea.
+"""
+import json
+import math
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Optional
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import IDEA_INDEX_FILE, IDEA_SIMILARITY_THRESHOLD
+from agents.profiler import span
+
+# Words too common to say anything about an idea's topic
+STOPWORDS = frozenset(
+    'a an and app are as at based by can for from help helps in into is it its of on or '
+    'that the their this to tool tools using via with farmer farmers farm farming up '
+    'uttar pradesh india ai simple smart mobile hindi english'.split()
+)
+
+# Postings entries a lookup may scan beyond the mandatory prefix to prune candidates
+PROBE_BUDGET = 2000
+
+
+def idea_words(idea: dict) -> frozenset:
+    """Words compared for overlap (same tokenization as the original check)"""
+    name = (idea.get('name') or '').lower()
+    desc = (idea.get('short_description') or '').lower()
+    return frozenset(name.split() + desc.split())
+
+
+class IdeaIndex:
+    """Inverted word index over ideas with exact-name/description lookups"""
+
+    def __init__(self, index_file: Path = IDEA_INDEX_FILE, threshold: float = IDEA_SIMILARITY_THRESHOLD):
+        self.index_file = index_file
+        self.threshold = threshold
+        self._reset()
+
+    def _reset(self) -> None:
+        self.ids = []
+        self.names = []
+        self.word_sets = []
+        self.postings = {}
+        self.by_name = {}
+        self.by_desc = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _add_entry(self, idea_id: str, name: str, desc: str, words: frozenset) -> None:
+        doc = len(self.ids)
+        self.ids.append(idea_id)
+        self.names.append(name)
+        self.word_sets.append(words)
+        self.by_name.setdefault(name, doc)
+        self.by_desc.setdefault(desc, doc)
+        for word in words:
+            self.postings.setdefault(word, []).append(doc)
+
+    @staticmethod
+    def _entry(idea: dict) -> dict:
+        return {
+            'id': idea.get('id', ''),
+            'name': (idea.get('name') or '').lower(),
+            'desc': (idea.get('short_description') or '').lower(),
+            'words': sorted(idea_words(idea)),
+        }
+
+    def load(self, ideas: Iterable[dict]) -> None:
+        """Load the persisted index, rebuilding it if it does not match the ideas"""
+        ideas = list(ideas)
+        self._reset()
+        entries = []
+        if self.index_file.exists():
+            with span('similarity.load'):
+                try:
+                    with open(self.index_file, 'r', encoding='utf-8') as f:
+                        entries = [json.loads(line) for line in f if line.strip()]
+                except (OSError, json.JSONDecodeError) as e:
+                    print(f"Idea index unreadable, rebuilding: {e}")
+                    entries = []
+
+        expected_last = ideas[-1].get('id', '') if ideas else None
+        if len(entries) == len(ideas) and (not entries or entries[-1]['id'] == expected_last):
+            for entry in entries:
+                self._add_entry(entry['id'], entry['name'], entry['desc'], frozenset(entry['words']))
+            return
+
+        self.rebuild(ideas)
+
+    def rebuild(self, ideas: Iterable[dict]) -> None:
+        """Rebuild the index from scratch and rewrite the index file"""
+        with span('similarity.rebuild'):
+            self._reset()
+            lines = []
+            for idea in ideas:
+                entry = self._entry(idea)
+                self._add_entry(entry['id'], entry['name'], entry['desc'], frozenset(entry['words']))
+                lines.append(json.dumps(entry, ensure_ascii=False))
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.index_file, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + ('\n' if lines else ''))
+
+    def add(self, idea: dict) -> None:
+        """Index a newly saved idea (appends one line to the index file)"""
+        entry = self._entry(idea)
+        self._add_entry(entry['id'], entry['name'], entry['desc'], frozenset(entry['words']))
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.index_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def topic_counts(self, first: Optional[int] = None) -> Counter:
+        """How many of the first `first` ideas (default: all) mention each topic word"""
+        first = len(self.ids) if first is None else first
+        counts = Counter()
+        for word, postings in self.postings.items():
+            topic = word.strip('.,;:!?()[]"\'-/')
+            if len(topic) < 3 or topic in STOPWORDS:
+                continue
+            hits = bisect_left(postings, first)
+            if hits:
+                counts[topic] += hits
+        return counts
+
+    def find_duplicate(self, idea: dict) -> Optional[str]:
+        """Name of the first existing idea the new one duplicates, or None"""
+        name = (idea.get('name') or '').lower()
+        desc = (idea.get('short_description') or '').lower()
+
+        exact = [doc for doc in (self.by_name.get(name), self.by_desc.get(desc)) if doc is not None]
+        if exact:
+            return self.names[min(exact)]
+
+        words = idea_words(idea)
+        size = max(len(words), 1)
+        # Overlap must exceed threshold * size; probing one word more than the
+        # prefix-filter bound keeps the pruning safe against float rounding
+        needed = max(1, math.floor(self.threshold * size))
+        if needed > len(words):
+            return None
+
+        # Rarest words first: the first (len - needed + 1) are the prefix every match must hit
+        ordered = sorted(words, key=lambda w: len(self.postings.get(w, ())))
+        prefix = len(words) - needed + 1
+        hits = Counter()
+        for word in ordered[:prefix]:
+            hits.update(self.postings.get(word, ()))
+
+        # Count filter: each extra word probed raises the number of hits a match must have
+        extra = 0
+        budget = PROBE_BUDGET
+        for word in ordered[prefix:]:
+            postings = self.postings.get(word, ())
+            budget -= len(postings)
+            if budget < 0:
+                break
+            hits.update(postings)
+            extra += 1
+
+        if prefix + extra == len(words):
+            # Every word was probed, so the hit counts are the exact overlaps
+            matches = [doc for doc, count in hits.items() if count / size > self.threshold]
+            return self.names[min(matches)] if matches else None
+
+        min_hits = extra + 1
+        for doc in sorted(doc for doc, count in hits.items() if count >= min_hits):
+            if len(words & self.word_sets[doc]) / size > self.threshold:
+                return self.names[doc]
+        return None
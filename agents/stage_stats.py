@@ -0,0 +1,146 @@
+"""
+FarmTech UP - Stage Statistics
+Rolling history of claude call durations, used for adaptive timeouts and retry backoff
+
+Every idea/build call appends {name, duration, outcome} to data/stage_stats.jsonl.
+Once a stage has enough samples, its timeout becomes p99 x STAGE_TIMEOUT_MARGIN
+(clamped), instead of the global CLAUDE_CODE_TIMEOUT. Calls that timed out count
+as censored samples at the time they were cut off: they took at least that long,
+so a run of timeouts raises the timeout instead of leaving it where it was.
+"""
+import json
+import math
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import (STAGE_STATS_FILE, STAGE_STATS_WINDOW, STAGE_STATS_MIN_SAMPLES, STAGE_TIMEOUT_MARGIN,
+                    STAGE_TIMEOUT_MIN, STAGE_TIMEOUT_MAX, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX)
+from agents.locking import atomic_write_text
+
+# Outcomes that count as a successful call
+SUCCESS_OUTCOMES = ('ok', 'completed_early')
+# Outcomes whose duration is a lower bound on how long the call needed
+CENSORED_OUTCOMES = ('timeout',)
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # The smallest value with at least pct% of the samples at or below it
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class StageStats:
+    """Last STAGE_STATS_WINDOW outcomes per stage, persisted as append-only JSON lines"""
+
+    def __init__(self, path: Path = STAGE_STATS_FILE, window: int = STAGE_STATS_WINDOW):
+        self.path = path
+        self.window = window
+        self._history = None
+        self._lines = 0
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        """Read the history on first use (so importing this module touches no files)"""
+        if self._history is None:
+            self._history = {}
+            if self.path.exists():
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        self._history.setdefault(record['name'], deque(maxlen=self.window)).append(record)
+                        self._lines += 1
+        return self._history
+
+    def record(self, name: str, duration: float, outcome: str) -> None:
+        """Add one call's duration and outcome ('ok', 'error', 'timeout', 'stalled', ...)"""
+        record = {'name': name, 'duration': round(duration, 3), 'outcome': outcome,
+                  'at': datetime.now().isoformat(timespec='seconds')}
+        with self._lock:
+            history = self._load()
+            history.setdefault(name, deque(maxlen=self.window)).append(record)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+            self._lines += 1
+            # Keep the file close to the rolling window instead of growing forever
+            if self._lines > 4 * self.window * max(len(history), 1):
+                lines = [json.dumps(r) for records in history.values() for r in records]
+                atomic_write_text(self.path, '\n'.join(lines) + '\n')
+                self._lines = len(lines)
+
+    def durations(self, name: str, successful_only: bool = True) -> List[float]:
+        with self._lock:
+            records = list(self._load().get(name, ()))
+        return [r['duration'] for r in records if not successful_only or r['outcome'] in SUCCESS_OUTCOMES]
+
+    def timeout(self, name: str, default: float) -> float:
+        """p99 of recent successful and timed-out durations x margin, or `default` until there is enough history"""
+        with self._lock:
+            records = list(self._load().get(name, ()))
+        samples = [r['duration'] for r in records if r['outcome'] in SUCCESS_OUTCOMES + CENSORED_OUTCOMES]
+        if len(samples) < STAGE_STATS_MIN_SAMPLES:
+            return default
+        return min(STAGE_TIMEOUT_MAX, max(STAGE_TIMEOUT_MIN, percentile(samples, 99) * STAGE_TIMEOUT_MARGIN))
+
+    def backoff(self, attempt: int) -> float:
+        """Seconds to wait before retry number `attempt` (1-based): exponential with full jitter"""
+        return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** (attempt - 1)))
+
+    def wait_before_retry(self, attempt: int) -> None:
+        delay = self.backoff(attempt)
+        if delay >= 0.1:
+            print(f"Retrying in {delay:.1f}s...")
+        time.sleep(delay)
+
+    def summary(self, default_timeout: Optional[float] = None) -> List[dict]:
+        """Per-stage counts, success rate, latency percentiles and the timeout in effect"""
+        with self._lock:
+            names = sorted(self._load())
+        rows = []
+        for name in names:
+            with self._lock:
+                records = list(self._history[name])
+            ok = [r['duration'] for r in records if r['outcome'] in SUCCESS_OUTCOMES]
+            outcomes = {}
+            for r in records:
+                outcomes[r['outcome']] = outcomes.get(r['outcome'], 0) + 1
+            rows.append({
+                'name': name,
+                'count': len(records),
+                'success_rate': len(ok) / len(records) if records else 0.0,
+                'p50': percentile(ok, 50),
+                'p90': percentile(ok, 90),
+                'p99': percentile(ok, 99),
+                'timeout': self.timeout(name, default_timeout) if default_timeout else None,
+                'outcomes': outcomes,
+            })
+        return rows
+
+    def print_summary(self, default_timeout: float) -> None:
+        rows = self.summary(default_timeout)
+        if not rows:
+            print("No stage history yet")
+            return
+        print(f"{'Stage':<10} {'Calls':>6} {'OK %':>6} {'p50 s':>8} {'p90 s':>8} {'p99 s':>8} {'Timeout s':>10}  Outcomes")
+        for row in rows:
+            outcomes = ', '.join(f"{k}={v}" for k, v in sorted(row['outcomes'].items()))
+            print(f"{row['name']:<10} {row['count']:>6} {row['success_rate'] * 100:>5.0f}% "
+                  f"{row['p50']:>8.1f} {row['p90']:>8.1f} {row['p99']:>8.1f} {row['timeout']:>10.0f}  {outcomes}")
+
+
+# Shared by the agents in this process
+stage_stats = StageStats()
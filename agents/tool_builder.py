@@ -6,23 +6,66 @@ import json
 import subprocess
 import os
 import platform
+import signal
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, List, Iterable
 import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from config import TOOLS_DIR, TOOL_REQUIREMENTS, CLAUDE_CODE_TIMEOUT
+from config import (TOOLS_DIR, TOOL_REQUIREMENTS, CLAUDE_CODE_TIMEOUT, PERF_BUDGETS,
+                    BUILD_STALL_SECONDS, BUILD_SETTLE_SECONDS, BUILD_POLL_SECONDS)
+from agents.profiler import span
+from agents.build_cache import BuildCache
+from agents.stage_stats import stage_stats
 
 # Windows compatibility
 IS_WINDOWS = platform.system() == 'Windows'
 
+REQUIRED_FILES = ['index.html', 'style.css', 'script.js']
+# Longest excerpt of each good file passed as context to a repair build
+REPAIR_CONTEXT_MAX_CHARS = 12000
+
+
+class BuildResult:
+    """Outcome of one supervised claude build call"""
+
+    def __init__(self, returncode: Optional[int], stderr: str, outcome: str):
+        self.returncode = returncode
+        self.stderr = stderr
+        # 'exited', 'completed_early' or 'stalled'
+        self.outcome = outcome
+
+
+def _kill_process_tree(process: subprocess.Popen) -> None:
+    """Stop claude and anything it started (it runs in its own process group)"""
+    if process.poll() is not None:
+        return
+    try:
+        if IS_WINDOWS:
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)], capture_output=True)
+        else:
+            os.killpg(process.pid, signal.SIGTERM)
+            try:
+                process.wait(timeout=3)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError, OSError):
+        process.kill()
+    process.wait()
+
 
 class ToolBuilder:
     """Builds web applications for farmer tools using Claude Code CLI"""
 
-    def __init__(self):
+    def __init__(self, use_cache: bool = True):
         self.tools_dir = TOOLS_DIR
+        self.cache = BuildCache() if use_cache else None
+        # Slugs currently being built, so parallel workers never share a tool directory
+        self._active_slugs = set()
+        self._lock = threading.Lock()
 
     def _create_tool_slug(self, name: str) -> str:
         """Create a URL-friendly slug from the tool name"""
@@ -61,6 +104,12 @@ BUILD INSTRUCTIONS:
 2. Create style.css - Mobile-first responsive styles
 3. Create script.js - Application logic with simulated AI features
 
+PERFORMANCE BUDGET (checked automatically; builds over budget are rejected):
+- Total page weight under {PERF_BUDGETS['page_weight_kb']} KB (index.html, style.css, script.js and local assets)
+- No CDN frameworks or web fonts: at most {PERF_BUDGETS['external_resources']} resources from other hosts
+- No synchronous <script> in <head>: load script.js with defer or at the end of <body>
+- Inline <style>/<script> and data: URIs under {PERF_BUDGETS['inline_kb']} KB in total
+
 DESIGN GUIDELINES:
 - Use a green/earthy color scheme (agricultural theme)
 - Large touch-friendly buttons (minimum 48px)
@@ -86,43 +135,248 @@ Write clean, well-commented code.'''
 
         return prompt
 
-    def _validate_output(self, tool_dir: Path) -> bool:
-        """Validate that all required files were created"""
-        required_files = ['index.html', 'style.css', 'script.js']
-        for file in required_files:
-            if not (tool_dir / file).exists():
-                print(f"Missing required file: {file}")
-                return False
+    def _create_repair_prompt(self, idea: dict, tool_dir: Path, invalid: dict) -> str:
+        """Prompt that regenerates only the failing files, with the good ones as context"""
+        context = []
+        for file in REQUIRED_FILES:
+            if file in invalid:
+                continue
+            content = (tool_dir / file).read_text(encoding='utf-8', errors='replace')
+            if len(content) > REPAIR_CONTEXT_MAX_CHARS:
+                content = content[:REPAIR_CONTEXT_MAX_CHARS] + "\n... (truncated)"
+            context.append(f"--- {file} ---\n{content}")
+        failing = "\n".join(f"- {file} ({reason})" for file, reason in invalid.items())
+        existing = "\n\n".join(context)
+
+        return f'''You are finishing a partially built web application for farmers.
+
+TOOL DETAILS:
+Name: {idea.get('name', 'Unknown')}
+Hindi Name: {idea.get('name_hindi', '')}
+Description: {idea.get('short_description', '')}
+
+These files are missing or incomplete and must be created:
+{failing}
+
+These files are already complete. Do NOT modify them; the new files must work with them
+(same element IDs, class names, function names and file references):
+
+{existing}
+
+OUTPUT:
+Create only the files listed as missing or incomplete. Keep the existing mobile-first,
+bilingual (Hindi/English) design. Write complete, working code.'''
+
+    def _invalid_files(self, tool_dir: Path) -> dict:
+        """Required files that are missing or too small, mapped to the reason"""
+        invalid = {}
+        for file in REQUIRED_FILES:
+            path = tool_dir / file
+            if not path.exists():
+                invalid[file] = 'missing'
             # Check file is not empty
-            if (tool_dir / file).stat().st_size < 50:
-                print(f"File too small: {file}")
-                return False
-        return True
+            elif path.stat().st_size < 50:
+                invalid[file] = 'too small'
+        return invalid
+
+    def _budget_violations(self, tool_dir: Path, verbose: bool = True) -> dict:
+        """Files that push the page over its performance budget, mapped to the reason"""
+        # html.parser is only needed once a build has produced files
+        from agents.perf_budget import analyze, violations_by_file, format_violations
+        with span('build.perf_budget'):
+            report = analyze(tool_dir)
+        if verbose:
+            for line in format_violations(report):
+                print(f"Over performance budget: {line}")
+        return violations_by_file(report)
 
-    def _save_metadata(self, idea: dict, tool_dir: Path) -> None:
+    def _validate_output(self, tool_dir: Path) -> bool:
+        """Validate that all required files were created and fit the performance budget"""
+        for file, reason in self._invalid_files(tool_dir).items():
+            print(f"{'Missing required file' if reason == 'missing' else 'File too small'}: {file}")
+            return False
+        return not self._budget_violations(tool_dir)
+
+    def is_built(self, tool_dir: Path) -> bool:
+        """Check whether a previous build left a complete, validated tool behind"""
+        return (tool_dir / 'metadata.json').exists() and self._validate_output(tool_dir)
+
+    def _save_metadata(self, idea: dict, tool_dir: Path, cache_key: Optional[str] = None,
+                       build_mode: str = 'full', attempts: int = 1,
+                       repaired_files: Optional[list] = None) -> None:
         """Save tool metadata"""
         metadata = {
             **idea,
             'built_at': datetime.now().isoformat(),
             'status': 'built',
-            'files': ['index.html', 'style.css', 'script.js', 'infographic.svg']
+            'files': ['index.html', 'style.css', 'script.js', 'infographic.svg'],
+            'build_cache_key': cache_key,
+            'build_mode': build_mode,
+            'build_attempts': attempts,
+            'repaired_files': repaired_files or []
         }
         with open(tool_dir / 'metadata.json', 'w', encoding='utf-8') as f:
             json.dump(metadata, f, indent=2, ensure_ascii=False)
 
+    def get_tool_dir(self, idea: dict) -> Path:
+        """Directory a tool will be built in (known before the build starts)"""
+        return self.tools_dir / self._create_tool_slug(idea.get('name', 'unknown-tool'))
+
     def build(self, idea: dict, max_retries: int = 3) -> Optional[Path]:
         """Build a web app for the given idea using Claude Code CLI"""
-        tool_slug = self._create_tool_slug(idea.get('name', 'unknown-tool'))
+        tool_slug = self.get_tool_dir(idea).name
+        with self._lock:
+            if tool_slug in self._active_slugs:
+                print(f"Tool directory already being built by another worker: {tool_slug}")
+                return None
+            self._active_slugs.add(tool_slug)
+
+        try:
+            return self._build_in_dir(idea, tool_slug, max_retries)
+        finally:
+            with self._lock:
+                self._active_slugs.discard(tool_slug)
+
+    def _file_states(self, tool_dir: Path, files: Iterable[str] = REQUIRED_FILES) -> dict:
+        states = {}
+        for file in files:
+            try:
+                stat = (tool_dir / file).stat()
+                states[file] = (stat.st_size, stat.st_mtime_ns)
+            except FileNotFoundError:
+                pass
+        return states
+
+    def _run_supervised(self, cmd: list, tool_dir: Path, span_name: str, timeout: float,
+                        targets: Optional[List[str]] = None) -> BuildResult:
+        """Run a claude build while watching tool_dir.
+
+        Streams claude's output and polls the required files. The process group is
+        killed as soon as every target file (all required files, or those a repair
+        regenerates) has been rewritten since the spawn, everything validates and fits
+        the performance budget, and nothing has changed for BUILD_SETTLE_SECONDS; or
+        when neither output nor file writes have been seen for BUILD_STALL_SECONDS.
+        """
+        targets = list(targets or REQUIRED_FILES)
+        watched = list(dict.fromkeys([*REQUIRED_FILES, *targets]))
+        with span(f"{span_name}.spawn", 'subprocess', cmd=cmd[0]):
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                cwd=str(tool_dir),
+                shell=IS_WINDOWS,  # Required for Windows to find claude.cmd
+                # Own process group, so claude's children are stopped with it
+                start_new_session=not IS_WINDOWS,
+                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if IS_WINDOWS else 0
+            )
+
+        last_activity = [time.monotonic()]
+        stderr_lines = []
+
+        def drain(stream, sink=None):
+            for line in stream:
+                last_activity[0] = time.monotonic()
+                if sink is not None:
+                    sink.append(line)
+
+        readers = [threading.Thread(target=drain, args=(process.stdout,), daemon=True),
+                   threading.Thread(target=drain, args=(process.stderr, stderr_lines), daemon=True)]
+        for reader in readers:
+            reader.start()
+
+        started = time.monotonic()
+        states = self._file_states(tool_dir, watched)
+        # Files left by an earlier build or attempt are not this run's output until it rewrites them
+        spawned = states
+        stable_since = None
+        budget_checked = None  # file states the budget was last checked against
+        outcome = 'exited'
+        with span(f"{span_name}.wait", 'subprocess', cmd=cmd[0]):
+            while True:
+                try:
+                    process.wait(timeout=BUILD_POLL_SECONDS)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                now = time.monotonic()
+
+                current = self._file_states(tool_dir, watched)
+                if current != states:
+                    last_activity[0] = now
+                    stable_since = None
+                    for file, (size, _) in current.items():
+                        if states.get(file, (None,))[0] != size:
+                            print(f"  {file}: {size / 1024:.1f} KB")
+                    states = current
+                elif (all(states.get(file) not in (None, spawned.get(file)) for file in targets)
+                      and not self._invalid_files(tool_dir)):
+                    stable_since = stable_since or now
+                    # An over-budget page may still be being fixed; check each settled state once
+                    if now - stable_since >= BUILD_SETTLE_SECONDS and budget_checked != states:
+                        budget_checked = states
+                        if not self._budget_violations(tool_dir, verbose=False):
+                            print(f"All files written and stable after {now - started:.0f}s; stopping claude")
+                            outcome = 'completed_early'
+                            break
+
+                if now - last_activity[0] > BUILD_STALL_SECONDS:
+                    print(f"No progress for {BUILD_STALL_SECONDS}s; stopping stalled build")
+                    outcome = 'stalled'
+                    break
+                if now - started > timeout:
+                    _kill_process_tree(process)
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+
+            _kill_process_tree(process)
+            for reader in readers:
+                reader.join(timeout=1)
+
+        return BuildResult(process.returncode, ''.join(stderr_lines), outcome)
+
+    def _build_in_dir(self, idea: dict, tool_slug: str, max_retries: int) -> Optional[Path]:
+        """Run the build attempts for a tool inside its own directory"""
         tool_dir = self.tools_dir / tool_slug
         tool_dir.mkdir(parents=True, exist_ok=True)
 
         print(f"Building tool: {idea.get('name')} -> {tool_dir}")
 
-        prompt = self._create_build_prompt(idea)
+        with span('build.prompt'):
+            prompt = self._create_build_prompt(idea)
 
-        for attempt in range(max_retries):
-            print(f"Build attempt {attempt + 1}/{max_retries}...")
+        cache_key = self.cache.key(prompt) if self.cache else None
+        if cache_key and self.cache.restore(cache_key, tool_dir):
+            if self._validate_output(tool_dir):
+                self._save_metadata(idea, tool_dir, cache_key, build_mode='cache', attempts=0)
+                print(f"Restored build from cache ({cache_key[:12]}): {tool_dir}")
+                return tool_dir
+            print("Cached build failed validation, building from scratch")
 
+        invalid = None  # files that failed validation on the last attempt
+        repaired = []
+        call_failed = False
+        for attempt in range(max_retries):
+            if call_failed:
+                stage_stats.wait_before_retry(attempt)
+            call_failed = False
+            # Once some files are good, retries only regenerate the failing ones
+            repair = bool(invalid) and len(invalid) < len(REQUIRED_FILES)
+            if repair:
+                print(f"Repair attempt {attempt + 1}/{max_retries}: regenerating {', '.join(invalid)}...")
+                with span('build.prompt'):
+                    attempt_prompt = self._create_repair_prompt(idea, tool_dir, invalid)
+                kept = {file: (tool_dir / file).read_bytes() for file in REQUIRED_FILES if file not in invalid}
+                repaired.extend(file for file in invalid if file not in repaired)
+            else:
+                print(f"Build attempt {attempt + 1}/{max_retries}...")
+                attempt_prompt = prompt
+                kept = {}
+
+            stage = 'repair' if repair else 'build'
+            started = time.monotonic()
             try:
                 # Change to tool directory for Claude Code to create files there
                 original_dir = os.getcwd()
@@ -130,42 +384,65 @@ Write clean, well-commented code.'''
                 # Create the prompt file for Claude Code
                 prompt_file = tool_dir / '.build_prompt.txt'
                 with open(prompt_file, 'w', encoding='utf-8') as f:
-                    f.write(prompt)
+                    f.write(attempt_prompt)
 
                 # Call Claude Code CLI with allowedTools to enable file writing
+                # stream-json reports each step as it happens, which keeps the stall detector fed
                 cmd = [
                     'claude',
-                    '-p', prompt,
+                    '-p', attempt_prompt,
                     '--allowedTools', 'Write,Edit,Read',
-                    '--output-format', 'text'
+                    '--output-format', 'stream-json',
+                    '--verbose'
                 ]
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=CLAUDE_CODE_TIMEOUT,
-                    cwd=str(tool_dir),
-                    shell=IS_WINDOWS  # Required for Windows to find claude.cmd
-                )
+                result = self._run_supervised(cmd, tool_dir, 'build.repair' if repair else 'build.claude',
+                                              stage_stats.timeout(stage, CLAUDE_CODE_TIMEOUT),
+                                              targets=list(invalid) if repair else None)
+                if result.outcome == 'exited':
+                    outcome = 'ok' if result.returncode == 0 else 'error'
+                else:
+                    outcome = result.outcome
+                stage_stats.record(stage, time.monotonic() - started, outcome)
 
                 # Clean up prompt file
                 if prompt_file.exists():
                     prompt_file.unlink()
 
-                if result.returncode != 0:
+                # A repair must not change the files that already passed
+                for file, content in kept.items():
+                    path = tool_dir / file
+                    if not path.exists() or path.read_bytes() != content:
+                        path.write_bytes(content)
+
+                # Validate output; a build over its performance budget is repaired like a broken one
+                with span('build.validate'):
+                    invalid = self._invalid_files(tool_dir) or self._budget_violations(tool_dir)
+
+                if outcome == 'stalled':
+                    call_failed = True
+                    continue
+                if outcome == 'error':
                     print(f"Claude Code error: {result.stderr}")
+                    call_failed = True
                     continue
 
-                # Validate output
-                if self._validate_output(tool_dir):
-                    self._save_metadata(idea, tool_dir)
-                    print(f"Successfully built tool: {tool_dir}")
+                if not invalid:
+                    build_mode = 'repair' if repaired else 'full'
+                    self._save_metadata(idea, tool_dir, cache_key, build_mode=build_mode,
+                                        attempts=attempt + 1, repaired_files=repaired)
+                    if self.cache:
+                        self.cache.store(cache_key, tool_dir)
+                    print(f"Successfully built tool: {tool_dir}" + (f" (repaired {', '.join(repaired)})" if repaired else ""))
                     return tool_dir
                 else:
-                    print("Build validation failed, retrying...")
+                    problems = ', '.join(f"{file} ({reason})" for file, reason in invalid.items())
+                    print(f"Build validation failed: {problems}, retrying...")
 
             except subprocess.TimeoutExpired:
+                stage_stats.record(stage, time.monotonic() - started, 'timeout')
                 print("Claude Code timed out")
+                invalid = self._invalid_files(tool_dir)
+                call_failed = True
             except Exception as e:
                 print(f"Error building tool: {e}")
 
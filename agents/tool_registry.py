@@ -0,0 +1,252 @@
+"""
+FarmTech UP - Tool Registry
+Published tools in SQLite, indexed on id, slug, status and publish date
+
+data/tools.db is the source of truth. Registering a tool is one transactional
+upsert, so publishing costs the same however many tools exist. data/tools.json
+is an exported view for the static site and git history; it is written by
+`export()`, which records its hash in the meta table.
+
+tools.json can still change without the database (a git pull, a hand edit,
+another clone's export, or a fresh clone where tools.db does not exist yet).
+When its hash no longer matches the recorded one, it is merged in when the
+registry is opened and again before every export, so a stale tools.db never
+overwrites newer entries: tools only in the file are added, and a tool in both
+keeps the copy with the later published_at (the file's on a tie). Merging
+never deletes.
+
+One row per tool directory: a tool registered with the slug of another id
+replaces it, since tools/<slug>/ now holds the new build.
+"""
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import TOOLS_DB_FILE, TOOLS_FILE, TOOLS_LOCK_FILE
+from agents.locking import FileLock, atomic_write_text
+from agents.profiler import span
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tools (
+    id TEXT PRIMARY KEY,
+    slug TEXT NOT NULL UNIQUE,
+    status TEXT,
+    published_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tools_status ON tools (status);
+CREATE INDEX IF NOT EXISTS tools_published_at ON tools (published_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+# Seconds to wait for another process's write transaction
+BUSY_TIMEOUT = 30
+
+
+class ToolRegistry:
+    """Tools in registration order, looked up by id, slug, status or date"""
+
+    def __init__(self, path: Path = TOOLS_DB_FILE, export_file: Path = TOOLS_FILE,
+                 lock_file: Path = TOOLS_LOCK_FILE):
+        self.path = path
+        self.export_file = export_file
+        self.export_lock = FileLock(lock_file, max_age=60)
+        # Batch workers share one registry (and one connection)
+        self._lock = threading.RLock()
+        self._conn = None
+
+    @property
+    def conn(self):
+        """The SQLite connection, opened (and seeded from tools.json) on first use"""
+        with self._lock:
+            if self._conn is None:
+                import sqlite3
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                # Autocommit; writes use explicit BEGIN IMMEDIATE transactions
+                conn = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT, isolation_level=None,
+                                       check_same_thread=False)
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+                conn.executescript(SCHEMA)
+                self._conn = conn
+                self.merge_export()
+            return self._conn
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT, or ROLLBACK on error"""
+        with self._lock:
+            conn = self.conn
+            # IMMEDIATE takes the write lock up front, so concurrent writers queue instead of deadlocking
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _read_export(self) -> Optional[str]:
+        try:
+            return self.export_file.read_text(encoding='utf-8')
+        except OSError:
+            return None
+
+    def merge_export(self) -> int:
+        """Merge tools.json into the database if it changed since the last export; returns tools taken from it"""
+        text = self._read_export()
+        return self._merge(text) if text is not None else 0
+
+    def _merge(self, text: str) -> int:
+        digest = self._hash(text)
+        with self._lock:
+            if self._get_meta(self.conn, 'export_hash') == digest:
+                return 0
+        registry = json.loads(text)
+        taken = 0
+        with self._transaction() as conn:
+            # Another process may have merged the same file while this one waited for the lock
+            if self._get_meta(conn, 'export_hash') == digest:
+                return 0
+            seeding = not conn.execute('SELECT 1 FROM tools LIMIT 1').fetchone()
+            for tool in registry.get('tools', []):
+                tool_id, slug = self._key(tool)
+                rows = conn.execute('SELECT published_at, data FROM tools WHERE id = ? OR slug = ?',
+                                    (tool_id, slug)).fetchall()
+                if any(json.loads(data) == tool or (published or '') > (tool.get('published_at') or '')
+                       for published, data in rows):
+                    continue
+                self._upsert(conn, tool)
+                taken += 1
+            updated = registry.get('last_updated')
+            current = self._get_meta(conn, 'last_updated')
+            if updated and (current is None or updated > current):
+                self._set_meta(conn, 'last_updated', updated)
+            self._set_meta(conn, 'export_hash', digest)
+        if seeding:
+            print(f"[OK] Imported {taken} tools from {self.export_file.name} into {self.path.name}")
+        elif taken:
+            print(f"[OK] Merged {taken} changed tools from {self.export_file.name} into {self.path.name}")
+        return taken
+
+    @staticmethod
+    def _key(tool: dict) -> tuple:
+        tool_id = tool.get('id') or tool.get('slug')
+        return tool_id, tool.get('slug') or tool_id
+
+    def _upsert(self, conn, tool: dict) -> None:
+        tool_id, slug = self._key(tool)
+        if not tool_id:
+            raise ValueError("a tool needs an id or a slug")
+        conn.execute('DELETE FROM tools WHERE slug = ? AND id != ?', (slug, tool_id))
+        conn.execute(
+            'INSERT INTO tools (id, slug, status, published_at, data) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (id) DO UPDATE SET slug = excluded.slug, status = excluded.status, '
+            'published_at = excluded.published_at, data = excluded.data',
+            (tool_id, slug, tool.get('status'), tool.get('published_at'), json.dumps(tool, ensure_ascii=False))
+        )
+
+    @staticmethod
+    def _get_meta(conn, key: str) -> Optional[str]:
+        row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_meta(conn, key: str, value: Optional[str]) -> None:
+        conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    def upsert(self, tool: dict) -> None:
+        """Add a tool, or replace the one with the same id (keeping its position)"""
+        with span('registry.write'), self._transaction() as conn:
+            self._upsert(conn, tool)
+            self._set_meta(conn, 'last_updated', datetime.now().isoformat())
+
+    def _select(self, where: str = '', params: tuple = (), limit: Optional[int] = None) -> List[dict]:
+        sql = f'SELECT data FROM tools {where} ORDER BY rowid'
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+        with span('registry.read'), self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def get(self, tool_id: str) -> Optional[dict]:
+        tools = self._select('WHERE id = ?', (tool_id,))
+        return tools[0] if tools else None
+
+    def get_by_slug(self, slug: str) -> Optional[dict]:
+        tools = self._select('WHERE slug = ?', (slug,))
+        return tools[0] if tools else None
+
+    def query(self, status: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+              limit: Optional[int] = None) -> List[dict]:
+        """Tools in registration order, filtered by status and by published_at (ISO strings, until exclusive)"""
+        clauses, params = [], []
+        if status is not None:
+            clauses.append('status = ?')
+            params.append(status)
+        if since is not None:
+            clauses.append('published_at >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('published_at < ?')
+            params.append(until)
+        where = ('WHERE ' + ' AND '.join(clauses)) if clauses else ''
+        return self._select(where, tuple(params), limit)
+
+    def all(self) -> List[dict]:
+        return self._select()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM tools').fetchone()[0]
+
+    def last_updated(self) -> Optional[str]:
+        with self._lock:
+            return self._get_meta(self.conn, 'last_updated')
+
+    def snapshot(self) -> dict:
+        """All tools in the tools.json layout"""
+        with self._lock:
+            return {'tools': self.all(), 'last_updated': self.last_updated()}
+
+    def export(self, registry: Optional[dict] = None) -> bool:
+        """Write the tools.json view (skipped when it is already current); returns True if written
+
+        Changes made to tools.json since the last export are merged in first, and
+        `registry` is then re-read rather than trusted.
+        """
+        with self.export_lock:
+            current = self._read_export()
+            if current is not None and self._merge(current):
+                registry = None
+            registry = registry or self.snapshot()
+            text = json.dumps(registry, indent=2, ensure_ascii=False) + '\n'
+            written = current != text
+            if written:
+                with span('registry.export', tools=len(registry['tools'])):
+                    atomic_write_text(self.export_file, text)
+            digest = self._hash(text)
+            with self._lock:
+                if self._get_meta(self.conn, 'export_hash') != digest:
+                    with self._transaction() as conn:
+                        self._set_meta(conn, 'export_hash', digest)
+            return written
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
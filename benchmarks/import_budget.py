@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+FarmTech UP - Import Time Budget
+Measures `python -X importtime` for what each orchestrator mode imports at startup
+
+Usage:
+    python benchmarks/import_budget.py            # Check every mode against its budget
+    python benchmarks/import_budget.py --top 10   # Also list the slowest modules per mode
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+
+# Agents each mode constructs before doing any real work.
+# The OpenAI SDK is only imported when an image is actually generated with an API key,
+# which happens on a background thread that overlaps the build.
+MODES = {
+    'showcase': ['publisher'],
+    'idea-only': ['idea_generator'],
+    'build': ['idea_store', 'tool_builder', 'image_generator', 'publisher'],
+    'full': ['idea_generator', 'tool_builder', 'image_generator', 'publisher'],
+}
+
+# Budgets in milliseconds of cumulative import time (excluding interpreter startup)
+BUDGETS_MS = {
+    'showcase': 40,
+    'idea-only': 40,
+    'build': 45,
+    'full': 45,
+}
+
+
+def _mode_script(agents: list) -> str:
+    touches = '; '.join(f"o.{name}" for name in agents)
+    return (
+        "import sys; sys.argv = ['orchestrator.py']; "
+        f"sys.path.insert(0, {str(ROOT_DIR)!r}); "
+        "import orchestrator; "
+        f"o = orchestrator.PipelineOrchestrator(); {touches}"
+    )
+
+
+def _parse_importtime(stderr: str) -> list:
+    """Return (module, self_us, cumulative_us, depth) rows from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_part, cumulative_part, name = line.split('|', 2)
+        self_us = int(self_part.split(':')[1])
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), self_us, int(cumulative_part), depth))
+    return rows
+
+
+def measure(mode: str) -> tuple:
+    """Import time (ms) attributable to the mode, plus the per-module rows"""
+    # Agents load their data files on construction; keep them away from the real data/
+    with tempfile.TemporaryDirectory() as data_dir:
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', _mode_script(MODES[mode])],
+            capture_output=True,
+            text=True,
+            cwd=str(ROOT_DIR),
+            env={**os.environ, 'FARMTECH_DATA_DIR': data_dir}
+        )
+    if result.returncode != 0:
+        raise RuntimeError(f"{mode} import failed:\n{result.stderr[-2000:]}")
+
+    rows = _parse_importtime(result.stderr)
+    # Everything up to and including `site` is interpreter startup
+    site_index = max((i for i, row in enumerate(rows) if row[0] == 'site' and row[3] == 0), default=-1)
+    mode_rows = rows[site_index + 1:]
+    total_us = sum(cumulative for _, _, cumulative, depth in mode_rows if depth == 0)
+    return total_us / 1000, mode_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check per-mode import time budgets')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per mode; the median is reported')
+    parser.add_argument('--top', type=int, default=0, help='Show the N slowest modules per mode')
+    args = parser.parse_args()
+
+    over_budget = []
+    print(f"{'Mode':<12} {'Median ms':>10} {'Budget ms':>10}  Result")
+    print("-" * 44)
+    for mode in MODES:
+        samples = []
+        rows = []
+        for _ in range(args.repeat):
+            total_ms, rows = measure(mode)
+            samples.append(total_ms)
+        median_ms = statistics.median(samples)
+        ok = median_ms <= BUDGETS_MS[mode]
+        if not ok:
+            over_budget.append(mode)
+        print(f"{mode:<12} {median_ms:>10.1f} {BUDGETS_MS[mode]:>10}  {'OK' if ok else 'OVER BUDGET'}")
+
+        if args.top:
+            for name, self_us, _, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+                print(f"    {self_us / 1000:>7.2f} ms  {name}")
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
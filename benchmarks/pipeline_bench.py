@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+FarmTech UP - Offline Pipeline Benchmark
+Drives PipelineOrchestrator against a stub `claude` CLI and a local OpenAI stand-in
+
+Every scenario runs in a fresh interpreter with its own temporary data, tools and
+showcase directories, so the repository is never touched and peak RSS is per scenario.
+
+Usage:
+    python benchmarks/pipeline_bench.py                          # 1, 10 and 100 tools
+    python benchmarks/pipeline_bench.py --tools 1 10 --mode batch --workers 4
+    python benchmarks/pipeline_bench.py --save-baseline          # Record benchmarks/baseline.json
+    python benchmarks/pipeline_bench.py --tools 100 --repeat 1   # One run per scenario (default 5)
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent
+ROOT_DIR = BENCH_DIR.parent
+STUBS_DIR = BENCH_DIR / 'stubs'
+DEFAULT_BASELINE = BENCH_DIR / 'baseline.json'
+RESULT_MARKER = 'BENCH_RESULT '
+
+# Spans shown in the report (all spans are kept in the JSON output)
+REPORT_SPANS = ['stage.idea', 'stage.build', 'stage.optimize', 'stage.infographic', 'stage.publish',
+                'idea.claude.wait', 'build.claude.wait', 'build.repair.wait', 'image.generate', 'image.download', 'image.variants',
+                'idea.duplicate_check', 'registry.write', 'registry.export', 'showcase.render',
+                'showcase.write']
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def run_child(args) -> None:
+    """Run one scenario in this process and print its result as JSON"""
+    sys.path.insert(0, str(ROOT_DIR))
+    import orchestrator
+    from agents.profiler import profiler
+    from agents.stage_stats import percentile
+    from agents.tool_registry import ToolRegistry
+
+    profiler.enable()
+    pipeline = orchestrator.PipelineOrchestrator()
+
+    log_path = Path(os.environ['FARMTECH_DATA_DIR']) / 'pipeline.log'
+    started = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log, redirect_stdout(log):
+        if args.mode == 'batch':
+            success = pipeline.run_batch(args.count, args.workers, skip_git=True)
+        else:
+            success = all([pipeline.run_full_pipeline(skip_git=True) for _ in range(args.count)])
+    elapsed = time.perf_counter() - started
+
+    published = len(ToolRegistry())
+
+    durations = {}
+    for event in profiler.events():
+        durations.setdefault(event['name'], []).append(event['dur'] / 1e6)
+
+    result = {
+        'tools': args.count,
+        'published': published,
+        'success': success,
+        'elapsed_s': round(elapsed, 3),
+        'tools_per_min': round(60 * published / elapsed, 2) if elapsed else 0,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'spans': {
+            name: {
+                'count': len(values),
+                'p50': round(percentile(values, 50), 4),
+                'p90': round(percentile(values, 90), 4),
+                'p99': round(percentile(values, 99), 4),
+                'max': round(max(values), 4),
+            }
+            for name, values in sorted(durations.items())
+        },
+    }
+    sys.stdout.write(RESULT_MARKER + json.dumps(result) + '\n')
+    sys.stdout.flush()
+
+
+def run_scenario(count: int, args, base_url: str) -> dict:
+    """Run one scenario in a fresh interpreter with isolated directories"""
+    work_dir = Path(tempfile.mkdtemp(prefix=f'farmtech-bench-{count}-'))
+    env = os.environ.copy()
+    env.update({
+        'FARMTECH_DATA_DIR': str(work_dir / 'data'),
+        'FARMTECH_TOOLS_DIR': str(work_dir / 'tools'),
+        'FARMTECH_SHOWCASE_DIR': str(work_dir / 'showcase'),
+        'PATH': str(STUBS_DIR) + os.pathsep + env.get('PATH', ''),
+        'OPENAI_API_KEY': 'benchmark-stub',
+        'OPENAI_BASE_URL': base_url,
+        'FARMTECH_STUB_IDEA_LATENCY': str(args.idea_latency),
+        'FARMTECH_STUB_BUILD_LATENCY': str(args.build_latency),
+        'PYTHONIOENCODING': 'utf-8',
+    })
+    (work_dir / 'data').mkdir()
+
+    try:
+        result = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), '--child', '--count', str(count),
+             '--mode', args.mode, '--workers', str(args.workers)],
+            capture_output=True,
+            text=True,
+            encoding='utf-8',
+            env=env,
+            cwd=str(ROOT_DIR)
+        )
+        lines = [line for line in result.stdout.splitlines() if line.startswith(RESULT_MARKER)]
+        if result.returncode != 0 or not lines:
+            log = work_dir / 'data' / 'pipeline.log'
+            tail = log.read_text(encoding='utf-8')[-2000:] if log.exists() else ''
+            raise RuntimeError(f"Scenario {count} failed:\n{result.stderr[-2000:]}\n{tail}")
+        return json.loads(lines[-1][len(RESULT_MARKER):])
+    finally:
+        if args.keep_temp:
+            print(f"Kept scenario files: {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def median_result(runs: list) -> dict:
+    """Combine repeated runs of one scenario: the median of every figure, per span"""
+    result = {
+        'tools': runs[0]['tools'],
+        'published': min(run['published'] for run in runs),
+        'success': all(run['success'] for run in runs),
+        'runs': len(runs),
+    }
+    for key in ('elapsed_s', 'tools_per_min', 'peak_rss_mb'):
+        result[key] = statistics.median(run[key] for run in runs)
+    names = sorted({name for run in runs for name in run['spans']})
+    result['spans'] = {}
+    for name in names:
+        stats = [run['spans'][name] for run in runs if name in run['spans']]
+        result['spans'][name] = {key: statistics.median(s[key] for s in stats) for key in stats[0]}
+    return result
+
+
+def print_report(results: dict) -> None:
+    for count, result in results.items():
+        runs = f" (median of {result['runs']} runs)" if result.get('runs', 1) > 1 else ''
+        print(f"\n{count} tool(s){runs}: {result['published']} published in {result['elapsed_s']:.2f}s "
+              f"-> {result['tools_per_min']:.1f} tools/min, peak RSS {result['peak_rss_mb']:.1f} MB")
+        print(f"  {'Span':<24} {'Count':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}")
+        for name in REPORT_SPANS:
+            stats = result['spans'].get(name)
+            if stats:
+                print(f"  {name:<24} {stats['count']:>6} {stats['p50'] * 1000:>9.1f} "
+                      f"{stats['p90'] * 1000:>9.1f} {stats['p99'] * 1000:>9.1f}")
+
+
+def compare_to_baseline(results: dict, params: dict, baseline_path: Path, tolerance: float,
+                        min_delta_ms: float = 10.0) -> list:
+    """Return a list of regression descriptions (empty if none or no comparable baseline)"""
+    if not baseline_path.exists():
+        print(f"\nNo baseline at {baseline_path} (record one with --save-baseline)")
+        return []
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('params') != params:
+        print(f"\n[WARN] Baseline parameters differ, not comparing: {baseline.get('params')}")
+        return []
+
+    regressions = []
+    for count, result in results.items():
+        old = baseline.get('results', {}).get(count)
+        if not old:
+            continue
+        if result['tools_per_min'] < old['tools_per_min'] * (1 - tolerance):
+            regressions.append(f"{count} tools: throughput {old['tools_per_min']} -> {result['tools_per_min']} tools/min")
+        for name in REPORT_SPANS:
+            new_stats, old_stats = result['spans'].get(name), old['spans'].get(name)
+            # A few milliseconds either way is scheduling noise, however large relative to a short span
+            if new_stats and old_stats and new_stats['p50'] - old_stats['p50'] >= min_delta_ms / 1000:
+                if new_stats['p50'] > old_stats['p50'] * (1 + tolerance):
+                    regressions.append(f"{count} tools: {name} p50 {old_stats['p50'] * 1000:.1f}ms "
+                                       f"-> {new_stats['p50'] * 1000:.1f}ms")
+
+    print(f"\nCompared with baseline {baseline_path} (tolerance {tolerance:.0%}, at least {min_delta_ms:g}ms for spans):")
+    for line in regressions or ['no regressions']:
+        print(f"  {line}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark of the FarmTech UP pipeline')
+    parser.add_argument('--tools', type=int, nargs='+', default=[1, 10, 100], help='Scenario sizes')
+    parser.add_argument('--mode', choices=['sequential', 'batch'], default='sequential',
+                        help='Repeated full runs, or one --batch run')
+    parser.add_argument('--workers', type=int, default=4, help='Workers for --mode batch')
+    parser.add_argument('--idea-latency', type=float, default=0.05, help='Stub claude idea latency (s)')
+    parser.add_argument('--build-latency', type=float, default=0.1, help='Stub claude build latency (s)')
+    parser.add_argument('--image-latency', type=float, default=0.05, help='Stub images.generate latency (s)')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help='Baseline JSON to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='Write these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown before flagging')
+    parser.add_argument('--min-delta-ms', type=float, default=10.0,
+                        help='Smallest p50 increase (ms) flagged for a span, whatever the tolerance')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Runs per scenario; single runs of millisecond spans are too noisy to compare')
+    parser.add_argument('--keep-temp', action='store_true', help='Keep each scenario\'s temporary directory')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--count', type=int, default=1, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    sys.path.insert(0, str(BENCH_DIR))
+    from stubs.openai_stub import OpenAIStubServer
+
+    params = {
+        'mode': args.mode,
+        'workers': args.workers if args.mode == 'batch' else 1,
+        'idea_latency': args.idea_latency,
+        'build_latency': args.build_latency,
+        'image_latency': args.image_latency,
+    }
+    server = OpenAIStubServer(latency=args.image_latency).start()
+    print(f"Benchmarking {args.tools} tools ({args.mode}, {args.repeat} runs each), stub OpenAI at {server.base_url}")
+
+    results = {}
+    try:
+        for count in args.tools:
+            runs = [run_scenario(count, args, server.base_url) for _ in range(max(1, args.repeat))]
+            results[str(count)] = median_result(runs)
+    finally:
+        server.stop()
+
+    print_report(results)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'params': params, 'results': results}, f, indent=2)
+            f.write('\n')
+        print(f"\nBaseline saved: {args.baseline}")
+        return
+
+    regressions = compare_to_baseline(results, params, args.baseline, args.tolerance, args.min_delta_ms)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+FarmTech UP - Idea Similarity Benchmark
+Times IdeaIndex duplicate lookups on a synthetic idea history and checks that
+they agree with the original pairwise word-overlap scan
+
+Usage:
+    python benchmarks/similarity_bench.py                 # 100k ideas
+    python benchmarks/similarity_bench.py --ideas 10000 --verify 500
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from agents.similarity import IdeaIndex
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list:
+    return [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 10))) for _ in range(size)]
+
+
+def make_idea(vocabulary: list, weights: list, rng: random.Random, number: int) -> dict:
+    """Ideas draw words from a Zipf-like distribution, like real descriptions"""
+    return {
+        'id': f"tool_{number:06d}",
+        'name': ' '.join(rng.choices(vocabulary, weights, k=rng.randint(2, 4))),
+        'short_description': ' '.join(rng.choices(vocabulary, weights, k=rng.randint(10, 30))),
+    }
+
+
+def pairwise_duplicate(new_idea: dict, existing_ideas: list, threshold: float) -> bool:
+    """The original O(n) check, kept here as the reference implementation"""
+    new_name = new_idea.get('name', '').lower()
+    new_desc = new_idea.get('short_description', '').lower()
+    for existing in existing_ideas:
+        existing_name = existing.get('name', '').lower()
+        existing_desc = existing.get('short_description', '').lower()
+        if new_name == existing_name or new_desc == existing_desc:
+            return True
+        new_words = set(new_name.split() + new_desc.split())
+        existing_words = set(existing_name.split() + existing_desc.split())
+        if len(new_words & existing_words) / max(len(new_words), 1) > threshold:
+            return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark indexed duplicate detection')
+    parser.add_argument('--ideas', type=int, default=100_000, help='Size of the synthetic idea history')
+    parser.add_argument('--queries', type=int, default=2000, help='Lookups to time')
+    parser.add_argument('--verify', type=int, default=200, help='Queries cross-checked against the pairwise scan')
+    parser.add_argument('--threshold', type=float, default=0.7)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(20_000, rng)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    ideas = [make_idea(vocabulary, weights, rng, i) for i in range(args.ideas)]
+
+    # Queries: half fresh ideas, half near-copies of existing ones
+    queries = []
+    for i in range(args.queries):
+        if i % 2:
+            source = rng.choice(ideas)
+            words = source['short_description'].split()
+            words[rng.randrange(len(words))] = rng.choice(vocabulary)
+            queries.append({'name': source['name'] + ' plus', 'short_description': ' '.join(words)})
+        else:
+            queries.append(make_idea(vocabulary, weights, rng, args.ideas + i))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = IdeaIndex(Path(tmp) / 'idea_index.jsonl', threshold=args.threshold)
+
+        started = time.perf_counter()
+        index.rebuild(ideas)
+        build_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        index.load(ideas)
+        load_s = time.perf_counter() - started
+
+        timings = []
+        duplicates = 0
+        for query in queries:
+            started = time.perf_counter()
+            duplicates += index.find_duplicate(query) is not None
+            timings.append(time.perf_counter() - started)
+
+        print(f"Ideas indexed:  {len(index):,} (build {build_s:.2f}s, load from disk {load_s:.2f}s)")
+        print(f"Lookups:        {len(queries):,} ({duplicates} duplicates)")
+        print(f"Latency p50:    {statistics.median(timings) * 1000:.3f} ms")
+        print(f"Latency p99:    {sorted(timings)[int(len(timings) * 0.99) - 1] * 1000:.3f} ms")
+
+        mismatches = 0
+        for query in queries[:args.verify]:
+            if (index.find_duplicate(query) is not None) != pairwise_duplicate(query, ideas, args.threshold):
+                mismatches += 1
+        print(f"Verified:       {min(args.verify, len(queries))} queries against the pairwise scan, "
+              f"{mismatches} mismatches")
+        sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+FarmTech UP - Stub OpenAI Images API
+Local stand-in for the DALL-E endpoint and the image download URL
+
+Point the OpenAI SDK at it with OPENAI_BASE_URL=<base_url> and any OPENAI_API_KEY.
+
+Downloads carry a Content-MD5 header like the blob storage DALL-E images are
+served from. --fail-rate answers a share of downloads with 503 and
+--truncate-rate sends only half the body, to exercise retries and verification.
+
+Usage:
+    python benchmarks/stubs/openai_stub.py --port 8765 --latency 0.2
+    python benchmarks/stubs/openai_stub.py --fail-rate 0.3 --truncate-rate 0.2
+"""
+import argparse
+import base64
+import hashlib
+import json
+import random
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_png(width: int, height: int, seed: int = 0) -> bytes:
+    """Build a valid RGB PNG with noisy content (so it compresses like a real image)"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(height):
+        rows.append(b'\x00' + bytes(rng.getrandbits(8) & 0xF0 for _ in range(width * 3)))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(b''.join(rows), 6)) + chunk(b'IEND', b''))
+
+
+class OpenAIStubServer:
+    """Threaded HTTP server answering images.generate and serving the generated image"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.05,
+                 download_latency: float = 0.0, image_size: int = 512,
+                 fail_rate: float = 0.0, truncate_rate: float = 0.0):
+        self.latency = latency
+        self.download_latency = download_latency
+        self.fail_rate = fail_rate
+        self.truncate_rate = truncate_rate
+        self.image = make_png(image_size, image_size)
+        self.image_md5 = base64.b64encode(hashlib.md5(self.image).digest()).decode('ascii')
+        self.requests = {'generate': 0, 'download': 0, 'failed': 0, 'truncated': 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        # Clients dropping a connection (e.g. rejecting an oversized download) is expected here
+        self._server.handle_error = lambda request, client_address: None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.requests[key] += 1
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str, headers: dict = None,
+                      truncate: bool = False) -> None:
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                if truncate:
+                    # Promise the whole body, send half, then drop the connection
+                    self.send_header('Connection', 'close')
+                    self.close_connection = True
+                    body = body[:len(body) // 2]
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                self.rfile.read(length)
+                if not self.path.rstrip('/').endswith('/images/generations'):
+                    self._send(404, b'{"error": {"message": "not found"}}', 'application/json')
+                    return
+                stub._count('generate')
+                time.sleep(stub.latency)
+                host, port = stub._server.server_address[:2]
+                body = json.dumps({
+                    'created': int(time.time()),
+                    'data': [{'url': f"http://{host}:{port}/images/{random.getrandbits(48):x}.png",
+                              'revised_prompt': ''}],
+                }).encode('utf-8')
+                self._send(200, body, 'application/json')
+
+            def do_GET(self):
+                if not self.path.startswith('/images/'):
+                    self._send(404, b'not found', 'text/plain')
+                    return
+                stub._count('download')
+                time.sleep(stub.download_latency)
+                if random.random() < stub.fail_rate:
+                    stub._count('failed')
+                    self._send(503, b'busy', 'text/plain')
+                    return
+                truncate = random.random() < stub.truncate_rate
+                if truncate:
+                    stub._count('truncated')
+                self._send(200, stub.image, 'image/png', {'Content-MD5': stub.image_md5}, truncate=truncate)
+
+        return Handler
+
+    def start(self) -> 'OpenAIStubServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='openai-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the OpenAI images API')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds per images.generate call')
+    parser.add_argument('--download-latency', type=float, default=0.0, help='Seconds per image download')
+    parser.add_argument('--image-size', type=int, default=512, help='Width/height of the served PNG')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Share of downloads answered with 503')
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help='Share of downloads cut off halfway')
+    args = parser.parse_args()
+
+    server = OpenAIStubServer(port=args.port, latency=args.latency,
+                              download_latency=args.download_latency, image_size=args.image_size,
+                              fail_rate=args.fail_rate, truncate_rate=args.truncate_rate).start()
+    print(f"OpenAI stub listening: OPENAI_BASE_URL={server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,135 @@
 """
 FarmTech UP - Configuration Management
+
+Importing this module has no side effects: .env is only read the first time an
+environment-backed setting is accessed, and directories are created by the
+code that writes into them.
 """
 import os
 from pathlib import Path
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from typing import Optional
 
-# Base paths
+# Base paths (data, tools and showcase can be redirected, e.g. by the benchmarks)
 BASE_DIR = Path(__file__).parent
 AGENTS_DIR = BASE_DIR / "agents"
-DATA_DIR = BASE_DIR / "data"
-TOOLS_DIR = BASE_DIR / "tools"
-SHOWCASE_DIR = BASE_DIR / "showcase"
+DATA_DIR = Path(os.getenv("FARMTECH_DATA_DIR", BASE_DIR / "data"))
+TOOLS_DIR = Path(os.getenv("FARMTECH_TOOLS_DIR", BASE_DIR / "tools"))
+SHOWCASE_DIR = Path(os.getenv("FARMTECH_SHOWCASE_DIR", BASE_DIR / "showcase"))
 TEMPLATES_DIR = BASE_DIR / "templates"
 
-# Ensure directories exist
-DATA_DIR.mkdir(exist_ok=True)
-TOOLS_DIR.mkdir(exist_ok=True)
 
-# API Keys
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+class Settings:
+    """Environment-backed settings, loaded from .env on first access"""
+
+    def __init__(self):
+        self._loaded = False
+
+    def _load(self) -> None:
+        if not self._loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            self._loaded = True
+
+    def _get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        self._load()
+        return os.getenv(name, default)
+
+    # API Keys
+    @property
+    def gemini_api_key(self):
+        return self._get("GEMINI_API_KEY")
+
+    @property
+    def openai_api_key(self):
+        return self._get("OPENAI_API_KEY")
+
+    # GitHub Configuration
+    @property
+    def github_token(self):
+        return self._get("GITHUB_TOKEN")
+
+    @property
+    def github_repo(self):
+        return self._get("GITHUB_REPO")
+
+    @property
+    def github_pages_url(self):
+        return self._get("GITHUB_PAGES_URL", "")
+
+
+settings = Settings()
+
+# Module-level names kept for `from config import OPENAI_API_KEY` style imports
+_ENV_SETTINGS = {
+    "GEMINI_API_KEY": "gemini_api_key",
+    "OPENAI_API_KEY": "openai_api_key",
+    "GITHUB_TOKEN": "github_token",
+    "GITHUB_REPO": "github_repo",
+    "GITHUB_PAGES_URL": "github_pages_url",
+}
+
+
+def __getattr__(name: str):
+    if name in _ENV_SETTINGS:
+        return getattr(settings, _ENV_SETTINGS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# GitHub Configuration
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-GITHUB_REPO = os.getenv("GITHUB_REPO")
-GITHUB_PAGES_URL = os.getenv("GITHUB_PAGES_URL", "")
 
 # Data files
-IDEAS_FILE = DATA_DIR / "ideas.json"
-TOOLS_FILE = DATA_DIR / "tools.json"
+IDEAS_FILE = DATA_DIR / "ideas.jsonl"  # append-only; see agents/idea_store.py
+LEGACY_IDEAS_FILE = DATA_DIR / "ideas.json"  # migrated to IDEAS_FILE on first load, then left as is
+IDEAS_LOCK_FILE = DATA_DIR / ".ideas.lock"  # held while appending ideas or allocating IDs
+IDEA_ID_COUNTER_FILE = DATA_DIR / "idea_counter.json"  # last allocated tool_NNN number
+TOOLS_LOCK_FILE = DATA_DIR / ".tools.lock"  # held while exporting the tools registry
+TOOLS_DB_FILE = DATA_DIR / "tools.db"  # tools registry; see agents/tool_registry.py
+TOOLS_FILE = DATA_DIR / "tools.json"  # exported from TOOLS_DB_FILE for the static site
+SHOWCASE_CACHE_FILE = DATA_DIR / "showcase_cache.json"  # rendered tool cards, keyed by a hash of their inputs
+
+# Showcase pagination: index.html carries the first cards, the rest load as JSON shards while scrolling
+SHOWCASE_FIRST_PAGE_CARDS = 12  # at most this many cards in index.html
+SHOWCASE_FIRST_PAGE_KB = 32  # ...and index.html stays under this size (uncompressed)
+SHOWCASE_SHARD_SIZE = 24  # cards per showcase/cards/page-N.json
+SHOWCASE_SHARDS_DIR = "cards"  # inside SHOWCASE_DIR
+SHOWCASE_SEARCH_INDEX = "search-index.json"  # inside SHOWCASE_DIR; fetched when the search box is first used
+RUNS_DIR = DATA_DIR / "runs"  # one JSON record per pipeline run (for --resume)
 
 # Pipeline settings
 MAX_RETRIES = 3
-CLAUDE_CODE_TIMEOUT = 300  # seconds
+CLAUDE_CODE_TIMEOUT = 300  # seconds; used until a stage has enough history for an adaptive timeout
+BATCH_DEFAULT_WORKERS = 2  # parallel builds for --batch runs
+STAGE_STATS_FILE = DATA_DIR / "stage_stats.jsonl"  # rolling per-stage call durations and outcomes
+STAGE_STATS_WINDOW = 200  # calls kept per stage
+STAGE_STATS_MIN_SAMPLES = 10  # successful or timed-out calls needed before timeouts adapt
+STAGE_TIMEOUT_MARGIN = 1.5  # adaptive timeout = p99 of successful and timed-out calls x margin
+STAGE_TIMEOUT_MIN = 60  # seconds
+STAGE_TIMEOUT_MAX = 900  # seconds
+RETRY_BACKOFF_BASE = 2  # seconds before the first retry of a failed call; doubles each retry
+RETRY_BACKOFF_MAX = 60  # seconds
+
+# Scheduler settings
+SCHEDULER_INTERVAL_MINUTES = 10
+PIPELINE_LOCK_FILE = DATA_DIR / ".pipeline.lock"  # held by the scheduler while a run is in progress
+PIPELINE_LOCK_MAX_AGE = 6 * 60 * 60  # seconds before a leftover lock is considered stale
 
 # Idea generation settings
+IDEA_INDEX_FILE = DATA_DIR / "idea_index.jsonl"  # derived; rebuilt from the ideas if missing
+IDEA_SIMILARITY_THRESHOLD = 0.7  # share of a new idea's words found in an existing one to call it a duplicate
+IDEA_PROMPT_TOKEN_BUDGET = 600  # approximate tokens for the "Avoid:" list, however many ideas exist
+IDEA_PROMPT_RECENT = 20  # most recent ideas listed by name; older ones are summarised as topics
+IDEA_PARALLEL_CANDIDATES = 1  # concurrent claude calls per idea; the first unique result wins
+IDEA_BANK_EXTRA_CANDIDATES = False  # let losing calls finish and save their ideas as pending for later runs
+IDEA_THEMES = [  # one per parallel candidate, so concurrent calls do not converge on the same idea
+    "crop disease and pest management",
+    "irrigation and water use",
+    "mandi prices and selling produce",
+    "weather and sowing decisions",
+    "soil health and fertilizer use",
+    "livestock and dairy",
+    "government schemes and subsidies",
+    "post-harvest storage and transport",
+    "farm finance and record keeping",
+    "seeds and crop planning",
+]
 IDEA_DOMAIN = "AI and smartphone-based tools for farmers in Uttar Pradesh, India"
 IDEA_CONSTRAINTS = [
     "Must be buildable as a simple web app (HTML/CSS/JS)",
@@ -48,6 +140,11 @@ IDEA_CONSTRAINTS = [
 ]
 
 # Tool building settings
+BUILD_CACHE_DIR = DATA_DIR / "build_cache"  # validated builds keyed on the build prompt
+BUILD_CACHE_MAX_MB = 200  # least recently used entries are evicted beyond this
+BUILD_STALL_SECONDS = 90  # kill a build that shows no output or file writes for this long
+BUILD_SETTLE_SECONDS = 5  # stop a build early once all files validate and stay unchanged this long
+BUILD_POLL_SECONDS = 0.5  # how often the tool directory is checked during a build
 TOOL_REQUIREMENTS = [
     "Mobile-first responsive design",
     "Works offline where possible",
@@ -55,3 +152,38 @@ TOOL_REQUIREMENTS = [
     "Simple, intuitive interface for farmers",
     "Fast loading on slow connections",
 ]
+
+# Asset optimization settings
+ASSET_DIST_DIR = "dist"  # minified and precompressed copies, inside each tool directory
+ASSET_GZIP_LEVEL = 9
+ASSET_BROTLI_QUALITY = 11  # needs the optional `brotli` package
+ASSET_JS_CHECK = True  # parse the minified scripts with node (when installed); broken ones ship unminified
+ASSET_JS_CHECK_TIMEOUT = 30  # seconds
+
+# Performance budget for built tools, checked offline during validation (see agents/perf_budget.py)
+PERF_BUDGETS = {
+    'page_weight_kb': 150,  # index.html plus every local file it references
+    'external_resources': 2,  # scripts, stylesheets, fonts and images from other hosts
+    'blocking_resources': 2,  # stylesheets and synchronous <head> scripts
+    'sync_head_scripts': 0,  # scripts in <head> without async/defer
+    'inline_kb': 24,  # inline <script>/<style> bodies plus data: URIs
+    'largest_data_uri_kb': 8,
+}
+PERF_REPORT_FILE = "perf_report.json"  # written to each tool directory
+
+# Infographic settings
+INFOGRAPHIC_VARIANTS_DIR = "images"  # resized copies of infographic.png, inside each tool directory
+INFOGRAPHIC_WIDTHS = [320, 480, 640, 960]  # cards are ~350-400 CSS px wide; 960 covers 2x screens
+INFOGRAPHIC_FORMATS = {'avif': 50, 'webp': 75}  # format -> encoder quality, preferred format first
+INFOGRAPHIC_SIZES = "(max-width: 768px) calc(100vw - 60px), 400px"  # card width, for the srcset `sizes` attribute
+IMAGE_BULK_WORKERS = 4  # concurrent DALL-E requests in generate_infographics.py
+IMAGE_RATE_LIMIT_PER_MINUTE = 5  # DALL-E images per minute allowed for the account
+IMAGE_MAX_BYTES = 20 * 1024 * 1024  # larger downloads are rejected
+
+# HTTP download settings (see agents/http_download.py)
+HTTP_POOL_SIZE = 8  # kept-alive connections per host, shared by every thread
+HTTP_RETRIES = 3  # retries for connection errors and 429/5xx responses
+HTTP_BACKOFF_SECONDS = 0.5  # wait before the first retry; doubles each retry
+HTTP_CONNECT_TIMEOUT = 10  # seconds
+HTTP_READ_TIMEOUT = 60  # seconds without receiving any data
+HTTP_DOWNLOAD_ATTEMPTS = 3  # full re-downloads when a body is cut off mid-stream
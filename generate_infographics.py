@@ -1,110 +1,156 @@
 """
 Generate infographics for all tools missing them
+
+Tools are discovered from tools/*/metadata.json. A tool is skipped when its
+infographic.json records the hash of the prompt it would be sent today, so a
+rerun after a partial failure only retries the tools that are still missing.
+
+Usage:
+    python generate_infographics.py                  # Generate missing or stale infographics
+    python generate_infographics.py --workers 4 --rate 5  # 4 threads, at most 5 images a minute
+    python generate_infographics.py --dry-run        # List what would be generated
+    python generate_infographics.py --force          # Regenerate every infographic
+    python generate_infographics.py --variants-only  # Resized WebP/AVIF copies of existing PNGs
 """
-import os
+import argparse
 import json
-import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from openai import OpenAI
+from typing import Optional, List, Tuple
 
-# API Key from environment or config
 import sys
 sys.path.insert(0, str(Path(__file__).parent))
-from config import OPENAI_API_KEY
-
-TOOLS_DIR = Path(__file__).parent / "tools"
-
-# Tools that need infographics
-TOOLS_TO_GENERATE = [
-    "crop-disease-detector",
-    "mandi-price-tracker",
-    "weather-alert",
-    "fertilizer-calculator",
-    "crop-calendar",
-    "pest-identifier",
-    "water-tracker",
-    "yield-estimator",
-    "loan-calculator",
-    "seed-variety-guide"
-]
-
-def create_prompt(metadata: dict) -> str:
-    """Create a DALL-E prompt for the tool"""
-    name = metadata.get('name', 'Farm Tool')
-    features = metadata.get('key_features', [])
-    features_text = ', '.join(features[:3]) if features else 'AI-powered features'
-
-    return f'''Create a professional infographic poster for a mobile app called "{name}" designed for farmers in India.
-
-The infographic should include:
-- Title "{name}" prominently at the top
-- A friendly illustration of an Indian farmer using a smartphone
-- Icons representing: {features_text}
-- Green and orange agricultural color scheme
-- Clean, modern flat design style
-- "FarmTech UP" branding at the bottom
-- Simple visuals that are easy to understand
-
-Style: Professional infographic, flat design illustration, vibrant colors, farm theme, mobile app showcase'''
-
-def generate_infographic(client: OpenAI, tool_slug: str) -> bool:
-    """Generate infographic for a single tool"""
-    tool_dir = TOOLS_DIR / tool_slug
-    metadata_path = tool_dir / "metadata.json"
-
-    if not metadata_path.exists():
-        print(f"Metadata not found for {tool_slug}")
+from config import TOOLS_DIR, IMAGE_BULK_WORKERS, IMAGE_RATE_LIMIT_PER_MINUTE
+from agents.image_generator import ImageGenerator, create_dalle_prompt, prompt_hash, read_record, write_record
+from agents.image_variants import make_variants, summarize
+from agents.rate_limit import RateLimiter
+
+
+def discover_tools() -> List[Tuple[Path, dict]]:
+    """(tool directory, metadata) for every tool with a readable metadata.json"""
+    tools = []
+    for metadata_path in sorted(TOOLS_DIR.glob('*/metadata.json')):
+        try:
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                tools.append((metadata_path.parent, json.load(f)))
+        except (OSError, ValueError) as e:
+            print(f"Skipping {metadata_path.parent.name}: unreadable metadata ({e})")
+    return tools
+
+
+def stale_reason(tool_dir: Path, metadata: dict, force: bool = False, dry_run: bool = False) -> Optional[str]:
+    """Why a tool needs a new infographic, or None if its current one is up to date"""
+    image_path = tool_dir / 'infographic.png'
+    if force:
+        return 'forced'
+    if not image_path.exists():
+        return 'missing'
+    record = read_record(tool_dir)
+    prompt = create_dalle_prompt(metadata)
+    if record is None:
+        # Images from before prompt records existed are kept rather than paid for again
+        if not dry_run:
+            write_record(tool_dir, prompt, image_path, adopted=True)
+        print(f"Adopted existing infographic: {tool_dir.name}")
+        return None
+    if record.get('prompt_hash') != prompt_hash(prompt):
+        return 'prompt changed'
+    return None
+
+
+def create_variants(image_path: Path, force: bool = False) -> bool:
+    """Write resized WebP/AVIF copies of an infographic for the showcase cards"""
+    try:
+        manifest = make_variants(image_path, force=force)
+    except Exception as e:
+        print(f"Variants failed for {image_path.parent.name}: {e}")
+        return False
+    if manifest:
+        print(f"Variants: {image_path.parent.name}: {summarize(manifest)}")
+    else:
+        print(f"Variants up to date: {image_path.parent.name}")
+    return True
+
+
+def create_all_variants(force: bool = False) -> None:
+    """Make variants for every tool that already has an infographic.png"""
+    images = sorted(TOOLS_DIR.glob('*/infographic.png'))
+    done = sum(create_variants(path, force) for path in images)
+    print(f"\nVariants ready for {done}/{len(images)} infographics")
+
+
+def generate_all(workers: int, per_minute: float, force: bool = False, dry_run: bool = False) -> bool:
+    """Generate every missing or stale infographic; returns False if any failed"""
+    tools = discover_tools()
+    todo = []
+    for tool_dir, metadata in tools:
+        reason = stale_reason(tool_dir, metadata, force, dry_run)
+        if reason:
+            todo.append((tool_dir, metadata))
+            print(f"Queued {tool_dir.name} ({reason})")
+    print(f"\n{len(todo)} of {len(tools)} tools need an infographic")
+    if dry_run or not todo:
+        return True
+
+    # One generator: a single OpenAI client and HTTP session, and one rate limit across threads (0: none)
+    limiter = RateLimiter(per_minute, burst=max(1, min(workers, int(per_minute)))) if per_minute else None
+    generator = ImageGenerator(rate_limiter=limiter)
+    if not generator.client:
+        print("OPENAI_API_KEY is not set (or openai is not installed)")
         return False
 
-    with open(metadata_path, 'r', encoding='utf-8') as f:
-        metadata = json.load(f)
+    done = failed = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='infographic') as pool:
+        futures = {pool.submit(generator.generate_png, metadata, tool_dir): tool_dir for tool_dir, metadata in todo}
+        for future in as_completed(futures):
+            tool_dir = futures[future]
+            try:
+                path = future.result()
+            except Exception as e:
+                print(f"Error for {tool_dir.name}: {e}")
+                path = None
+            if path:
+                done += 1
+            else:
+                failed += 1
+            print(f"Progress: {done + failed}/{len(todo)} ({failed} failed) - {tool_dir.name}: {'OK' if path else 'FAILED'}")
 
     print(f"\n{'='*50}")
-    print(f"Generating infographic for: {metadata.get('name')}")
+    print(f"COMPLETE: Generated {done}/{len(todo)} infographics")
+    if failed:
+        print(f"Run again to retry the {failed} that failed; finished tools are skipped")
     print(f"{'='*50}")
+    return failed == 0
 
-    prompt = create_prompt(metadata)
 
-    try:
-        response = client.images.generate(
-            model="dall-e-3",
-            prompt=prompt,
-            size="1024x1024",
-            quality="standard",
-            n=1,
-        )
-
-        image_url = response.data[0].url
-        print(f"Image generated, downloading...")
-
-        # Download the image
-        img_response = requests.get(image_url)
-        if img_response.status_code == 200:
-            output_path = tool_dir / "infographic.png"
-            with open(output_path, 'wb') as f:
-                f.write(img_response.content)
-            print(f"Saved: {output_path}")
-            return True
-        else:
-            print(f"Download failed: {img_response.status_code}")
-            return False
+def _rate(value: str) -> float:
+    """argparse type for --rate: images per minute, 0 for no limit"""
+    rate = float(value)
+    if rate < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 (no limit) or more, got {value}")
+    return rate
 
-    except Exception as e:
-        print(f"Error: {e}")
-        return False
 
 def main():
-    client = OpenAI(api_key=OPENAI_API_KEY)
-
-    success_count = 0
-    for tool_slug in TOOLS_TO_GENERATE:
-        if generate_infographic(client, tool_slug):
-            success_count += 1
-        print(f"\nProgress: {success_count}/{len(TOOLS_TO_GENERATE)} completed")
+    parser = argparse.ArgumentParser(description='Generate tool infographics and their responsive variants')
+    parser.add_argument('--variants-only', action='store_true',
+                        help='Only create WebP/AVIF variants of existing infographic.png files')
+    parser.add_argument('--force', action='store_true',
+                        help='Regenerate infographics (or re-encode variants) even if they are up to date')
+    parser.add_argument('--dry-run', action='store_true', help='List the tools that would be generated')
+    parser.add_argument('--workers', type=int, default=IMAGE_BULK_WORKERS,
+                        help=f'Concurrent DALL-E requests (default: {IMAGE_BULK_WORKERS})')
+    parser.add_argument('--rate', type=_rate, default=IMAGE_RATE_LIMIT_PER_MINUTE,
+                        help=f'Maximum images per minute, 0 for no limit (default: {IMAGE_RATE_LIMIT_PER_MINUTE})')
+    args = parser.parse_args()
+
+    if args.variants_only:
+        create_all_variants(args.force)
+        return
+
+    if not generate_all(max(1, args.workers), args.rate, force=args.force, dry_run=args.dry_run):
+        sys.exit(1)
 
-    print(f"\n{'='*50}")
-    print(f"COMPLETE: Generated {success_count}/{len(TOOLS_TO_GENERATE)} infographics")
-    print(f"{'='*50}")
 
 if __name__ == "__main__":
     main()
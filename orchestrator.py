@@ -8,36 +8,73 @@ Usage:
     python orchestrator.py --idea-only  # Only generate idea
     python orchestrator.py --build-only # Build from latest pending idea
     python orchestrator.py --showcase   # Only update showcase
+    python orchestrator.py --compact-ideas  # Compact the idea log
+    python orchestrator.py --stats      # Stage durations and adaptive timeouts
+    python orchestrator.py --optimize-assets  # Minify and precompress every existing tool
+    python orchestrator.py --batch 4 --workers 2  # Build several tools in parallel
+    python orchestrator.py --idea-candidates 3  # Race 3 idea requests, keep the first unique one
+    python orchestrator.py --resume-latest  # Continue the last interrupted run
+    python orchestrator.py --profile --trace-file trace.json  # Time every stage
 """
 
 import argparse
 import sys
 import io
 from datetime import datetime
+from functools import cached_property
 from pathlib import Path
+from typing import Optional, Tuple, TYPE_CHECKING
 
-# Fix Windows console encoding
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+if TYPE_CHECKING:
+    from concurrent.futures import Future
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from config import TOOLS_DIR, IDEAS_FILE
-from agents.idea_generator import IdeaGenerator
-from agents.image_generator import ImageGenerator
-from agents.tool_builder import ToolBuilder
-from agents.publisher import Publisher
+from config import BATCH_DEFAULT_WORKERS, IDEA_PARALLEL_CANDIDATES, PIPELINE_LOCK_FILE, PIPELINE_LOCK_MAX_AGE
+from agents.run_state import RunState
+from agents.profiler import profiler, span
 
 
 class PipelineOrchestrator:
     """Orchestrates the full tool building pipeline"""
 
-    def __init__(self):
-        self.idea_generator = IdeaGenerator()
-        self.image_generator = ImageGenerator()
-        self.tool_builder = ToolBuilder()
-        self.publisher = Publisher()
+    # Agents are imported and created on first use, so each CLI mode only
+    # pays for the agents (and SDKs) it actually touches.
+
+    def __init__(self, idea_candidates: Optional[int] = None, use_build_cache: bool = True):
+        self.idea_candidates = idea_candidates
+        self.use_build_cache = use_build_cache
+
+    @cached_property
+    def idea_store(self):
+        from agents.idea_store import IdeaStore
+        return IdeaStore()
+
+    @cached_property
+    def idea_generator(self):
+        from agents.idea_generator import IdeaGenerator
+        return IdeaGenerator(candidates=self.idea_candidates, store=self.idea_store)
+
+    @cached_property
+    def image_generator(self):
+        from agents.image_generator import ImageGenerator
+        return ImageGenerator()
+
+    @cached_property
+    def tool_builder(self):
+        from agents.tool_builder import ToolBuilder
+        return ToolBuilder(use_cache=self.use_build_cache)
+
+    @cached_property
+    def asset_optimizer(self):
+        from agents.asset_optimizer import AssetOptimizer
+        return AssetOptimizer()
+
+    @cached_property
+    def publisher(self):
+        from agents.publisher import Publisher
+        return Publisher()
 
     def _print_header(self, text: str) -> None:
         """Print a formatted header"""
@@ -50,62 +87,348 @@ class PipelineOrchestrator:
         print(f"\n[Step {step}] {text}")
         print("-" * 40)
 
+    def _print_resumed(self, step: int, text: str) -> None:
+        """Print a step that is satisfied by an earlier, checkpointed attempt"""
+        print(f"\n[Step {step}] {text} (already done, resuming)")
+
+    def _optimize_assets(self, run: RunState, tool_dir: Path, label: str = '') -> None:
+        """Minify and precompress a built tool; failures are non-fatal (the readable files still work)"""
+        run.start('optimize')
+        try:
+            with span('stage.optimize'):
+                self.asset_optimizer.optimize(tool_dir)
+        except Exception as e:
+            run.skip('optimize', f'Asset optimization failed: {e}')
+            print(f"{label}[WARN] Asset optimization failed (publishing unminified files): {e}")
+            return
+        run.complete('optimize')
+
+    def _start_infographic(self, idea: dict, tool_dir: Path) -> 'Future':
+        """Start infographic generation in the background so it overlaps the build"""
+        from concurrent.futures import ThreadPoolExecutor
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='infographic')
+        future = pool.submit(self._generate_infographic, idea, tool_dir)
+        pool.shutdown(wait=False)
+        return future
+
+    def _generate_infographic(self, idea: dict, tool_dir: Path) -> Optional[Path]:
+        with span('stage.infographic'):
+            return self.image_generator.generate(idea, tool_dir)
+
+    def _prepare_publish(self) -> None:
+        """Import the publisher and open its registry in the background, while the build leaves the CPU idle"""
+        import threading
+        threading.Thread(target=lambda: self.publisher.registry.conn, name='publish-prepare', daemon=True).start()
+
+    def _wait_for_infographic(self, future: 'Future') -> Optional[Path]:
+        """Join a background infographic; failures are non-fatal"""
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Infographic generation error: {e}")
+            return None
+
+    def _discard_infographic(self, future: 'Future') -> None:
+        """Drop the infographic of a failed build, without waiting for an in-flight request"""
+        if future.cancel():
+            return
+
+        def _cleanup(done: 'Future') -> None:
+            try:
+                path = done.result()
+            except Exception:
+                return
+            if path and path.exists():
+                path.unlink()
+                print(f"Discarded infographic of failed build: {path}")
+
+        future.add_done_callback(_cleanup)
+
     def run_full_pipeline(self, skip_git: bool = False) -> bool:
-        """Run the complete pipeline: idea -> image -> build -> publish"""
+        """Run the complete pipeline: idea -> (build + image) -> publish"""
         self._print_header("FarmTech UP - Tool Building Pipeline")
         print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
-        # Step 1: Generate Idea
-        self._print_step(1, "Generating new tool idea...")
-        idea = self.idea_generator.generate()
-        if not idea:
-            print("[FAILED] Failed to generate idea. Aborting pipeline.")
+        run = RunState.create(mode='full', skip_git=skip_git)
+        print(f"Run ID: {run.run_id} (resume with --resume {run.run_id})")
+        return self._run_stages(run)
+
+    def resume_run(self, run_id: Optional[str] = None) -> bool:
+        """Continue a checkpointed run from its first incomplete stage"""
+        run = RunState.load(run_id) if run_id else RunState.latest_incomplete()
+        if not run:
+            print(f"[FAILED] No run found to resume{f': {run_id}' if run_id else ''}")
             return False
-        print(f"[OK] Generated: {idea.get('name')}")
-        print(f"     Pain point: {idea.get('pain_point')}")
 
-        # Step 2: Build Tool
-        self._print_step(2, "Building tool with Claude Code...")
-        tool_dir = self.tool_builder.build(idea)
-        if not tool_dir:
-            print("[FAILED] Failed to build tool. Aborting pipeline.")
+        self._print_header(f"Resuming Run {run.run_id}")
+        if run.data.get('status') == 'completed':
+            print("[OK] Run already completed, nothing to do")
+            return True
+        if run.is_active():
+            print(f"[FAILED] Run {run.run_id} is still in progress (pid {run.data['owner']['pid']})")
             return False
-        print(f"[OK] Built at: {tool_dir}")
+        run.claim()
+
+        print(f"Started at: {run.data.get('started_at')}")
+        print(f"Continuing from stage: {run.next_stage()}")
+        return self._run_stages(run)
 
-        # Step 3: Generate Infographic
-        self._print_step(3, "Generating infographic...")
-        infographic_path = self.image_generator.generate(idea, tool_dir)
-        if infographic_path:
-            print(f"[OK] Infographic: {infographic_path}")
+    def _run_stages(self, run: RunState) -> bool:
+        """Run every stage of a run that is not already checkpointed as done"""
+        skip_git = run.data.get('skip_git', False)
+
+        # Step 1: Generate Idea
+        idea = run.artifact('idea')
+        if run.is_done('idea') and idea:
+            self._print_resumed(1, f"Idea: {idea.get('name')}")
+        else:
+            self._print_step(1, "Generating new tool idea...")
+            run.start('idea')
+            with span('stage.idea'):
+                idea = self.idea_generator.generate()
+            if not idea:
+                run.fail('idea', 'Failed to generate idea')
+                print("[FAILED] Failed to generate idea. Aborting pipeline.")
+                return False
+            run.complete('idea', idea=idea)
+            print(f"[OK] Generated: {idea.get('name')}")
+            print(f"     Pain point: {idea.get('pain_point')}")
+
+        # Steps 2 and 3: the infographic only needs the idea, so it is generated while the tool builds
+        tool_dir = Path(run.artifact('tool_dir')) if run.artifact('tool_dir') else self.tool_builder.get_tool_dir(idea)
+        image_future = None
+        infographic = run.artifact('infographic')
+        if run.is_done('infographic') and infographic and not Path(infographic).exists():
+            # It lives in the tool directory, so it goes missing along with the build
+            run.reset('infographic')
+        if not run.is_done('infographic'):
+            run.start('infographic')
+            image_future = self._start_infographic(idea, tool_dir)
+
+        # Step 2: Build Tool (re-run if the checkpointed output has gone missing)
+        rebuild = not (run.is_done('build') and self.tool_builder.is_built(tool_dir))
+        if rebuild:
+            # A fresh build leaves the old dist/ and registry entry stale
+            run.reset_dependents()
+
+        if not run.is_done('publish'):
+            self._prepare_publish()
+
+        if not rebuild:
+            self._print_resumed(2, f"Built at: {tool_dir}")
         else:
-            print("[WARN] Infographic generation failed (continuing anyway)")
+            self._print_step(2, "Building tool with Claude Code...")
+            if image_future:
+                print("(infographic is being generated in the background)")
+            run.start('build')
+            with span('stage.build'):
+                tool_dir = self.tool_builder.build(idea)
+            if not tool_dir:
+                if image_future:
+                    self._discard_infographic(image_future)
+                    run.reset('infographic')
+                run.fail('build', 'Failed to build tool')
+                print("[FAILED] Failed to build tool. Aborting pipeline.")
+                return False
+            run.complete('build', tool_dir=str(tool_dir))
+            self.idea_store.set_status(idea.get('id'), 'built')
+            print(f"[OK] Built at: {tool_dir}")
+
+        # Minify and precompress the build (skipped if its sources are unchanged)
+        if not run.is_done('optimize'):
+            self._optimize_assets(run, tool_dir)
+
+        # Step 3: Join the infographic
+        if not image_future:
+            self._print_resumed(3, f"Infographic: {run.artifact('infographic')}")
+        else:
+            self._print_step(3, "Generating infographic...")
+            infographic_path = self._wait_for_infographic(image_future)
+            run.complete('infographic', infographic=str(infographic_path) if infographic_path else None)
+            if infographic_path:
+                print(f"[OK] Infographic: {infographic_path}")
+            else:
+                print("[WARN] Infographic generation failed (continuing anyway)")
 
         # Step 4: Publish
-        self._print_step(4, "Publishing to showcase...")
-        if self.publisher.publish_tool(idea, tool_dir):
-            print("[OK] Showcase updated")
+        if run.is_done('publish'):
+            self._print_resumed(4, "Published to showcase")
         else:
-            print("[FAILED] Failed to update showcase")
-            return False
+            self._print_step(4, "Publishing to showcase...")
+            run.start('publish')
+            with span('stage.publish'):
+                published = self.publisher.publish_tool(idea, tool_dir)
+            if published:
+                run.complete('publish')
+                print("[OK] Showcase updated")
+            else:
+                run.fail('publish', 'Failed to update showcase')
+                print("[FAILED] Failed to update showcase")
+                return False
 
         # Step 5: Git commit (optional)
-        if not skip_git:
+        if skip_git:
+            if not run.is_done('git'):
+                run.skip('git', 'git operations disabled for this run')
+        elif not run.is_done('git'):
             self._print_step(5, "Committing to Git...")
+            run.start('git')
             commit_msg = f"Add tool: {idea.get('name')}\n\n{idea.get('short_description')}"
-            if self.publisher.git_commit_and_push(commit_msg):
+            with span('stage.git'):
+                pushed = self.publisher.git_commit_and_push(commit_msg)
+            if pushed:
+                run.complete('git')
                 print("[OK] Committed and pushed")
             else:
+                # Non-fatal, but left incomplete so --resume can retry it
+                run.fail('git', 'Git operations skipped or failed')
                 print("[WARN] Git operations skipped or failed")
 
+        if run.is_done('git'):
+            run.finish()
+
         # Summary
         self._print_header("Pipeline Complete!")
         print(f"Tool Name: {idea.get('name')}")
         print(f"Hindi Name: {idea.get('name_hindi', 'N/A')}")
         print(f"Location: {tool_dir}")
+        print(f"Run ID: {run.run_id}")
         print(f"Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
         return True
 
+    def _run_batch_item(self, index: int, total: int, skip_git: bool) -> Optional[Tuple[dict, Path, RunState]]:
+        """Generate, build and illustrate one tool of a batch (publishing happens later)"""
+        label = f"[Batch {index}/{total}]"
+        run = RunState.create(mode='batch', skip_git=skip_git)
+
+        print(f"{label} Generating new tool idea... (run {run.run_id})")
+        run.start('idea')
+        with span('stage.idea'):
+            idea = self.idea_generator.generate()
+        if not idea:
+            run.fail('idea', 'Failed to generate idea')
+            print(f"{label} [FAILED] Failed to generate idea")
+            return None
+        run.complete('idea', idea=idea)
+
+        print(f"{label} Building: {idea.get('name')} (infographic in background)")
+        run.start('infographic')
+        image_future = self._start_infographic(idea, self.tool_builder.get_tool_dir(idea))
+        run.start('build')
+        with span('stage.build'):
+            tool_dir = self.tool_builder.build(idea)
+        if not tool_dir:
+            self._discard_infographic(image_future)
+            run.reset('infographic')
+            run.fail('build', 'Failed to build tool')
+            print(f"{label} [FAILED] Failed to build {idea.get('name')}")
+            return None
+        run.complete('build', tool_dir=str(tool_dir))
+        self.idea_store.set_status(idea.get('id'), 'built')
+        self._optimize_assets(run, tool_dir, f"{label} ")
+
+        infographic_path = self._wait_for_infographic(image_future)
+        run.complete('infographic', infographic=str(infographic_path) if infographic_path else None)
+        if not infographic_path:
+            print(f"{label} [WARN] Infographic generation failed (continuing anyway)")
+
+        print(f"{label} [OK] Built at: {tool_dir}")
+        return idea, tool_dir, run
+
+    def _init_agents(self) -> None:
+        """Create the shared agents before batch workers start, so they all use the same instances"""
+        for name in ('idea_store', 'idea_generator', 'tool_builder', 'image_generator', 'asset_optimizer'):
+            getattr(self, name)
+
+    def run_batch(self, count: int, workers: int = BATCH_DEFAULT_WORKERS, skip_git: bool = False) -> bool:
+        """Run idea -> build -> image for several tools in parallel, then publish them together"""
+        workers = max(1, min(workers, count))
+        self._print_header(f"FarmTech UP - Batch Pipeline ({count} tools, {workers} workers)")
+        started = datetime.now()
+        print(f"Started at: {started.strftime('%Y-%m-%d %H:%M:%S')}")
+
+        self._init_agents()
+
+        # Steps 1-3 run concurrently; each tool is built in its own directory
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        self._print_step(1, f"Generating and building {count} tools...")
+        built = []
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as pool:
+            futures = [pool.submit(self._run_batch_item, i + 1, count, skip_git) for i in range(count)]
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"[ERROR] Batch worker failed: {e}")
+                    continue
+                if result:
+                    built.append(result)
+
+        if not built:
+            print("[FAILED] No tools were built. Aborting pipeline.")
+            return False
+
+        # Step 2: Registry and showcase are written once, from this thread only
+        self._print_step(2, f"Publishing {len(built)} tools to showcase...")
+        with span('stage.publish', tools=len(built)):
+            registered = []
+            for idea, tool_dir, run in built:
+                run.start('publish')
+                try:
+                    self.publisher.register_tool(idea, tool_dir)
+                except Exception as e:
+                    # One failed registry write must not cost the other tools their publish
+                    run.fail('publish', f'Failed to register tool: {e}')
+                    print(f"[FAILED] Failed to register {idea.get('name')}: {e}")
+                    continue
+                registered.append((idea, tool_dir, run))
+            built = registered
+            published = bool(built) and self.publisher.update_showcase()
+        if not built:
+            print("[FAILED] No tools were registered")
+            return False
+        if published:
+            for _, _, run in built:
+                run.complete('publish')
+            print("[OK] Showcase updated")
+        else:
+            for _, _, run in built:
+                run.fail('publish', 'Failed to update showcase')
+            print("[FAILED] Failed to update showcase")
+            return False
+
+        # Step 3: Git commit (optional)
+        if skip_git:
+            for _, _, run in built:
+                run.skip('git', 'git operations disabled for this run')
+                run.finish()
+        else:
+            self._print_step(3, "Committing to Git...")
+            names = [idea.get('name') for idea, _, _ in built]
+            commit_msg = f"Add {len(built)} tools\n\n" + "\n".join(f"- {n}" for n in names)
+            for _, _, run in built:
+                run.start('git')
+            with span('stage.git'):
+                pushed = self.publisher.git_commit_and_push(commit_msg)
+            if pushed:
+                for _, _, run in built:
+                    run.complete('git')
+                    run.finish()
+                print("[OK] Committed and pushed")
+            else:
+                for _, _, run in built:
+                    run.fail('git', 'Git operations skipped or failed')
+                print("[WARN] Git operations skipped or failed")
+
+        # Summary
+        self._print_header("Batch Complete!")
+        for idea, tool_dir, run in built:
+            print(f"[OK] {idea.get('name')} -> {tool_dir} (run {run.run_id})")
+        print(f"Published {len(built)}/{count} tools in {(datetime.now() - started).total_seconds():.0f}s")
+
+        return len(built) == count
+
     def generate_idea_only(self) -> bool:
         """Only generate a new idea without building"""
         self._print_header("Generating Tool Idea Only")
@@ -127,38 +450,54 @@ class PipelineOrchestrator:
         """Build the latest pending idea"""
         self._print_header("Building Pending Idea")
 
-        # Load ideas and find pending ones
-        import json
-        if not IDEAS_FILE.exists():
-            print("[FAILED] No ideas file found")
-            return False
-
-        with open(IDEAS_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        pending = [i for i in data.get('ideas', []) if i.get('status') == 'pending']
-        if not pending:
+        idea = self.idea_store.latest('pending')
+        if not idea:
             print("[FAILED] No pending ideas found")
             return False
 
-        idea = pending[-1]  # Get latest pending
         print(f"Building: {idea.get('name')}")
 
-        # Build
-        tool_dir = self.tool_builder.build(idea)
-        if not tool_dir:
-            print("[FAILED] Failed to build")
-            return False
+        # Checkpoint the existing idea so a failed build can be resumed like any other run
+        run = RunState.create(mode='build', skip_git=True)
+        run.complete('idea', idea=idea)
+        print(f"Run ID: {run.run_id} (resume with --resume {run.run_id})")
 
-        # Generate infographic
-        self.image_generator.generate(idea, tool_dir)
+        return self._run_stages(run)
 
-        # Publish
-        self.publisher.publish_tool(idea, tool_dir)
+    def compact_ideas(self) -> bool:
+        """Rewrite the idea log with one line per idea"""
+        self._print_header("Compacting Idea Store")
+
+        from agents.locking import FileLock
+        lock = FileLock(PIPELINE_LOCK_FILE, max_age=PIPELINE_LOCK_MAX_AGE)
+        if not lock.acquire(blocking=False):
+            print("[FAILED] A pipeline run is in progress; try again when it has finished")
+            return False
+        try:
+            before, after = self.idea_store.compact()
+        finally:
+            lock.release()
+        print(f"[OK] {self.idea_store.path.name}: {before} lines -> {after} lines")
+        return True
 
-        print(f"[OK] Built and published: {tool_dir}")
+    def show_stats(self) -> bool:
+        """Print the per-stage call history and the timeouts derived from it"""
+        from agents.stage_stats import stage_stats
+        from config import CLAUDE_CODE_TIMEOUT
+        self._print_header("Stage Statistics")
+        stage_stats.print_summary(CLAUDE_CODE_TIMEOUT)
         return True
 
+    def optimize_all_assets(self, workers: Optional[int] = None, force: bool = False) -> bool:
+        """Minify and precompress every tool under tools/, then point the showcase at the results"""
+        self._print_header("Optimizing Tool Assets")
+        optimized, _, failed = self.asset_optimizer.optimize_all(workers=workers, force=force)
+        moved = self.publisher.refresh_tool_urls()
+        if (optimized or moved) and not self.publisher.update_showcase():
+            print("[FAILED] Failed to update showcase")
+            return False
+        return failed == 0
+
     def update_showcase_only(self) -> bool:
         """Only regenerate the showcase site"""
         self._print_header("Updating Showcase")
@@ -171,6 +510,14 @@ class PipelineOrchestrator:
             return False
 
 
+def _positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='FarmTech UP - Automated Tool Building Pipeline',
@@ -181,7 +528,14 @@ Examples:
     python orchestrator.py --idea-only  # Only generate idea
     python orchestrator.py --build      # Build latest pending idea
     python orchestrator.py --showcase   # Update showcase only
+    python orchestrator.py --compact-ideas  # Compact the idea log
+    python orchestrator.py --stats      # Stage durations and adaptive timeouts
+    python orchestrator.py --optimize-assets --workers 4  # Minify and precompress all tools
     python orchestrator.py --no-git     # Run without git operations
+    python orchestrator.py --batch 4 --workers 2  # Build 4 tools, 2 at a time
+    python orchestrator.py --idea-candidates 3  # Race 3 idea requests, keep the first unique one
+    python orchestrator.py --resume-latest  # Continue the last interrupted run
+    python orchestrator.py --profile --trace-file trace.json  # Time every stage
         '''
     )
 
@@ -200,37 +554,126 @@ Examples:
         action='store_true',
         help='Only update the showcase site'
     )
+    parser.add_argument(
+        '--stats',
+        action='store_true',
+        help='Show per-stage call durations, success rates and adaptive timeouts'
+    )
+    parser.add_argument(
+        '--compact-ideas',
+        action='store_true',
+        help='Rewrite the append-only idea log with one line per idea'
+    )
+    parser.add_argument(
+        '--optimize-assets',
+        action='store_true',
+        help='Minify and precompress every tool in tools/ in parallel (use --workers, --force)'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='With --optimize-assets, reprocess tools whose sources have not changed'
+    )
     parser.add_argument(
         '--no-git',
         action='store_true',
         help='Skip git commit and push operations'
     )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always run a full claude build, ignoring (and not updating) the build cache'
+    )
+    parser.add_argument(
+        '--batch',
+        type=_positive_int,
+        metavar='N',
+        help='Generate and build N tools in parallel, then publish them together'
+    )
+    parser.add_argument(
+        '--workers',
+        type=_positive_int,
+        default=BATCH_DEFAULT_WORKERS,
+        metavar='K',
+        help=f'Parallel builds for --batch, or processes for --optimize-assets (default: {BATCH_DEFAULT_WORKERS})'
+    )
+    parser.add_argument(
+        '--idea-candidates',
+        type=int,
+        default=IDEA_PARALLEL_CANDIDATES,
+        metavar='K',
+        help=f'Concurrent claude calls per idea; the first unique result wins (default: {IDEA_PARALLEL_CANDIDATES})'
+    )
+    parser.add_argument(
+        '--resume',
+        metavar='RUN_ID',
+        help='Continue a checkpointed run from its first incomplete stage'
+    )
+    parser.add_argument(
+        '--resume-latest',
+        action='store_true',
+        help='Continue the most recent run that did not complete'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Record per-stage timings and print a summary table at the end'
+    )
+    parser.add_argument(
+        '--trace-file',
+        metavar='PATH',
+        help='Write recorded spans as a Chrome trace JSON file (implies --profile)'
+    )
 
     args = parser.parse_args()
 
-    orchestrator = PipelineOrchestrator()
+    if args.profile or args.trace_file:
+        profiler.enable()
+
+    orchestrator = PipelineOrchestrator(idea_candidates=args.idea_candidates, use_build_cache=not args.no_cache)
 
     try:
-        if args.idea_only:
-            success = orchestrator.generate_idea_only()
-        elif args.build:
-            success = orchestrator.build_pending_idea()
-        elif args.showcase:
-            success = orchestrator.update_showcase_only()
-        else:
-            success = orchestrator.run_full_pipeline(skip_git=args.no_git)
+        with span('pipeline'):
+            if args.resume or args.resume_latest:
+                success = orchestrator.resume_run(args.resume)
+            elif args.idea_only:
+                success = orchestrator.generate_idea_only()
+            elif args.build:
+                success = orchestrator.build_pending_idea()
+            elif args.showcase:
+                success = orchestrator.update_showcase_only()
+            elif args.compact_ideas:
+                success = orchestrator.compact_ideas()
+            elif args.stats:
+                success = orchestrator.show_stats()
+            elif args.optimize_assets:
+                success = orchestrator.optimize_all_assets(args.workers, force=args.force)
+            elif args.batch:
+                success = orchestrator.run_batch(args.batch, args.workers, skip_git=args.no_git)
+            else:
+                success = orchestrator.run_full_pipeline(skip_git=args.no_git)
 
-        sys.exit(0 if success else 1)
+        exit_code = 0 if success else 1
 
     except KeyboardInterrupt:
         print("\n\n[WARN] Pipeline interrupted by user")
-        sys.exit(130)
+        exit_code = 130
     except Exception as e:
         print(f"\n[ERROR] Pipeline error: {e}")
         import traceback
         traceback.print_exc()
-        sys.exit(1)
+        exit_code = 1
+
+    if profiler.enabled:
+        profiler.print_summary()
+        if args.trace_file:
+            profiler.write_trace(Path(args.trace_file))
+
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
+    # Fix Windows console encoding (only when run as a script, so importers keep their streams)
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
     main()
@@ -2,8 +2,21 @@
 """
 FarmTech UP - Pipeline Scheduler
 Runs the pipeline at regular intervals
+
+By default the pipeline runs in-process: agents, the idea history and imported
+SDKs stay warm between ticks instead of paying interpreter startup every run.
+A lock file prevents overlapping runs (also across scheduler processes), and
+ticks missed while a long build was running are coalesced into one run or skipped.
+
+Usage:
+    python scheduler.py                      # In-process, every 10 minutes
+    python scheduler.py --interval 30        # Every 30 minutes
+    python scheduler.py --missed skip        # Drop ticks missed during a long run
+    python scheduler.py --once               # Run a single tick and exit
+    python scheduler.py --subprocess         # Legacy: new interpreter per run
 """
 
+import argparse
 import time
 import subprocess
 import sys
@@ -11,17 +24,18 @@ import io
 from datetime import datetime
 from pathlib import Path
 
-# Fix Windows console encoding
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+PIPELINE_DIR = Path(__file__).parent
+sys.path.insert(0, str(PIPELINE_DIR))
+
+from config import SCHEDULER_INTERVAL_MINUTES, PIPELINE_LOCK_FILE, PIPELINE_LOCK_MAX_AGE
+from agents.locking import FileLock
 
 # Configuration
-INTERVAL_MINUTES = 10
-PIPELINE_DIR = Path(__file__).parent
+INTERVAL_MINUTES = SCHEDULER_INTERVAL_MINUTES
 
 
 def run_pipeline():
-    """Run the full pipeline"""
+    """Run the full pipeline in a fresh interpreter (legacy --subprocess mode)"""
     print(f"\n{'='*60}")
     print(f"  Starting Pipeline Run: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"{'='*60}\n")
@@ -72,34 +86,139 @@ def push_to_git():
         print(f"Git push error: {e}")
 
 
+class PipelineScheduler:
+    """Runs the pipeline in-process on a fixed schedule, never overlapping runs"""
+
+    def __init__(self, interval_minutes: float = INTERVAL_MINUTES, missed: str = 'coalesce',
+                 use_subprocess: bool = False):
+        self.interval = interval_minutes * 60
+        self.missed = missed
+        self.use_subprocess = use_subprocess
+        self.lock = FileLock(PIPELINE_LOCK_FILE, max_age=PIPELINE_LOCK_MAX_AGE)
+        self.run_count = 0
+        self._orchestrator = None
+
+    @property
+    def orchestrator(self):
+        """One long-lived orchestrator, so agents and their caches stay warm between ticks"""
+        if self._orchestrator is None:
+            from orchestrator import PipelineOrchestrator
+            self._orchestrator = PipelineOrchestrator()
+        return self._orchestrator
+
+    def run_once(self) -> bool:
+        """Run one tick, unless another run still holds the pipeline lock"""
+        self.run_count += 1
+        print(f"\n[Run #{self.run_count}]")
+
+        if not self.lock.acquire(blocking=False):
+            holder = self.lock.holder() or {}
+            print(f"[SKIP] Another pipeline run is in progress "
+                  f"(pid {holder.get('pid')}, since {holder.get('acquired_at')})")
+            return False
+
+        try:
+            if self.use_subprocess:
+                run_pipeline()
+                return True
+
+            print(f"\n{'='*60}")
+            print(f"  Starting Pipeline Run: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            print(f"{'='*60}\n")
+            started = time.monotonic()
+            success = self.orchestrator.run_full_pipeline(skip_git=True)
+            if success:
+                print(f"\n[SUCCESS] Pipeline completed successfully in {time.monotonic() - started:.0f}s")
+                push_to_git()
+            else:
+                print("\n[FAILED] Pipeline failed (resume with: python orchestrator.py --resume-latest)")
+            return success
+
+        except Exception as e:
+            # Keep the daemon alive; the run record makes the failure resumable
+            print(f"\n[ERROR] Pipeline error: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+        finally:
+            self.lock.release()
+
+    def _next_tick(self, scheduled: float) -> float:
+        """Work out when to run next, handling ticks missed while the last run was going"""
+        scheduled += self.interval
+        now = time.monotonic()
+        if scheduled > now:
+            return scheduled
+
+        missed = int((now - scheduled) // self.interval) + 1
+        if self.missed == 'coalesce':
+            print(f"[WARN] Last run overran {missed} tick(s); running once now to catch up")
+            return now
+        print(f"[WARN] Last run overran; skipping {missed} missed tick(s)")
+        return scheduled + missed * self.interval
+
+    def run_forever(self) -> None:
+        scheduled = time.monotonic()
+        while True:
+            self.run_once()
+
+            scheduled = self._next_tick(scheduled)
+            wait = max(0.0, scheduled - time.monotonic())
+            if wait:
+                print(f"\nNext run in {wait / 60:.1f} minutes... "
+                      f"(started waiting at {datetime.now().strftime('%H:%M:%S')})")
+                print("Press Ctrl+C to stop\n")
+            time.sleep(wait)
+
+
 def main():
-    print("""
+    parser = argparse.ArgumentParser(description='FarmTech UP - Pipeline Scheduler')
+    parser.add_argument(
+        '--interval',
+        type=float,
+        default=INTERVAL_MINUTES,
+        help=f'Minutes between runs (default: {INTERVAL_MINUTES})'
+    )
+    parser.add_argument(
+        '--missed',
+        choices=['coalesce', 'skip'],
+        default='coalesce',
+        help='What to do with ticks missed during a long run: run once right away, or wait for the next tick'
+    )
+    parser.add_argument(
+        '--once',
+        action='store_true',
+        help='Run a single tick and exit'
+    )
+    parser.add_argument(
+        '--subprocess',
+        action='store_true',
+        help='Start a fresh orchestrator.py interpreter for every run (legacy behaviour)'
+    )
+    args = parser.parse_args()
+
+    scheduler = PipelineScheduler(args.interval, missed=args.missed, use_subprocess=args.subprocess)
+
+    if args.once:
+        sys.exit(0 if scheduler.run_once() else 1)
+
+    print(f"""
 ================================================================
         FarmTech UP - Automated Pipeline Scheduler
 
-        Running pipeline every 10 minutes
+        Running pipeline every {args.interval:g} minutes ({'subprocess' if args.subprocess else 'in-process'})
         Press Ctrl+C to stop
 ================================================================
     """)
 
-    run_count = 0
-
-    while True:
-        run_count += 1
-        print(f"\n[Run #{run_count}]")
-
-        run_pipeline()
-
-        next_run = datetime.now().strftime('%H:%M:%S')
-        print(f"\nNext run in {INTERVAL_MINUTES} minutes... (started waiting at {next_run})")
-        print("Press Ctrl+C to stop\n")
-
-        try:
-            time.sleep(INTERVAL_MINUTES * 60)
-        except KeyboardInterrupt:
-            print("\n\nScheduler stopped by user.")
-            break
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        print("\n\nScheduler stopped by user.")
 
 
 if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
     main()